@@ -1,15 +1,32 @@
 from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 import csv, os, cv2, json, time, threading
-from PIL import Image
-import torch
-from torch.nn.functional import cosine_similarity
-from facenet_pytorch import MTCNN, InceptionResnetV1
 from web3 import Web3
+from web3.exceptions import ContractLogicError
 from twilio.rest import Client
 from dotenv import load_dotenv
-import numpy as np
-import secrets
+from receipt_store import ReceiptStore
+from vote_index import VoteIndex
+from vote_verifier import VoteVerifier
+from otp_store import make_otp_store
+from sms_broadcast import BroadcastEngine, TwilioSender, FakeSMSSender
+from candidate_catalog import CandidateCatalog
+from contract_pager import ContractPager
+from face_templates import FaceTemplate, SharedEmbeddingBank, template_from_folder, embed_face, load_templates, decode_frame
+from face_models import mtcnn, model, face_gate, FaceBusy
+from kiosk_sessions import make_session_store, make_frame_store
+from voter_store import VoterStore, VOTER_FIELDS, clean_mobile
+from booth_shards import open_shard, shard_name
+from edit_requests import EditRequestQueue
+from voted_filter import VotedFilter
+from turnout import TurnoutTracker
+from receipt_merkle import ReceiptForest
+from ballot_journal import BallotJournal, BallotReplayer, BallotRejected, JournalError, AlreadyQueued
+import metrics
+import singletons
+from metrics import RPC_SECONDS, STORAGE_SECONDS, SMS_SECONDS, HTTP_SECONDS, VERIFICATIONS, VOTED_FILTER_CHECKS, BALLOT_BACKLOG, BALLOT_LAG_SECONDS, cache_lookup
+from tracing import tracer, span, new_trace_id
+from rpc_client import provider_from_env, call_all
 
 # ------------------------------
 # Load .env
@@ -25,8 +42,6 @@ EC_CONTRACT_ADDRESS = os.getenv("VITE_EC_CONTRACT_ADDRESS")
 VOTER_PRIVATE_KEY = os.getenv("VOTER_PRIVATE_KEY")
 ALCHEMY_URL = os.getenv("ALCHEMY_URL")
 
-otp_store = {}
-
 print("🔥 APP.PY RUNNING (FAST FACE AUTH ENABLED) 🔥")
 
 app = Flask(__name__, static_folder='../Frontend', static_url_path='/static')
@@ -35,18 +50,43 @@ CORS(app)
 # ------------------------------
 # Globals
 # ------------------------------
-current_epic = None
-current_polling_id = None
-
 camera_active = False
 latest_frame = None
 camera_thread = None
 
+# ------------------------------
+# Kiosk sessions
+# ------------------------------
+# Each kiosk (X-Kiosk-Id header, "default" for the bundled frontend) has its
+# own voter in progress: {epic, polling_id, trace_id} in kiosk_sessions.
+# Frames pushed by a kiosk go to kiosk_frames. Only the bundled frontend
+# (no X-Kiosk-Id) falls back to the server's own webcam: a remote kiosk that
+# has not sent a frame has no face, never the face at the backend camera.
+
+def kiosk_id():
+    return request.headers.get('X-Kiosk-Id', 'default')
+
+def kiosk():
+    return kiosk_sessions.get(kiosk_id())
+
+def frame_for(kiosk, remote):
+    """Latest frame for a kiosk; the webcam only for the local (header-less) one"""
+    frame = kiosk_frames.get(kiosk)
+    if frame is None and not remote:
+        frame = latest_frame
+    return frame
+
+def kiosk_frame():
+    return frame_for(kiosk_id(), 'X-Kiosk-Id' in request.headers)
+
+# Voter endpoint logic returns (payload, status) results, shared with async_app.py
+def respond(result):
+    payload, status = result
+    return jsonify(payload), status
+
 # 🔥 FACE CACHE
-face_cache = {}  # EPIC -> list of embeddings
+face_cache = {}  # EPIC -> FaceTemplate
 voted_face_cache = []  # list of EPICs who have voted
-# 🔥 CANDIDATE CACHE (KEY FIX)
-candidate_cache = {}  # polling_id -> candidates list
 import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -57,7 +97,31 @@ print("📁 Dataset base:", DATASET_BASE)
 # ------------------------------
 # Blockchain setup
 # ------------------------------
-w3 = Web3(Web3.HTTPProvider(ALCHEMY_URL))
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Dataset', 'dummy_voters.csv')
+
+# BOOTH_ID=<booth> runs a single-booth kiosk from its shard (booth_shards.py):
+# only that booth's roll, face embeddings and candidates are loaded
+BOOTH_ID = os.getenv("BOOTH_ID")
+booth_shard = None
+if BOOTH_ID:
+    booth_shard = open_shard(os.getenv("SHARD_DIR", os.path.join(os.path.dirname(CSV_PATH), 'shards')), BOOTH_ID)
+    CSV_PATH = booth_shard.voters_csv
+    print(f"📦 Booth shard {BOOTH_ID}: {booth_shard.manifest['voters']} voters, "
+          f"{booth_shard.manifest['enrolled']} enrolled ({booth_shard.manifest['dtype']})")
+
+# CHAIN_BACKEND=tester deploys EC/Voting on an in-process chain (load runs)
+if os.getenv("CHAIN_BACKEND", "rpc") == "tester":
+    from local_chain import start_local_chain
+    local_chain = start_local_chain(CSV_PATH)
+    w3 = local_chain.w3
+    EC_CONTRACT_ADDRESS = local_chain.ec_address
+    VOTING_CONTRACT_ADDRESS = local_chain.voting_address
+    VOTER_PRIVATE_KEY = local_chain.voter_private_key
+    os.environ.setdefault("VOTING_DEPLOY_BLOCK", str(local_chain.deploy_block))
+    os.environ.setdefault("EC_DEPLOY_BLOCK", str(local_chain.deploy_block))
+else:
+    # Pooled keep-alive client; RPC_URLS=url1,url2 adds fail-over nodes
+    w3 = Web3(provider_from_env())
 assert w3.is_connected()
 
 with open("VotingABI.json") as f:
@@ -77,21 +141,132 @@ ec_contract = w3.eth.contract(
 )
 
 VOTER_ACCOUNT = w3.eth.account.from_key(VOTER_PRIVATE_KEY).address
+tx_lock = threading.Lock()   # one signer: nonce fetch + send must not interleave
+
+DATASET_DIR = os.path.join(os.path.dirname(BASE_DIR), 'Dataset')
+STATE_DIR = os.getenv("STATE_DIR", DATASET_DIR)   # receipts, indexes, OTPs, broadcasts
+HASHKEY_CSV = os.path.join(STATE_DIR, 'hashKey.csv')
 
 # ------------------------------
-# Load voters
+# Load voters (booth-indexed, re-imported when the CSV changes)
 # ------------------------------
-CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Dataset', 'dummy_voters.csv')
-with open(CSV_PATH, newline='', encoding='utf-8') as f:
-    voters = list(csv.DictReader(f))
+def state_db(name):
+    """STATE_DIR/<name>.db, or <name>-<booth>.db for a booth shard kiosk"""
+    return os.path.join(STATE_DIR, f'{name}-{shard_name(BOOTH_ID)}.db' if booth_shard else f'{name}.db')
+
+voter_store = VoterStore(state_db('voters'), CSV_PATH)
+voter_store.sync_csv()
+voters_csv_lock = threading.Lock()   # CSV rewrite + store update happen together
+voter_store.start_watch(int(os.getenv("VOTER_CSV_POLL_SECONDS", "5")), lock=voters_csv_lock)
+
+# BLO edit-request queue (same database, so approvals are one transaction)
+edit_requests = EditRequestQueue(voter_store, os.path.join(DATASET_DIR, 'voter_edit_requests.csv'))
+
+# ------------------------------
+# Vote receipts (hash-indexed)
+# ------------------------------
+
+receipt_store = ReceiptStore(os.path.join(STATE_DIR, 'receipts.db'))
+
+# SESSION_BACKEND=sqlite shares kiosk sessions between pre-fork workers
+kiosk_sessions = make_session_store(
+    os.getenv("SESSION_BACKEND", "memory"),
+    db_path=os.path.join(STATE_DIR, 'sessions.db')
+)
+
+# FRAME_BACKEND=sqlite shares uploaded kiosk frames between pre-fork workers
+kiosk_frames = make_frame_store(
+    os.getenv("FRAME_BACKEND", "memory"),
+    db_path=os.path.join(STATE_DIR, 'kiosk_frames.db'),
+    max_entries=int(os.getenv("KIOSK_FRAMES_MAX", "256")),
+    ttl_seconds=int(os.getenv("KIOSK_FRAME_TTL_SECONDS", "300")),
+    decode=lambda data: decode_frame(data, FRAME_MAX_SIDE)
+)
+
+def claim_singleton(name):
+    """True in exactly one process per STATE_DIR, e.g. the first pre-fork worker"""
+    return singletons.claim(STATE_DIR, name)
+
+def run_singleton(name, start):
+    """start() in one process per STATE_DIR, taken over when that process exits (HUP reload)"""
+    return singletons.run_singleton(STATE_DIR, name, start, int(os.getenv("SINGLETON_RETRY_SECONDS", "5")))
+
+if receipt_store.count() == 0 and os.path.isfile(HASHKEY_CSV):
+    print("📥 Importing receipts:", receipt_store.import_csv(HASHKEY_CSV))
+
+# ------------------------------
+# VoteCast index + verification service
+# ------------------------------
+# A booth shard indexes only its own booth's votes
+vote_index = VoteIndex(
+    state_db('vote_index'),
+    start_block=int(os.getenv("VOTING_DEPLOY_BLOCK", "0")),
+    booth=BOOTH_ID
+)
+# Every worker reads the shared index file; only one polls the chain into it
+run_singleton(f"vote_index_sync-{shard_name(BOOTH_ID)}" if booth_shard else "vote_index_sync",
+              lambda: vote_index.start_sync(w3, voting_contract))
+
+vote_verifier = VoteVerifier(voting_contract, ec_contract, w3, vote_index=vote_index)
+
+# keccak(EPIC) of everyone the index has seen vote; /verify-epic checks it first
+# VOTED_FILTER=set (Bloom filter + exact 64-bit prefixes) | bloom (Bloom only, ~1.8 bytes per voter)
+voted_filter = VotedFilter(
+    capacity=max(1024, 2 * voter_store.count()),
+    kind=os.getenv("VOTED_FILTER", "set")
+)
+voted_filter.refresh(vote_index)
+voted_filter.start_refresh(vote_index)
+
+# Per-booth Merkle trees over the indexed receipts, roots published every MERKLE_ROOT_SECONDS
+receipt_forest = ReceiptForest(state_db('merkle_roots'))
+receipt_forest.refresh(vote_index)
+receipt_forest.start(vote_index, publish_seconds=int(os.getenv("MERKLE_ROOT_SECONDS", "60")))
+
+# Votes per minute / 15 min / hour, per booth and overall, in fixed-size rings
+turnout = TurnoutTracker()
+turnout.refresh(vote_index)
+turnout.start(vote_index)
+
+# 🔥 CANDIDATE CATALOG (metadata per booth, votes from the index)
+candidate_catalog = CandidateCatalog(
+    w3, ec_contract,
+    vote_index=vote_index,
+    start_block=int(os.getenv("EC_DEPLOY_BLOCK", "0"))
+)
+shard_candidates, shard_block = booth_shard.candidates() if booth_shard else (None, None)
+try:
+    if shard_candidates is not None:
+        candidate_catalog.seed({BOOTH_ID: shard_candidates}, shard_block)
+    else:
+        candidate_catalog.prefetch(voter_store.booths())
+except Exception as e:
+    print("❌ Candidate prefetch error:", e)
+candidate_catalog.start_watcher()
+
+contract_pager = ContractPager(w3, ec_contract)
 
 # ------------------------------
 # Face models
 # ------------------------------
-mtcnn = MTCNN(image_size=160)
-model = InceptionResnetV1(pretrained='vggface2').eval()
+# mtcnn / model come from face_models.py (loaded pre-fork under gunicorn)
 DATASET_BASE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Dataset', 'P1')
 
+FACE_EMBEDDINGS_DB = os.path.join(DATASET_DIR, 'face_embeddings.db')
+FACE_SCORING_POLICY = os.getenv("FACE_SCORING_POLICY", "max")   # max | centroid | topk
+FACE_VOTE_LOCK = os.getenv("FACE_VOTE_LOCK", "1") != "0"           # off only for load runs with cloned faces
+
+def load_face_template(epic):
+    """Enrolled template if enroll_faces.py has run, else embed the dataset folder"""
+    if booth_shard is not None:
+        template = booth_shard.face_template(epic)
+    else:
+        template = load_templates(FACE_EMBEDDINGS_DB, [epic]).get(epic)
+    if template is None:
+        folder = os.path.join(DATASET_BASE, epic)
+        template = template_from_folder(folder, mtcnn, model) if os.path.isdir(folder) else FaceTemplate([])
+    return template
+
 # ------------------------------
 # Camera loop
 # ------------------------------
@@ -107,6 +282,69 @@ def camera_loop():
 
     cap.release()
 
+# ------------------------------
+# Metrics
+# ------------------------------
+VERIFY_ENDPOINTS = {'verify_epic', 'verify_face', 'verify_vote_face', 'verify_otp', 'verify_hash',
+                    'verify_vote_hash', 'verify_vote_by_hash', 'cast_vote'}
+
+if os.getenv("TRACING", "1") != "0":
+    tracer.enable()
+
+# Stages of the voter journey that get a trace span
+TRACED_STAGES = {'verify_epic', 'verify_face', 'verify_vote_face', 'get_candidates', 'cast_vote',
+                 'send_otp', 'verify_otp'}
+
+@app.before_request
+def start_timer():
+    request.start_time = time.perf_counter()
+    request.trace_span = None
+
+    if request.endpoint in TRACED_STAGES:
+        if request.endpoint == 'verify_epic':
+            trace_id = new_trace_id()
+            kiosk_sessions.update(kiosk_id(), trace_id=trace_id)
+        else:
+            trace_id = kiosk()['trace_id']
+        trace_id = request.headers.get('X-Trace-Id') or trace_id
+        if trace_id:
+            request.trace_span = tracer.start_span(f"stage.{request.endpoint}", trace_id=trace_id)
+
+@app.teardown_request
+def end_trace_span(exc):
+    s = getattr(request, 'trace_span', None)
+    if s is not None:
+        s.end(**({'error': str(exc)} if exc else {}))
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or 'unknown'
+    if hasattr(request, 'start_time'):
+        HTTP_SECONDS.observe(time.perf_counter() - request.start_time, endpoint=endpoint)
+
+    if endpoint in VERIFY_ENDPOINTS and response.is_json:
+        data = response.get_json(silent=True) or {}
+        VERIFICATIONS.inc(endpoint=endpoint, status=data.get('status', response.status_code))
+
+    s = getattr(request, 'trace_span', None)
+    if s is not None:
+        s.attrs['http_status'] = response.status_code
+        response.headers['X-Trace-Id'] = s.trace_id
+
+    return response
+
+@app.errorhandler(FaceBusy)
+def face_busy(e):
+    return jsonify({'status': 'busy', 'message': 'Face check busy, please retry'}), 503
+
+# Pre-fork workers pool their values so any one of them can answer a scrape
+if os.getenv("METRICS_DIR"):
+    metrics.REGISTRY.enable_multiprocess(os.getenv("METRICS_DIR"), int(os.getenv("METRICS_FLUSH_SECONDS", "5")))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 # ------------------------------
 # Frontend
 # ------------------------------
@@ -123,9 +361,8 @@ def serve_static(path):
 # ------------------------------
 @app.route("/voting-status")
 def voting_status():
-    voting_started = ec_contract.functions.votingStarted().call()
-    voting_ended = ec_contract.functions.votingEnded().call()
-    
+    voting_started, voting_ended = voting_state()
+
     print("🟢 started:", voting_started, "⛔ ended:", voting_ended)
 
     return jsonify({
@@ -136,36 +373,65 @@ def voting_status():
 # ------------------------------
 # EPIC verification
 # ------------------------------
+def has_voted(epic):
+    """Local filter first; only its positives cost a hasVoted() call"""
+    epic_hash = w3.keccak(text=epic)
+    voted = voted_locally(epic_hash)
+    if voted is None:
+        voted = chain_voted(voting_contract.functions.hasVoted(epic_hash).call())
+    return voted
+
+def voted_locally(epic_hash):
+    """True/False when the journal or voted filter settles it, None when only the chain can"""
+    if journal_pending(epic_hash.hex()):
+        return True
+    if not voted_filter.might_have_voted(epic_hash):
+        VOTED_FILTER_CHECKS.inc(result="negative")
+        return False
+    return None
+
+def chain_voted(voted):
+    """Count a hasVoted() answer for a voted filter positive"""
+    VOTED_FILTER_CHECKS.inc(result="voted" if voted else "false_positive")
+    return voted
+
 @app.route('/verify-epic', methods=['POST'])
 def verify_epic():
-    global current_epic, current_polling_id
+    epic, voter, lookup = epic_request(request.json)
 
-    epic = request.json.get('epic', '').strip().upper()
-    voter = next((v for v in voters if v['EPIC_ID'].upper() == epic), None)
+    # The voter portal looks EPICs up to check a past vote: no voted filter there
+    result = epic_result(kiosk_id(), epic, voter, bool(voter) and not lookup and has_voted(epic))
 
-    if not voter:
-        return jsonify({'status': 'not_found'})
+    # ...and no face check after it either, so no face template
+    if result[0]['status'] == 'found' and not lookup:
+        ensure_face_template(epic)
 
-    current_epic = epic
-    current_polling_id = voter['Polling_Booth_ID']
+    return respond(result)
 
-    if epic not in face_cache:
-        embeddings = []
-        folder = os.path.join(DATASET_BASE, epic)
+def epic_request(data):
+    """(EPIC, voter or None, is it a portal lookup) for a /verify-epic body"""
+    epic = str(data.get('epic', '')).strip().upper()
+    return epic, voter_store.get(epic), data.get('purpose') == 'lookup'
 
-        for img_name in os.listdir(folder):
-            img = cv2.imread(os.path.join(folder, img_name))
-            if img is None:
-                continue
+def epic_result(kiosk, epic, voter, voted):
+    """/verify-epic result; a found voter becomes this kiosk's session"""
+    if not voter:
+        return {'status': 'not_found'}, 200
+    if voted:
+        return {'status': 'already_voted'}, 200
 
-            face = mtcnn(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)))
-            if face is not None:
-                embeddings.append(model(face.unsqueeze(0)))
+    kiosk_sessions.update(kiosk, epic=epic, polling_id=voter['Polling_Booth_ID'])
+    return epic_found(voter), 200
 
-        face_cache[epic] = embeddings
-        print(f"✅ Cached {len(embeddings)} face embeddings for {epic}")
+def ensure_face_template(epic):
+    cache_lookup("face_cache", epic in face_cache)
+    if epic not in face_cache:
+        with face_gate.slot():
+            face_cache[epic] = load_face_template(epic)
+        print(f"✅ Cached {len(face_cache[epic])} face embeddings for {epic}")
 
-    return jsonify({
+def epic_found(voter):
+    return {
         'status': 'found',
         "data": {
             "Name": voter["Name"],
@@ -178,119 +444,122 @@ def verify_epic():
             "State": voter["State"],
             "District": voter["District"]
         }
-    })
+    }
 
 # ------------------------------
 # Twilio Client
 # ------------------------------
-client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)
+# SMS_BACKEND=fake swaps Twilio for a local recorder (testing / load runs)
+if os.getenv("SMS_BACKEND", "twilio") == "fake":
+    _sms_backend = FakeSMSSender()
+else:
+    client = Client(TWILIO_SID, TWILIO_AUTH_TOKEN)
+    _sms_backend = TwilioSender(client, TWILIO_PHONE)
+
+def sms_sender(to, body):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        _sms_backend(to, body)
+        outcome = "ok"
+    finally:
+        SMS_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
 
 # ---------------- OTP CONFIG ----------------
 OTP_EXPIRY_SECONDS = 180      # 3 minutes
 
-# ---------------- Helper ----------------
-def clean_mobile(mobile):
-    """Remove spaces, +, - from number for uniform comparison"""
-    return mobile.replace(" ", "").replace("-", "").replace("+", "").strip()
+# OTP_BACKEND=sqlite keeps OTPs in Dataset/otp.db (shared by all workers)
+otp_store = make_otp_store(
+    os.getenv("OTP_BACKEND", "memory"),
+    db_path=os.path.join(STATE_DIR, 'otp.db'),
+    max_entries=int(os.getenv("OTP_MAX_ENTRIES", "100000")),
+    ttl_seconds=OTP_EXPIRY_SECONDS,
+    rate_capacity=int(os.getenv("OTP_RATE_BURST", "2")),
+    rate_refill_seconds=float(os.getenv("OTP_RATE_REFILL_SECONDS", "30"))
+)
+otp_store.start_sweeper()
 
 # ---------------- Send OTP ----------------
 @app.route("/send-otp", methods=["POST"])
 def send_otp():
-    mobile = request.json.get("mobile")
+    return respond(send_otp_result(request.json))
+
+def send_otp_result(data):
+    mobile = data.get("mobile")
     if not mobile:
-        return jsonify({"status": "error", "message": "Mobile number required"}), 400
+        return {"status": "error", "message": "Mobile number required"}, 400
 
     mobile_clean = clean_mobile(mobile)
 
     # find voter by cleaned number
-    voter = next((v for v in voters if clean_mobile(v["Phone_Number"]) == mobile_clean), None)
+    voter = voter_store.by_phone(mobile_clean)
     if not voter:
-        return jsonify({"status": "not_found"})
+        return {"status": "not_found"}, 200
 
     # prevent spamming OTP repeatedly
-    existing = otp_store.get(mobile_clean)
-    if existing and existing["expires"] > time.time() - 20:
-        return jsonify({"status": "wait", "message": "Please wait before requesting again"})
+    if not otp_store.allow_send(mobile_clean):
+        return {"status": "wait", "message": "Please wait before requesting again"}, 200
 
     # secure OTP generation
-    otp = str(secrets.randbelow(900000) + 100000)
-
-    otp_store[mobile_clean] = {
-        "otp": otp,
-        "expires": time.time() + OTP_EXPIRY_SECONDS
-    }
+    otp = otp_store.issue(mobile_clean)
 
     # send SMS via Twilio
     try:
-        client.messages.create(
-            body=f"Your voting verification OTP is: {otp}. It expires in 3 minutes.",
-            from_=TWILIO_PHONE,
-            to=mobile
-        )
+        sms_sender(mobile, f"Your voting verification OTP is: {otp}. It expires in 3 minutes.")
     except Exception as e:
         print("❌ SMS error:", e)
-        return jsonify({"status": "error", "message": "Failed to send OTP SMS"}), 500
+        otp_store.discard(mobile_clean)
+        return {"status": "error", "message": "Failed to send OTP SMS"}, 500
 
-    return jsonify({"status": "sent", "message": "OTP sent successfully"})
+    return {"status": "sent", "message": "OTP sent successfully"}, 200
 
 # ---------------- Verify OTP ----------------
 @app.route("/verify-otp", methods=["POST"])
 def verify_otp():
-    mobile = request.json.get("mobile")
-    otp_input = request.json.get("otp")
+    return respond(verify_otp_result(request.json))
+
+def verify_otp_result(data):
+    mobile = data.get("mobile")
+    otp_input = data.get("otp")
     if not mobile or not otp_input:
-        return jsonify({"status": "error", "message": "Mobile and OTP required"}), 400
+        return {"status": "error", "message": "Mobile and OTP required"}, 400
 
     mobile_clean = clean_mobile(mobile)
-    rec = otp_store.get(mobile_clean)
+    result = otp_store.verify(mobile_clean, otp_input)
 
-    if not rec:
-        return jsonify({"status": "invalid", "message": "Request OTP first"})
+    if result == "missing":
+        return {"status": "invalid", "message": "Request OTP first"}, 200
 
-    if rec["expires"] < time.time():
-        otp_store.pop(mobile_clean, None)
-        return jsonify({"status": "expired", "message": "OTP expired"})
+    if result == "expired":
+        return {"status": "expired", "message": "OTP expired"}, 200
 
-    if rec["otp"] != otp_input:
-        return jsonify({"status": "invalid", "message": "Invalid OTP"})
-
-    # success — cleanup
-    otp_store.pop(mobile_clean, None)
+    if result == "invalid":
+        return {"status": "invalid", "message": "Invalid OTP"}, 200
 
     # get voter info
-    voter = next((v for v in voters if clean_mobile(v["Phone_Number"]) == mobile_clean), None)
+    voter = voter_store.by_phone(mobile_clean)
     if not voter:
-        return jsonify({"status": "error", "message": "Voter not found"}), 404
+        return {"status": "error", "message": "Voter not found"}, 404
 
-    return jsonify({
+    return {
         "status": "success",
         "data": voter
-    })
+    }, 200
 
 # ------------------------------
 # Broadcast SMS to all voters
 # ------------------------------
-def broadcast_sms(message_text):
-    sent = 0
-    failed = 0
-
-    for v in voters:
-        mobile = v.get("Phone_Number", "").strip()
-        if not mobile:
-            continue
-
-        try:
-            client.messages.create(
-                body=message_text,
-                from_=TWILIO_PHONE,
-                to=mobile
-            )
-            sent += 1
-        except Exception as e:
-            print("❌ Broadcast error:", mobile, e)
-            failed += 1
+broadcast_engine = BroadcastEngine(
+    sms_sender,
+    os.path.join(STATE_DIR, 'broadcasts'),
+    workers=int(os.getenv("SMS_WORKERS", "8")),
+    rate_per_second=float(os.getenv("SMS_RATE_PER_SECOND", "10"))
+)
+run_singleton("broadcast_resume", broadcast_engine.resume_pending)
 
-    return {"sent": sent, "failed": failed}
+def broadcast_sms(message_text):
+    job = broadcast_engine.start(message_text, voter_store.phones())
+    return {"job_id": job.job_id, "total": len(job.recipients)}
 
 @app.route("/notify-voting-start", methods=["POST"])
 def notify_voting_start():
@@ -304,6 +573,13 @@ def notify_voting_end():
     result = broadcast_sms("Voting has ended.")
     return jsonify({"status": "ok", **result})
 
+@app.route("/broadcast-status/<job_id>")
+def broadcast_status(job_id):
+    status = broadcast_engine.status(job_id)
+    if status is None:
+        return jsonify({"status": "error", "message": "Unknown broadcast job"}), 404
+    return jsonify({"status": "ok", **status})
+
 # ------------------------------
 # Start / stop camera
 # ------------------------------
@@ -336,69 +612,118 @@ def video_feed():
     return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
-voted_face_embeddings = []   # GLOBAL
+# ------------------------------
+# Frames uploaded by thin kiosks
+# ------------------------------
+# A browser kiosk captures its own camera and POSTs a downscaled JPEG/WebP as
+# the raw request body, either to /upload-frame or directly to /verify-face.
+# The frame becomes this kiosk's frame (kiosk_frames) for verification and
+# the face lock in /cast-vote; no webcam on the server is involved.
+FRAME_TYPES = {'image/jpeg', 'image/webp', 'image/png', 'application/octet-stream'}
+FRAME_MAX_BYTES = int(os.getenv("FRAME_MAX_BYTES", str(2 * 1024 * 1024)))
+FRAME_MAX_SIDE = int(os.getenv("FRAME_MAX_SIDE", "640"))
+
+UNSUPPORTED_FRAME = {'status': 'error', 'message': 'Send a JPEG, WebP or PNG body'}, 415
+
+def take_uploaded_frame():
+    """Decode the request body into this kiosk's frame; (frame, None), or (None, error result)"""
+    if request.mimetype not in FRAME_TYPES:
+        return None, UNSUPPORTED_FRAME
+    return accept_frame(kiosk_id(), request.stream.read(FRAME_MAX_BYTES + 1))
+
+def accept_frame(kiosk, data):
+    """Store an uploaded body (read up to FRAME_MAX_BYTES + 1) as this kiosk's frame"""
+    if len(data) > FRAME_MAX_BYTES:
+        return None, ({'status': 'error', 'message': 'Frame too large'}, 413)
+
+    frame = decode_frame(data, FRAME_MAX_SIDE)
+    if frame is None:
+        return None, ({'status': 'error', 'message': 'Could not decode image'}, 400)
+
+    kiosk_frames.put(kiosk, frame, data)
+    return frame, None
+
+def frame_uploaded(frame):
+    h, w = frame.shape[:2]
+    return {'status': 'ok', 'width': w, 'height': h}, 200
+
+@app.route('/upload-frame', methods=['POST'])
+def upload_frame():
+    frame, error = take_uploaded_frame()
+    if error is not None:
+        return respond(error)
+    return respond(frame_uploaded(frame))
+
+
+# Faces that have voted, shared by every worker through STATE_DIR
+voted_face_embeddings = SharedEmbeddingBank(os.path.join(STATE_DIR, 'voted_faces.db'))
 
 @app.route('/verify-face', methods=['POST'])
 def verify_face():
+    if request.mimetype in FRAME_TYPES:
+        _, error = take_uploaded_frame()
+        if error is not None:
+            return respond(error)
 
-    if latest_frame is None:
-        return jsonify({'status': 'no_face'})
+    return jsonify(face_check(kiosk_frame(), kiosk()['epic']))
 
-    # Convert frame
-    rgb = cv2.cvtColor(latest_frame, cv2.COLOR_BGR2RGB)
-    img_pil = Image.fromarray(rgb)
+def face_check(frame, epic):
+    """/verify-face result for one frame (None: no frame yet) of the voter with this EPIC"""
+    if frame is None:
+        return {'status': 'no_face'}
 
-    # Detect face
-    face = mtcnn(img_pil)
-    if face is None:
-        return jsonify({'status': 'no_face'})
-
-    # Generate live embedding
-    with torch.no_grad():
-        live_embedding = model(face.unsqueeze(0))
+    # Detect face + generate live embedding
+    with face_gate.slot():
+        live_embedding = embed_face(mtcnn, model, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    if live_embedding is None:
+        return {'status': 'no_face'}
 
     # 🔒 FACE-BASED VOTE LOCK CHECK
-    for voted_emb in voted_face_embeddings:
-        sim = cosine_similarity(live_embedding, voted_emb).item()
-        if sim >= 0.7:
-            return jsonify({
-                'status': 'already_voted',
-                'similarity': sim
-            })
+    sim = voted_face_embeddings.max_similarity(live_embedding) if FACE_VOTE_LOCK else 0.0
+    if sim >= 0.7:
+        return {
+            'status': 'already_voted',
+            'similarity': sim
+        }
 
     # 🔍 EPIC-based identity verification
-    if current_epic not in face_cache:
-        return jsonify({'status': 'not_registered'})
+    if not epic:
+        return {'status': 'not_registered'}
+    ensure_face_template(epic)   # this worker may not have served /verify-epic
+    template = face_cache.get(epic)
+    if template is None or len(template) == 0:
+        return {'status': 'not_registered'}
 
-    similarities = []
-    for stored_emb in face_cache[current_epic]:
-        sim = cosine_similarity(live_embedding, stored_emb).item()
-        similarities.append(sim)
-
-    best_similarity = max(similarities)
+    best_similarity = template.score(live_embedding, FACE_SCORING_POLICY)
 
     THRESHOLD_VERIFY = 0.6
 
     if best_similarity < THRESHOLD_VERIFY:
-        return jsonify({
+        return {
             'status': 'failed',
             'similarity': best_similarity
-        })
+        }
 
     # ✅ Face verified BUT NOT LOCKED YET
-    return jsonify({
+    return {
         'status': 'success',
         'similarity': best_similarity
-    })
+    }
 
 
 @app.route('/verify-vote-face', methods=['POST'])
 def verify_vote_face():
-    global latest_frame, current_epic
+    if request.mimetype in FRAME_TYPES:
+        _, error = take_uploaded_frame()
+        if error is not None:
+            return respond(error)
+
+    frame = kiosk_frame()
+    current_epic = kiosk()['epic']
 
     print("🆔 current_epic =", current_epic)
 
-    if latest_frame is None:
+    if frame is None or current_epic is None:
         return jsonify({'status': 'no_face'})
 
     # Absolute EPIC folder path
@@ -411,39 +736,17 @@ def verify_vote_face():
             'message': 'Face dataset not found for EPIC'
         })
 
-    # Convert live frame
-    rgb = cv2.cvtColor(latest_frame, cv2.COLOR_BGR2RGB)
-    live_pil = Image.fromarray(rgb)
-
-    face = mtcnn(live_pil)
-    if face is None:
-        return jsonify({'status': 'no_face'})
-
-    with torch.no_grad():
-        live_embedding = model(face.unsqueeze(0))
-
-    best_similarity = 0.0
-
-    # Compare with dataset images
-    for img_name in os.listdir(person_dir):
-        img_path = os.path.join(person_dir, img_name)
-
-        img = cv2.imread(img_path)
-        if img is None:
-            continue
+    with face_gate.slot():
+        live_embedding = embed_face(mtcnn, model, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if live_embedding is None:
+            return jsonify({'status': 'no_face'})
 
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img_pil = Image.fromarray(img_rgb)
+        # Compare with the voter's template (built once, then cached)
+        cache_lookup("face_cache", current_epic in face_cache)
+        if current_epic not in face_cache:
+            face_cache[current_epic] = load_face_template(current_epic)
 
-        stored_face = mtcnn(img_pil)
-        if stored_face is None:
-            continue
-
-        with torch.no_grad():
-            stored_embedding = model(stored_face.unsqueeze(0))
-
-        sim = cosine_similarity(live_embedding, stored_embedding).item()
-        best_similarity = max(best_similarity, sim)
+    best_similarity = face_cache[current_epic].score(live_embedding, FACE_SCORING_POLICY)
 
     print("🔍 Best similarity:", best_similarity)
 
@@ -466,93 +769,92 @@ def verify_vote_face():
 # ------------------------------
 @app.route('/get-candidates')
 def get_candidates():
-    if not current_polling_id:
-        return jsonify({'status': 'ok', 'candidates': []})
+    return respond(candidates_result(kiosk()['polling_id']))
 
-    if current_polling_id in candidate_cache:
-        return jsonify({
-            'status': 'ok',
-            'polling_id': current_polling_id,
-            'candidates': candidate_cache[current_polling_id]
-        })
+def candidates_result(current_polling_id):
+    if not current_polling_id:
+        return {'status': 'ok', 'candidates': []}, 200
 
     try:
-        ids, names, parties, votes = ec_contract.functions.getCandidatesByBooth(
-            current_polling_id
-        ).call()
-
-        if len(ids) == 0:
-            candidate_cache[current_polling_id] = []
-            return jsonify({'status': 'ok', 'candidates': []})
+        candidates = candidate_catalog.candidates(current_polling_id)
 
-        candidates = []
-        for i in range(len(ids)):
-            candidates.append({
-                "Candidate_ID": int(ids[i]),
-                "Candidate_Name": names[i],
-                "Party_Name": parties[i],
-                "Votes": int(votes[i])
-            })
-
-        candidate_cache[current_polling_id] = candidates
-
-        return jsonify({
+        return {
             'status': 'ok',
             'polling_id': current_polling_id,
             'candidates': candidates
-        })
+        }, 200
 
     except Exception as e:
         print("❌ Candidate fetch error:", e)
-        return jsonify({'status': 'error', 'candidates': []})
+        return {'status': 'error', 'candidates': []}, 200
 
 # ------------------------------
-# Cast vote
+# Admin: paginated parties / candidates (NDJSON, one line per page)
 # ------------------------------
-@app.route('/cast-vote', methods=['POST'])
-def cast_vote():
+def _page_size():
+    """page_size query arg clamped to 1..500, or None when it is not a number"""
     try:
-        data = request.json
-        if not data or 'candidate_id' not in data:
-            return jsonify({
-                'status': 'error',
-                'message': 'candidate_id required'
-            }), 400
+        return max(1, min(int(request.args.get('page_size', 50)), 500))
+    except ValueError:
+        return None
 
-        candidate_id = int(data['candidate_id'])
+@app.route('/api/parties')
+def api_parties():
+    page_size = _page_size()
+    if page_size is None:
+        return jsonify({"status": "error", "message": "page_size must be a number"}), 400
 
-        # 1️⃣ Check voting state from EC contract
-        if not ec_contract.functions.votingStarted().call():
-            return jsonify({
-                'status': 'error',
-                'message': 'Voting not started'
-            }), 400
+    def gen():
+        try:
+            for n, (block, parties) in enumerate(contract_pager.iter_parties(page_size)):
+                yield json.dumps({"page": n, "block": block, "parties": parties}) + "\n"
+        except Exception as e:
+            print("❌ Party page error:", e)
+            yield json.dumps({"error": str(e)}) + "\n"
 
-        if ec_contract.functions.votingEnded().call():
-            return jsonify({
-                'status': 'error',
-                'message': 'Voting has ended'
-            }), 400
+    return Response(gen(), mimetype='application/x-ndjson')
 
-        # 2️⃣ Prepare vote parameters
-        polling_booth_id = current_polling_id        # string
-        epic_hash = w3.keccak(text=current_epic)     # bytes32
+@app.route('/api/candidates/<booth_id>')
+def api_candidates(booth_id):
+    page_size = _page_size()
+    if page_size is None:
+        return jsonify({"status": "error", "message": "page_size must be a number"}), 400
+    counts = vote_index.vote_counts(booth_id)
 
-        # 3️⃣ DRY RUN (VERY IMPORTANT)
-        # This catches revert reasons BEFORE spending gas
+    def gen():
         try:
+            for n, (block, total, candidates) in enumerate(contract_pager.iter_candidates(booth_id, page_size)):
+                for c in candidates:
+                    c["Votes"] = int(counts.get(c["Candidate_ID"], c["Votes"]))
+                yield json.dumps({"page": n, "block": block, "total": total, "candidates": candidates}) + "\n"
+        except Exception as e:
+            print("❌ Candidate page error:", e)
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(gen(), mimetype='application/x-ndjson')
+
+# ------------------------------
+# Cast vote
+# ------------------------------
+def submit_vote(polling_booth_id, candidate_id, epic_hash):
+    """Dry-run, send and confirm one castVote; returns the receipt hash.
+
+    Raises BallotRejected when the contract refuses the vote; any other
+    exception is a transport problem worth retrying.
+    """
+    # DRY RUN (VERY IMPORTANT): catches revert reasons BEFORE spending gas
+    try:
+        with span("chain.dry_run"):
             voting_contract.functions.castVote(
                 polling_booth_id,
                 candidate_id,
                 epic_hash
             ).call({'from': VOTER_ACCOUNT})
-        except Exception as e:
-            return jsonify({
-                'status': 'error',
-                'message': f'Vote rejected: {str(e)}'
-            }), 400
+    except ContractLogicError as e:
+        raise BallotRejected(f'Vote rejected: {str(e)}')
 
-        # 4️⃣ Build transaction
+    with tx_lock:
+        # Build transaction
         nonce = w3.eth.get_transaction_count(VOTER_ACCOUNT, 'pending')
 
         txn = voting_contract.functions.castVote(
@@ -566,7 +868,7 @@ def cast_vote():
             'gasPrice': w3.eth.gas_price
         })
 
-        # 5️⃣ Sign & send
+        # Sign & send
         signed_txn = w3.eth.account.sign_transaction(
             txn,
             private_key=VOTER_PRIVATE_KEY
@@ -576,71 +878,254 @@ def cast_vote():
             signed_txn.raw_transaction
         )
 
-        # ⏳ WAIT FOR BLOCKCHAIN CONFIRMATION
+    # ⏳ WAIT FOR BLOCKCHAIN CONFIRMATION
+    with RPC_SECONDS.time(method="wait_for_receipt"), span("chain.wait_receipt"):
         receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
 
-        # 🔑 Extract Vote Receipt Hash from VoteCast event
-        logs = voting_contract.events.VoteCast().process_receipt(receipt)
+    receipt_hash = record_cast(receipt, epic_hash)
 
-        if not logs:
-            return jsonify({
-                'status': 'error',
-                'message': 'Vote event not found'
-            }), 500
-        receipt_hash = logs[0]['args']['receiptHash'].hex()
+    # ✅ FETCH CANDIDATE DETAILS (from EC contract)
+    candidate = ec_contract.functions.candidates(
+        polling_booth_id,
+        candidate_id
+    ).call()
+    save_vote_to_csv(receipt_hash, candidate_id, candidate[1], candidate[2], polling_booth_id)
 
+    return receipt_hash
+
+
+def record_cast(receipt, epic_hash):
+    """Index the VoteCast of a mined castVote; returns the receipt hash"""
+    # ❌ If blockchain reverted, STOP
+    if receipt.status != 1:
+        raise BallotRejected('Transaction failed on blockchain')
+
+    # 🔑 Extract Vote Receipt Hash from VoteCast event
+    logs = voting_contract.events.VoteCast().process_receipt(receipt)
+    if not logs:
+        raise RuntimeError('Vote event not found')
+
+    vote_index.add_log(logs[0])
+    voted_filter.add(epic_hash)
+    return logs[0]['args']['receiptHash'].hex()
+
+
+_last_voting_state = {}
+
+def voting_state(allow_stale=False):
+    """(started, ended) from the EC contract; the last known value if the node is down and allow_stale"""
+    try:
+        started, ended = call_all(
+            ec_contract.functions.votingStarted(),
+            ec_contract.functions.votingEnded()
+        )
+    except Exception:
+        if allow_stale and _last_voting_state:
+            return _last_voting_state['started'], _last_voting_state['ended']
+        raise
+    _last_voting_state.update(started=started, ended=ended)
+    return started, ended
+
+
+# ------------------------------
+# Ballot journal (BALLOT_JOURNAL=1)
+# ------------------------------
+# /cast-vote answers "queued" once the ballot is fsync'd to a local journal;
+# a replayer thread puts journaled ballots on chain in order. Each worker
+# claims its own journal file, and replays whatever a previous process left
+# in it on startup. Journals whose worker has exited since (the old workers
+# of a HUP reload) are adopted by a live worker and replayed too.
+ballot_journal = None
+adopted_journals = {}   # slot -> journal of an exited worker, replayed here
+
+def _replay_ballot(ballot):
+    return {"receipt_hash": submit_vote(ballot["booth"], ballot["candidate_id"], bytes.fromhex(ballot["epic_hash"]))}
+
+def _journal_path(slot):
+    return os.path.join(STATE_DIR, 'ballots', f'ballots-{slot}.jsonl')
+
+def _open_journal(slot):
+    """Open a claimed journal slot and start replaying it"""
+    journal = BallotJournal(
+        _journal_path(slot),
+        commit_window=float(os.getenv("BALLOT_COMMIT_WINDOW_MS", "0")) / 1000
+    )
+    BALLOT_BACKLOG.set_function(journal.backlog, journal=slot)
+    BALLOT_LAG_SECONDS.set_function(journal.lag_seconds, journal=slot)
+    BallotReplayer(
+        journal,
+        submit=_replay_ballot,
+        has_voted=lambda h: voting_contract.functions.hasVoted(bytes.fromhex(h)).call()
+    ).start()
+    print(f"📒 Ballot journal {slot}: {journal.backlog()} ballots to replay")
+    return journal
+
+def adopt_journals(interval=5):
+    """Keep claiming journal files that no live worker holds, and replay them"""
+    def loop():
+        while True:
+            try:
+                for slot in range(64):
+                    if slot == ballot_slot or slot in adopted_journals:
+                        continue
+                    if os.path.isfile(_journal_path(slot)) and claim_singleton(f"ballots-{slot}"):
+                        adopted_journals[slot] = _open_journal(slot)
+            except Exception as e:
+                print("❌ Journal adoption error:", e)
+            time.sleep(interval)
+
+    threading.Thread(target=loop, daemon=True).start()
+
+def journal_pending(epic_hash):
+    """True if a ballot for this EPIC hash waits in any journal this process replays"""
+    return any(j.is_pending(epic_hash) for j in [ballot_journal, *adopted_journals.values()] if j is not None)
+
+if os.getenv("BALLOT_JOURNAL", "0") == "1":
+    for ballot_slot in range(64):
+        if claim_singleton(f"ballots-{ballot_slot}"):
+            ballot_journal = _open_journal(ballot_slot)
+            break
+    else:
+        raise RuntimeError("No free ballot journal slot")
+    adopt_journals(int(os.getenv("SINGLETON_RETRY_SECONDS", "5")))
 
-        # ❌ If blockchain reverted, STOP
-        if receipt.status != 1:
-            return jsonify({
-                'status': 'error',
-                'message': 'Transaction failed on blockchain'
-            }), 400
-       
-        # ✅ FETCH CANDIDATE DETAILS (from EC contract) 
-        candidate = ec_contract.functions.candidates(
-            polling_booth_id,
-            candidate_id
-        ).call()
-        candidate_name = candidate[1]
-        party = candidate[2]
-        
-    
+
+def queue_vote(ballot):
+    """Journal mode: validate locally, append durably, answer before the chain sees it"""
+    polling_booth_id, candidate_id, epic_hash = ballot['booth'], ballot['candidate_id'], ballot['epic_hash']
+
+    if journal_pending(epic_hash.hex()):
+        return vote_rejected('Vote already queued')
+
+    if candidate_id not in {c["Candidate_ID"] for c in candidate_catalog.metadata(polling_booth_id)}:
+        return vote_rejected('Vote rejected: invalid candidate')
+
+    try:
+        seq = ballot_journal.append(polling_booth_id, candidate_id, epic_hash.hex())
+    except AlreadyQueued:
+        return vote_rejected('Vote already queued')
+    except JournalError as e:
+        print("❌ Journal error:", e)
+        return {
+            'status': 'error',
+            'message': 'Vote could not be saved, please try again'
+        }, 500
+
+    # receiptHash is keccak(EPIC): known now, before the VoteCast event exists
+    return {
+        'status': 'queued',
+        'message': 'Vote recorded; it will be written to the blockchain shortly',
+        'receiptHash': epic_hash.hex(),
+        'ballot_id': seq
+    }, 200
+
+
+def vote_request(kiosk, data):
+    """(ballot, None) for a /cast-vote body from this kiosk, or (None, error result)"""
+    if not data or 'candidate_id' not in data:
+        return None, vote_rejected('candidate_id required')
+
+    candidate_id = int(data['candidate_id'])
+    session = kiosk_sessions.get(kiosk)
+    if not session['epic']:
+        return None, vote_rejected('Verify EPIC first')
+
+    return {
+        'epic': session['epic'],
+        'booth': session['polling_id'],              # string
+        'candidate_id': candidate_id,
+        'epic_hash': w3.keccak(text=session['epic'])  # bytes32
+    }, None
+
+
+def voting_closed(voting_started, voting_ended):
+    """Error result if no vote can be cast now, else None"""
+    if not voting_started:
+        return vote_rejected('Voting not started')
+    if voting_ended:
+        return vote_rejected('Voting has ended')
+    return None
+
+
+def vote_cast(receipt_hash):
+    return {
+        'status': 'success',
+        'message': 'Vote cast successfully',
+        'receiptHash': receipt_hash
+    }, 200
+
+
+def vote_rejected(message):
+    return {
+        'status': 'error',
+        'message': message
+    }, 400
+
+
+def vote_error(e):
+    print("❌ Vote error:", str(e))
+    return {
+        'status': 'error',
+        'message': f'Vote error: {str(e)}'
+    }, 500
+
+
+@app.route('/cast-vote', methods=['POST'])
+def cast_vote():
+    try:
+        ballot, error = vote_request(kiosk_id(), request.json)
+        if error is not None:
+            return respond(error)
+
+        # 1️⃣ Check voting state from EC contract (one batched round trip)
+        error = voting_closed(*voting_state(allow_stale=ballot_journal is not None))
+        if error is not None:
+            return respond(error)
+
+        # 2️⃣ Journal it, or put it on chain right now
+        if ballot_journal is not None:
+            result = queue_vote(ballot)
+        else:
+            try:
+                result = vote_cast(submit_vote(ballot['booth'], ballot['candidate_id'], ballot['epic_hash']))
+            except BallotRejected as e:
+                result = vote_rejected(str(e))
+        if result[1] != 200:
+            return respond(result)
 
         # 🔒 LOCK FACE ONLY AFTER SUCCESS
-        if latest_frame is not None:
-            rgb = cv2.cvtColor(latest_frame, cv2.COLOR_BGR2RGB)
-            face = mtcnn(Image.fromarray(rgb))
-            if face is not None:
-                with torch.no_grad():
-                    emb = model(face.unsqueeze(0))
-                    voted_face_embeddings.append(emb)
+        if FACE_VOTE_LOCK:
+            lock_face(face_to_lock(kiosk_frame()))
 
-        print("✅ Vote stored + face locked for EPIC:", current_epic)
+        print("✅ Vote stored + face locked for EPIC:", ballot['epic'])
 
-        return jsonify({
-            'status': 'success',
-            'message': 'Vote cast successfully',
-            'receiptHash': receipt_hash
-        })
+        return respond(result)
 
     except Exception as e:
-        print("❌ Vote error:", str(e))
-        return jsonify({
-            'status': 'error',
-            'message': f'Vote error: {str(e)}'
-        }), 500
+        return respond(vote_error(e))
+
+
+
+def face_to_lock(frame):
+    """Embedding of the voter who just voted, or None if the frame shows no face"""
+    # Not gated: a busy face pool must never skip the lock
+    if frame is None:
+        return None
+    with span("face.lock"):
+        return embed_face(mtcnn, model, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
 
 
+def lock_face(embedding):
+    """Remember a voter's face so it cannot vote again under another EPIC (None: no face to lock)"""
+    if embedding is not None:
+        voted_face_embeddings.append(embedding)
+
 
 def save_vote_to_csv(hash_key, candidate_id, candidate_name, party, polling_booth):
-    # Absolute path to Dataset folder (project-root/Dataset)
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    dataset_dir = os.path.join(base_dir, "Dataset")
-    file_path = os.path.join(dataset_dir, "hashKey.csv")
+    file_path = HASHKEY_CSV
 
     # Ensure Dataset folder exists
-    os.makedirs(dataset_dir, exist_ok=True)
+    os.makedirs(STATE_DIR, exist_ok=True)
 
     file_exists = os.path.isfile(file_path)
 
@@ -664,74 +1149,104 @@ def save_vote_to_csv(hash_key, candidate_id, candidate_name, party, polling_boot
             polling_booth
         ])
 
+    # 🔑 Index for O(1) /verify-hash lookups
+    receipt_store.add(hash_key, candidate_id, candidate_name, party, polling_booth)
+
     print("✅ Vote stored in CSV:", hash_key)
-    return jsonify({"status": "success", "message": "Vote stored in CSV"}), 200
 
 
 @app.route('/verify-hash', methods=['POST'])
 def verify_hash():
-    try:
-        data = request.get_json(force=True)
-        print("📥 Incoming data:", data)
+    return respond(receipt_result(request.get_json(force=True, silent=True) or {}))
 
+def receipt_result(data):
+    try:
         hash_key = data.get("hashKey")
         if not hash_key:
-            return jsonify({"status": "error", "message": "Missing hashKey"}), 400
+            return {"status": "error", "message": "Missing hashKey"}, 400
 
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        PROJECT_ROOT = os.path.dirname(BASE_DIR)
-        csv_path = os.path.join(PROJECT_ROOT, "Dataset", "hashKey.csv")
+        row = receipt_store.get(hash_key)
+        if row is not None:
+            return {
+                "status": "success",
+                "vote": row
+            }, 200
 
-        print("📄 CSV PATH:", csv_path)
+        return {"status": "error", "message": "Hash not found"}, 404
 
-        if not os.path.exists(csv_path):
-            return jsonify({"status": "error", "message": "CSV file not found"}), 500
+    except Exception as e:
+        print("❌ VERIFY HASH ERROR:", str(e))
+        return {"status": "error", "message": "Internal server error"}, 500
 
-        with open(csv_path, newline='', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
 
-            for row in reader:
-                print("🔍 Checking row:", row)
-                if row.get("hashKey") == hash_key:
-                    return jsonify({
-                        "status": "success",
-                        "vote": row
-                    })
 
-        return jsonify({"status": "error", "message": "Hash not found"}), 404
 
-    except Exception as e:
-        print("❌ VERIFY HASH ERROR:", str(e))
-        return jsonify({"status": "error", "message": "Internal server error"}), 500
+# ------------------------------
+# Merkle receipt proofs
+# ------------------------------
+@app.route("/api/merkle/root/<booth_id>")
+def merkle_root(booth_id):
+    return jsonify({"status": "success", **receipt_forest.root(booth_id)})
 
 
+@app.route("/api/merkle/roots/<booth_id>")
+def merkle_published_roots(booth_id):
+    limit = min(request.args.get("limit", 100, type=int), 1000)
+    return jsonify({"status": "success", "booth": booth_id, "roots": receipt_forest.published(booth_id, limit)})
 
 
-@app.route("/verify-vote/<tx_hash>", methods=["GET"])
-def verify_vote_hash(tx_hash):
+@app.route("/api/merkle/proof", methods=["POST"])
+def merkle_proof():
+    data = request.get_json(force=True) or {}
+    hash_key = data.get("hashKey")
+    if not hash_key:
+        return jsonify({"status": "error", "message": "Missing hashKey"}), 400
+
     try:
-        receipt = w3.eth.get_transaction_receipt(tx_hash)
+        proof = receipt_forest.proof(hash_key)
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid hashKey"}), 400
 
-        # ⚠️ Your contract probably emits "VoteCast", not "VoteCasted"
-        logs = voting_contract.events.VoteCast().process_receipt(receipt)
+    if proof is None:
+        # Trees only include blocks the vote index has fully synced
+        return jsonify({"status": "error", "message": "Receipt not in a tree yet"}), 404
 
-        if not logs:
-            return jsonify({"status": "error", "message": "No vote event found"}), 404
+    return jsonify({"status": "success", "proof": proof})
 
-        event = logs[0]["args"]
 
-        booth_id = event["pollingBoothId"]
-        candidate_id = int(event["candidateId"])
+# ------------------------------
+# Turnout time-series
+# ------------------------------
+@app.route("/api/turnout")
+def api_turnout():
+    booth = request.args.get("booth") or None
+    resolution = request.args.get("resolution", "1m")
+    last = request.args.get("last", type=int)
+
+    try:
+        series = turnout.snapshot(booth, resolution, last)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
 
-        # candidate is stored in EC contract — not voting contract
-        candidate = ec_contract.functions.candidates(booth_id, candidate_id).call()
+    if booth is None:
+        series["booths"] = turnout.booth_totals()
+    return jsonify({"status": "success", **series})
+
+
+@app.route("/verify-vote/<tx_hash>", methods=["GET"])
+def verify_vote_hash(tx_hash):
+    try:
+        vote = vote_verifier.by_tx(tx_hash)
+
+        if vote is None:
+            return jsonify({"status": "error", "message": "No vote event found"}), 404
 
         return jsonify({
             "status": "success",
-            "booth_id": booth_id,
-            "candidate_id": candidate_id,
-            "candidate_name": candidate[1],
-            "party_name": candidate[2]
+            "booth_id": vote["booth_id"],
+            "candidate_id": vote["candidate_id"],
+            "candidate_name": vote["candidate_name"],
+            "party_name": vote["party"]
         })
 
     except Exception as e:
@@ -741,12 +1256,11 @@ def verify_vote_hash(tx_hash):
 
 @app.route("/reset-face-cache", methods=["POST"])
 def reset_face_cache():
-    global face_cache, voted_face_embeddings, current_epic, current_polling_id
-
     face_cache.clear()
     voted_face_embeddings.clear()
-    current_epic = None
-    current_polling_id = None
+    candidate_catalog.invalidate()
+    kiosk_sessions.clear()
+    kiosk_frames.clear()
 
     print("🧹 FACE CACHE & VOTE LOCK RESET")
 
@@ -761,8 +1275,19 @@ def reset_face_cache():
 # ------------------------------
 # Add New Voter (BLO)
 # ------------------------------
+# A booth shard's roll is rebuilt from Dataset/dummy_voters.csv by
+# `booth_shards.py build`, so edits made on a shard kiosk would be lost:
+# BLO changes are only taken by a backend running on the master roll.
+def roll_read_only():
+    return jsonify({
+        "status": "error",
+        "message": f"Booth shard {BOOTH_ID} has a read-only roll: make voter changes on the main backend"
+    }), 403
+
 @app.route("/add-voter", methods=["POST"])
 def add_voter():
+    if booth_shard is not None:
+        return roll_read_only()
     data = request.json
 
     required_fields = [
@@ -776,26 +1301,21 @@ def add_voter():
         if field not in data or not str(data[field]).strip():
             return jsonify({"status": "error", "message": f"{field} missing"}), 400
 
-    csv_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        "Dataset",
-        "dummy_voters.csv"
-    )
+    with voters_csv_lock:
+        # Prevent duplicate EPIC ID
+        if voter_store.get(data["EPIC_ID"]) is not None:
+            return jsonify({
+                "status": "error",
+                "message": "EPIC ID already exists"
+            }), 400
 
-    # Prevent duplicate EPIC ID
-    with open(csv_path, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if row["EPIC_ID"] == data["EPIC_ID"]:
-                return jsonify({
-                    "status": "error",
-                    "message": "EPIC ID already exists"
-                }), 400
+        # Append voter
+        with open(CSV_PATH, "a", newline='', encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=required_fields, extrasaction='ignore')
+            writer.writerow(data)
 
-    # Append voter
-    with open(csv_path, "a", newline='', encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=required_fields)
-        writer.writerow(data)
+        voter_store.add(data)
+        voter_store.mark_csv_synced()
 
     print("✅ New voter added:", data["EPIC_ID"])
 
@@ -806,60 +1326,94 @@ def add_voter():
 
 @app.route("/get-voters/<polling_id>")
 def get_voters(polling_id):
-    with open(CSV_PATH, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        voters = [v for v in reader if v["Polling_Booth_ID"] == polling_id]
+    """
+    Booth roster, streamed as {"status", "voters": [...], "next_cursor"}.
+      limit   page size (default 100, max 1000; 0 = whole booth)
+      cursor  next_cursor from the previous page
+      fields  comma-separated projection (EPIC_ID is always included)
+      q       EPIC or name prefix
+    """
+    try:
+        limit = max(0, min(int(request.args.get('limit', 100)), 1000))
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid limit"}), 400
+
+    cursor = request.args.get('cursor') or None
+    q = request.args.get('q', '').strip() or None
+    fields = None
+    if request.args.get('fields'):
+        fields = [f.strip() for f in request.args['fields'].split(',')]
+        unknown = [f for f in fields if f not in VOTER_FIELDS]
+        if unknown:
+            return jsonify({"status": "error", "message": f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    if limit:
+        rows, next_cursor = voter_store.page(polling_id, cursor, limit, fields, q)
+    else:
+        rows, next_cursor = voter_store.iter_booth(polling_id, fields, q), None
+
+    def gen():
+        yield '{"status": "success", "voters": ['
+        for n, row in enumerate(rows):
+            yield (',' if n else '') + json.dumps(row)
+        yield '], "next_cursor": ' + json.dumps(next_cursor) + '}'
 
-    return jsonify({"status": "success", "voters": voters})
+    return Response(gen(), mimetype='application/json')
 
 @app.route("/update-voter", methods=["POST"])
 def update_voter():
+    if booth_shard is not None:
+        return roll_read_only()
     data = request.json
     epic = data.get("EPIC_ID")
 
     updated = False
     voters = []
 
-    with open(CSV_PATH, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-        for row in reader:
-            if row["EPIC_ID"] == epic:
-                row.update(data)
-                updated = True
-            voters.append(row)
+    with voters_csv_lock:
+        with open(CSV_PATH, newline='', encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            for row in reader:
+                if row["EPIC_ID"] == epic:
+                    row.update(data)
+                    updated = True
+                voters.append(row)
 
-    if not updated:
-        return jsonify({"status": "error", "message": "Voter not found"}), 404
+        if not updated:
+            return jsonify({"status": "error", "message": "Voter not found"}), 404
 
-    with open(CSV_PATH, "w", newline='', encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(voters)
+        _write_voters_csv(fieldnames, voters)
+
+        voter_store.update(epic, data)
+        voter_store.mark_csv_synced()
 
     return jsonify({"status": "success"})
 
 @app.route("/delete-voter/<epic>", methods=["DELETE"])
 def delete_voter(epic):
+    if booth_shard is not None:
+        return roll_read_only()
     voters = []
     deleted = False
 
-    with open(CSV_PATH, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames
-        for row in reader:
-            if row["EPIC_ID"] == epic:
-                deleted = True
-                continue
-            voters.append(row)
+    with voters_csv_lock:
+        with open(CSV_PATH, newline='', encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames
+            for row in reader:
+                if row["EPIC_ID"] == epic:
+                    deleted = True
+                    continue
+                voters.append(row)
 
-    if not deleted:
-        return jsonify({"status": "error", "message": "Voter not found"}), 404
+        if not deleted:
+            return jsonify({"status": "error", "message": "Voter not found"}), 404
 
-    with open(CSV_PATH, "w", newline='', encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(voters)
+        _write_voters_csv(fieldnames, voters)
+
+        voter_store.delete(epic)
+        voter_store.mark_csv_synced()
 
     return jsonify({"status": "success"})
 
@@ -900,32 +1454,19 @@ def blo_login():
 
 @app.route("/request-edit", methods=["POST"])
 def request_edit():
+    if booth_shard is not None:
+        return roll_read_only()
     data = request.json
     epic = data.get("EPIC_ID")
 
     # 1️⃣ Find voter
-    voter = next((v for v in voters if v["EPIC_ID"] == epic), None)
+    voter = voter_store.get(epic) if epic else None
     if not voter:
         return jsonify({"status": "error", "message": "Invalid EPIC"}), 400
 
     # 2️⃣ Get booth from voter (NOT from user)
     booth_id = voter["Polling_Booth_ID"]
 
-    path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        "Dataset",
-        "voter_edit_requests.csv"
-    )
-
-    fieldnames = [
-        "EPIC_ID",
-        "Polling_Booth_ID",
-        "Old_Name", "New_Name",
-        "Old_Age", "New_Age",
-        "Old_Phone", "New_Phone",
-        "Status"
-    ]
-
     request_row = {
         "EPIC_ID": epic,
         "Polling_Booth_ID": booth_id,
@@ -934,86 +1475,86 @@ def request_edit():
         "Old_Age": data["Old_Age"],
         "New_Age": data["New_Age"],
         "Old_Phone": data["Old_Phone"],
-        "New_Phone": data["New_Phone"],
-        "Status": "PENDING"
+        "New_Phone": data["New_Phone"]
     }
 
-    with open(path, "a", newline='', encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writerow(request_row)
+    request_id = edit_requests.submit(request_row)
 
-    return jsonify({"status": "success"})
+    return jsonify({"status": "success", "request_id": request_id})
 
 @app.route("/get-approvals/<booth_id>")
 def get_approvals(booth_id):
-    path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        "Dataset",
-        "voter_edit_requests.csv"
-    )
-
-    with open(path, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        requests = [
-            r for r in reader
-            if r["Polling_Booth_ID"] == booth_id
-            and r["Status"] == "PENDING"
-        ]
+    status = request.args.get("status", "PENDING").upper()
+    with STORAGE_SECONDS.time(op="edit_requests"):
+        requests = edit_requests.by_booth(booth_id, status)
 
     return jsonify({"requests": requests})
 
-@app.route("/approve-request", methods=["POST"])
-def approve_request():
-    data = request.json
-    epic = data["EPIC_ID"]
-
-    # Update voters CSV
-    with open(CSV_PATH, newline='', encoding="utf-8") as f:
-        voters = list(csv.DictReader(f))
-        fieldnames = voters[0].keys()
-
-    for v in voters:
-        if v["EPIC_ID"] == epic:
-            v["Name"] = data["New_Name"]
-            v["Age"] = data["New_Age"]
-            v["Phone_Number"] = data["New_Phone"]
-
-    with open(CSV_PATH, "w", newline='', encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+def _decision_ids(data):
+    """request_ids from a batch body, or the old single-request body (EPIC_ID only)"""
+    if "request_ids" in data:
+        return [int(r) for r in data["request_ids"]]
+    if "request_id" in data:
+        return [int(data["request_id"])]
+    rid = edit_requests.latest_pending(data.get("EPIC_ID"))
+    return [rid] if rid is not None else []
+
+def _write_voters_csv(fieldnames, voters):
+    """Replace the voter CSV in one rename, so no reader ever sees it half written"""
+    tmp = CSV_PATH + ".tmp"
+    with open(tmp, "w", newline='', encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
         writer.writeheader()
         writer.writerows(voters)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CSV_PATH)
 
-    # Mark approved
-    update_request_status(epic, "APPROVED")
+def _rewrite_voters_csv(conn, edits):
+    """Mirror a batch of voter edits into the CSV with a single rewrite, before the store commits them"""
+    changes = {}
+    for epic, fields in edits:
+        changes.setdefault(epic, {}).update(fields)
 
-    return jsonify({"status": "success"})
+    with open(CSV_PATH, newline='', encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        voters = list(reader)
 
-def update_request_status(epic, status):
-    path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        "Dataset",
-        "voter_edit_requests.csv"
-    )
+    for v in voters:
+        if v["EPIC_ID"] in changes:
+            v.update(changes[v["EPIC_ID"]])
 
-    with open(path, newline='', encoding="utf-8") as f:
-        rows = list(csv.DictReader(f))
-        fieldnames = rows[0].keys()
+    _write_voters_csv(fieldnames, voters)
+    voter_store.mark_csv_synced_in(conn)
 
-    for r in rows:
-        if r["EPIC_ID"] == epic:
-            r["Status"] = status
+@app.route("/approve-request", methods=["POST"])
+def approve_request():
+    if booth_shard is not None:
+        return roll_read_only()
+    data = request.json or {}
+    try:
+        request_ids = _decision_ids(data)
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid request_id"}), 400
 
-    with open(path, "w", newline='', encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+    with voters_csv_lock:
+        edits = edit_requests.approve(request_ids, booth=data.get("booth_id"), before_commit=_rewrite_voters_csv)
 
+    return jsonify({"status": "success", "approved": len(edits)})
 
 @app.route("/reject-request", methods=["POST"])
 def reject_request():
-    epic = request.json["EPIC_ID"]
-    update_request_status(epic, "REJECTED")
-    return jsonify({"status": "success"})
+    if booth_shard is not None:
+        return roll_read_only()
+    data = request.json or {}
+    try:
+        request_ids = _decision_ids(data)
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid request_id"}), 400
+
+    rejected = edit_requests.reject(request_ids, booth=data.get("booth_id"))
+    return jsonify({"status": "success", "rejected": rejected})
 
 
 @app.route("/verify-vote-by-hash", methods=["POST"])
@@ -1025,19 +1566,11 @@ def verify_vote_by_hash():
         if not hash_key:
             return jsonify({"status": "error", "message": "Hash key required"}), 400
 
-        # convert hex string → bytes32
-        epic_hash = bytes.fromhex(hash_key.replace("0x", ""))
-
-        booth, candidate_id, candidate_name, party = (
-            voting_contract.functions.verifyMyVote(epic_hash).call()
-        )
+        vote = vote_verifier.by_receipt(hash_key)
 
         return jsonify({
             "status": "success",
-            "booth_id": booth,
-            "candidate_id": candidate_id,
-            "candidate_name": candidate_name,
-            "party": party
+            **vote
         })
 
     except Exception as e:
@@ -1047,5 +1580,6 @@ def verify_vote_by_hash():
         }), 400
 
 
+# Development server only; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=os.getenv("FLASK_DEBUG", "1") == "1")
\ No newline at end of file
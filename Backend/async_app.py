@@ -0,0 +1,477 @@
+import asyncio
+import contextvars
+import functools
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+from web3 import AsyncWeb3
+from web3.exceptions import ContractLogicError
+
+# ------------------------------
+# Async serving mode
+# ------------------------------
+# One event loop serves the kiosk flow instead of gunicorn's worker threads:
+#
+#   python async_app.py            (PORT, default 5000)
+#
+# The voter endpoints (/voting-status, /verify-epic, /send-otp, /verify-otp,
+# /upload-frame, /verify-face, /get-candidates, /cast-vote, /verify-hash)
+# are native coroutines:
+#   - RPC goes through web3's AsyncWeb3, and independent reads are awaited
+#     together. /cast-vote fetches voting state, dry run, nonce, gas price
+#     and chain id in one concurrent round.
+#   - SQLite stores, the ballot journal fsync, and Twilio run in a thread pool
+#     (ASYNC_IO_THREADS), so a slow disk or SMS never blocks the loop.
+#   - Face inference runs in a bounded pool of FACE_SLOTS threads with
+#     FACE_MAX_WAITING queued; past that, callers get "busy" (503).
+# A kiosk waiting on a block or an SMS costs a coroutine, not a thread, so one
+# process holds thousands of open kiosk connections.
+#
+# Everything else (admin, BLO, Merkle, turnout, static files) is handed to the
+# Flask app in app.py through a WSGI call in the same thread pool.
+#
+# Validation and responses come from app.py's (payload, status) helpers
+# (epic_result, send_otp_result, vote_request, ...): the handlers here only
+# decide what to await, and what to await together.
+#
+# State (voter roll, sessions, caches, indexes, journal) is app.py's, so its
+# background sync threads keep running here unchanged. Run ONE process per
+# signer key: nonces are handed out locally.
+
+# app.py opens its ABI files relative to Backend/
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+import app as core  # noqa: E402
+from face_models import FaceBusy, limit_torch_threads  # noqa: E402
+from metrics import HTTP_SECONDS, VERIFICATIONS, RPC_SECONDS  # noqa: E402
+from nonce_floor import NonceFloor  # noqa: E402
+from rpc_client import async_provider_from_env  # noqa: E402
+from tracing import tracer, span, new_trace_id  # noqa: E402
+
+IO_EXECUTOR = ThreadPoolExecutor(int(os.getenv("ASYNC_IO_THREADS", "32")), thread_name_prefix="io")
+
+
+def _in_executor(executor, fn, *args):
+    """run_in_executor that keeps the caller's trace span as the parent"""
+    ctx = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(executor, functools.partial(ctx.run, fn, *args))
+
+
+def run_io(fn, *args):
+    return _in_executor(IO_EXECUTOR, fn, *args)
+
+
+class FacePool:
+    """`slots` inference threads and at most `max_waiting` queued jobs; FaceBusy beyond that"""
+
+    def __init__(self, slots, max_waiting):
+        self._executor = ThreadPoolExecutor(slots, thread_name_prefix="face")
+        self._max_pending = slots + max_waiting
+        self._pending = 0   # only touched from the event loop
+
+    async def run(self, fn, *args, admit=True):
+        if admit and self._pending >= self._max_pending:
+            raise FaceBusy()
+        self._pending += 1
+        try:
+            return await _in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+
+face_pool = FacePool(int(os.getenv("FACE_SLOTS", "1")), int(os.getenv("FACE_MAX_WAITING", "2")))
+
+
+# ------------------------------
+# Chain access
+# ------------------------------
+class AsyncChain:
+    """Awaitable contract / eth calls.
+
+    Uses AsyncWeb3 when an RPC URL is configured; with CHAIN_BACKEND=tester
+    (eth-tester has no async client) the sync client runs in the I/O pool.
+    """
+
+    def __init__(self):
+        self.w3 = None
+        self._chain_id = None
+        if os.getenv("CHAIN_BACKEND", "rpc") != "tester":
+            self.w3 = AsyncWeb3(async_provider_from_env())
+            self.voting = self.w3.eth.contract(address=core.voting_contract.address, abi=core.voting_abi)
+            self.ec = self.w3.eth.contract(address=core.ec_contract.address, abi=core.ec_abi)
+
+    async def call(self, contract, fn, *args, tx=None):
+        if self.w3 is None:
+            sync_fn = getattr(getattr(core, f"{contract}_contract").functions, fn)(*args)
+            return await run_io(sync_fn.call, tx)
+        return await getattr(getattr(self, contract).functions, fn)(*args).call(tx)
+
+    async def eth(self, name, *args):
+        """w3.eth method or property (gas_price, get_transaction_count, ...)"""
+        if self.w3 is None:
+            def sync():
+                attr = getattr(core.w3.eth, name)
+                return attr(*args) if callable(attr) else attr
+            return await run_io(sync)
+        attr = getattr(self.w3.eth, name)
+        return await (attr(*args) if callable(attr) else attr)
+
+    async def chain_id(self):
+        if self._chain_id is None:
+            self._chain_id = await self.eth("chain_id")
+        return self._chain_id
+
+
+chain = AsyncChain()
+
+
+nonce_floor = NonceFloor()
+
+# NonceFloor is per process: a second async server on this STATE_DIR would reuse nonces
+if not core.claim_singleton("async_signer"):
+    raise RuntimeError("Another async server already signs votes for this STATE_DIR")
+
+
+async def voting_state(allow_stale=False):
+    try:
+        started, ended = await asyncio.gather(
+            chain.call("ec", "votingStarted"),
+            chain.call("ec", "votingEnded")
+        )
+    except Exception:
+        if allow_stale and core._last_voting_state:
+            return core._last_voting_state['started'], core._last_voting_state['ended']
+        raise
+    core._last_voting_state.update(started=started, ended=ended)
+    return started, ended
+
+
+async def has_voted(epic):
+    epic_hash = core.w3.keccak(text=epic)
+    voted = core.voted_locally(epic_hash)
+    if voted is None:
+        voted = core.chain_voted(await chain.call("voting", "hasVoted", epic_hash))
+    return voted
+
+
+# ------------------------------
+# Request helpers
+# ------------------------------
+def reply(payload, status=200):
+    response = web.json_response(payload, status=status)
+    response["payload"] = payload
+    return response
+
+
+def kiosk_id(request):
+    return request.headers.get('X-Kiosk-Id', 'default')
+
+
+def has_frame_body(request):
+    # aiohttp reports application/octet-stream when there is no Content-Type at all
+    return request.body_exists and 'Content-Type' in request.headers and request.content_type in core.FRAME_TYPES
+
+
+async def json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def read_limited(request, limit):
+    """At most `limit` bytes of the request body, like Flask's request.stream.read(limit)"""
+    chunks, size = [], 0
+    async for chunk in request.content.iter_chunked(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return b"".join(chunks)[:limit]
+
+
+@web.middleware
+async def observe(request, handler):
+    """HTTP latency, verification outcomes and stage spans, as app.py's request hooks do"""
+    endpoint = request.match_info.route.name or 'unknown'
+    start = time.perf_counter()
+
+    stage_span = None
+    if endpoint in core.TRACED_STAGES:
+        if endpoint == 'verify_epic':
+            trace_id = new_trace_id()
+            core.kiosk_sessions.update(kiosk_id(request), trace_id=trace_id)
+        else:
+            trace_id = core.kiosk_sessions.get(kiosk_id(request))['trace_id']
+        trace_id = request.headers.get('X-Trace-Id') or trace_id
+        if trace_id:
+            stage_span = tracer.start_span(f"stage.{endpoint}", trace_id=trace_id)
+
+    error = None
+    try:
+        try:
+            response = await handler(request)
+        except FaceBusy:
+            response = reply({'status': 'busy', 'message': 'Face check busy, please retry'}, 503)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if stage_span is not None:
+            stage_span.end(**({'error': str(error)} if error else {}))
+
+    if endpoint != 'wsgi':   # Flask's own hooks measure the rest, and add CORS headers
+        response.headers.setdefault('Access-Control-Allow-Origin', '*')
+        HTTP_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        if endpoint in core.VERIFY_ENDPOINTS and "payload" in response:
+            VERIFICATIONS.inc(endpoint=endpoint, status=response["payload"].get('status', response.status))
+    if stage_span is not None:
+        stage_span.attrs['http_status'] = response.status
+        response.headers['X-Trace-Id'] = stage_span.trace_id
+    return response
+
+
+# ------------------------------
+# Voter endpoints
+# ------------------------------
+async def voting_status(request):
+    started, ended = await voting_state()
+    return reply({"started": started, "ended": ended})
+
+
+async def verify_epic(request):
+    data = await json_body(request) or {}
+    epic, voter, lookup = await run_io(core.epic_request, data)
+
+    voted = bool(voter) and not lookup and await has_voted(epic)
+    result = core.epic_result(kiosk_id(request), epic, voter, voted)
+
+    # A portal lookup never reaches the face check: no template load (or 503) for it
+    if result[0]['status'] == 'found' and not lookup and epic not in core.face_cache:
+        await face_pool.run(core.ensure_face_template, epic)
+
+    return reply(*result)
+
+
+async def send_otp(request):
+    return reply(*await run_io(core.send_otp_result, await json_body(request) or {}))
+
+
+async def verify_otp(request):
+    return reply(*await run_io(core.verify_otp_result, await json_body(request) or {}))
+
+
+async def take_uploaded_frame(request):
+    """Decode an image body into this kiosk's frame; (frame, None), or (None, error result)"""
+    if not has_frame_body(request):
+        return None, core.UNSUPPORTED_FRAME
+
+    data = await read_limited(request, core.FRAME_MAX_BYTES + 1)
+    return await face_pool.run(core.accept_frame, kiosk_id(request), data)
+
+
+def kiosk_frame(request):
+    return core.frame_for(kiosk_id(request), 'X-Kiosk-Id' in request.headers)
+
+
+async def upload_frame(request):
+    frame, error = await take_uploaded_frame(request)
+    return reply(*(error or core.frame_uploaded(frame)))
+
+
+async def verify_face(request):
+    if has_frame_body(request):
+        _, error = await take_uploaded_frame(request)
+        if error is not None:
+            return reply(*error)
+
+    epic = core.kiosk_sessions.get(kiosk_id(request))['epic']
+    return reply(await face_pool.run(core.face_check, kiosk_frame(request), epic))
+
+
+async def get_candidates(request):
+    polling_id = core.kiosk_sessions.get(kiosk_id(request))['polling_id']
+    return reply(*await run_io(core.candidates_result, polling_id))
+
+
+# ------------------------------
+# Cast vote
+# ------------------------------
+async def _dry_run(polling_booth_id, candidate_id, epic_hash):
+    with span("chain.dry_run"):
+        return await chain.call("voting", "castVote", polling_booth_id, candidate_id, epic_hash,
+                                tx={'from': core.VOTER_ACCOUNT})
+
+
+async def submit_vote(ballot):
+    """Direct mode: one concurrent round of reads, then sign, send and await the receipt"""
+    polling_booth_id, candidate_id, epic_hash = ballot['booth'], ballot['candidate_id'], ballot['epic_hash']
+
+    state, dry_run, nonce, gas_price, chain_id = await asyncio.gather(
+        voting_state(),
+        _dry_run(polling_booth_id, candidate_id, epic_hash),
+        chain.eth("get_transaction_count", core.VOTER_ACCOUNT, 'pending'),
+        chain.eth("gas_price"),
+        chain.chain_id(),
+        return_exceptions=True
+    )
+    for result in (state, nonce, gas_price, chain_id):
+        if isinstance(result, BaseException):
+            raise result
+
+    error = core.voting_closed(*state)
+    if error is not None:
+        return error
+    if isinstance(dry_run, ContractLogicError):
+        return core.vote_rejected(f'Vote rejected: {str(dry_run)}')
+    if isinstance(dry_run, BaseException):
+        raise dry_run
+
+    async with nonce_floor.lock:
+        txn = core.voting_contract.functions.castVote(
+            polling_booth_id,
+            candidate_id,
+            epic_hash
+        ).build_transaction({
+            'from': core.VOTER_ACCOUNT,
+            'nonce': nonce_floor.take(nonce),
+            'gas': 500000,
+            'gasPrice': gas_price,
+            'chainId': chain_id
+        })
+        signed_txn = core.w3.eth.account.sign_transaction(txn, private_key=core.VOTER_PRIVATE_KEY)
+        try:
+            tx_hash = await chain.eth("send_raw_transaction", signed_txn.raw_transaction)
+        except Exception:
+            nonce_floor.forget()
+            raise
+
+    with RPC_SECONDS.time(method="wait_for_receipt"), span("chain.wait_receipt"):
+        receipt = await chain.eth("wait_for_transaction_receipt", tx_hash)
+
+    try:
+        receipt_hash = await run_io(core.record_cast, receipt, epic_hash)
+    except core.BallotRejected as e:
+        return core.vote_rejected(str(e))
+
+    candidate = await chain.call("ec", "candidates", polling_booth_id, candidate_id)
+    await run_io(core.save_vote_to_csv, receipt_hash, candidate_id, candidate[1], candidate[2], polling_booth_id)
+
+    return core.vote_cast(receipt_hash)
+
+
+async def queue_vote(ballot):
+    """Journal mode: answer once the ballot is fsync'd"""
+    error = core.voting_closed(*await voting_state(allow_stale=True))
+    if error is not None:
+        return error
+    return await run_io(core.queue_vote, ballot)
+
+
+async def cast_vote(request):
+    try:
+        ballot, error = core.vote_request(kiosk_id(request), await json_body(request))
+        if error is not None:
+            return reply(*error)
+
+        if core.ballot_journal is not None:
+            result = await queue_vote(ballot)
+        else:
+            result = await submit_vote(ballot)
+        if result[1] != 200:
+            return reply(*result)
+
+        if core.FACE_VOTE_LOCK:
+            embedding = await face_pool.run(core.face_to_lock, kiosk_frame(request), admit=False)
+            await run_io(core.lock_face, embedding)
+
+        print("✅ Vote stored + face locked for EPIC:", ballot['epic'])
+        return reply(*result)
+
+    except Exception as e:
+        return reply(*core.vote_error(e))
+
+
+async def verify_hash(request):
+    return reply(*await run_io(core.receipt_result, await json_body(request) or {}))
+
+
+# ------------------------------
+# Everything else: the Flask app, in the I/O pool
+# ------------------------------
+HOP_HEADERS = {'content-length', 'transfer-encoding', 'connection'}
+
+async def wsgi(request):
+    body = await request.read()
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': request.path,
+        'QUERY_STRING': request.query_string,
+        'SERVER_NAME': request.host.split(':')[0],
+        'SERVER_PORT': str(request.url.port or 80),
+        'SERVER_PROTOCOL': f'HTTP/{request.version.major}.{request.version.minor}',
+        'REMOTE_ADDR': request.remote or '',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': request.scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    if 'Content-Type' in request.headers:
+        environ['CONTENT_TYPE'] = request.headers['Content-Type']
+    for name, value in request.headers.items():
+        key = 'HTTP_' + name.upper().replace('-', '_')
+        if key not in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    def call():
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        result = core.app.wsgi_app(environ, start_response)
+        try:
+            return started['status'], started['headers'], b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    status, headers, payload = await run_io(call)
+    code, _, reason = status.partition(' ')
+    response = web.Response(status=int(code), reason=reason or None, body=payload)
+    for name, value in headers:
+        if name.lower() not in HOP_HEADERS:
+            response.headers.add(name, value)
+    return response
+
+
+def make_app():
+    application = web.Application(middlewares=[observe], client_max_size=core.FRAME_MAX_BYTES + 64 * 1024)
+    application.add_routes([
+        web.get('/voting-status', voting_status, name='voting_status'),
+        web.post('/verify-epic', verify_epic, name='verify_epic'),
+        web.post('/send-otp', send_otp, name='send_otp'),
+        web.post('/verify-otp', verify_otp, name='verify_otp'),
+        web.post('/upload-frame', upload_frame, name='upload_frame'),
+        web.post('/verify-face', verify_face, name='verify_face'),
+        web.get('/get-candidates', get_candidates, name='get_candidates'),
+        web.post('/cast-vote', cast_vote, name='cast_vote'),
+        web.post('/verify-hash', verify_hash, name='verify_hash'),
+        web.route('*', '/{tail:.*}', wsgi, name='wsgi')
+    ])
+    return application
+
+
+if __name__ == "__main__":
+    limit_torch_threads()
+    print("⚡ Async serving mode")
+    web.run_app(make_app(), host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import time
+
+from metrics import STORAGE_SECONDS, BALLOT_COMMIT_SIZE, BALLOTS_REPLAYED
+
+# ------------------------------
+# Ballot journal
+# ------------------------------
+# Write-ahead log of verified ballots on the booth machine. /cast-vote
+# appends the ballot, waits until it is fsync'd and answers "queued"; a
+# background replayer then submits ballots to the Voting contract in journal
+# order. Voter-facing latency is one disk flush, whatever the RPC node does.
+#
+# Group commit: concurrent appends that arrive while a flush is running (or
+# within commit_window of the first one) share the next write + fsync.
+#
+# One JSON object per line:
+#   {"op": "ballot", "seq": 7, "booth": ..., "candidate_id": ..., "epic_hash": ..., "queued_at": ...}
+#   {"op": "done", "seq": 7, "outcome": "cast" | "already_on_chain" | "rejected", ...}
+# A ballot without a "done" line is pending. "done" lines are not fsync'd:
+# losing one only means the ballot is checked again with hasVoted() and
+# skipped. A torn last line (crash mid-write) is cut off on open.
+#
+# _cond guards the in-memory state; _file_lock guards the file, so a "done"
+# line can never land inside a group that a failed flush then truncates.
+
+
+class BallotRejected(Exception):
+    """The chain refused the ballot for good (retrying will not help)"""
+
+
+class JournalError(Exception):
+    pass
+
+
+class AlreadyQueued(Exception):
+    """A ballot for this EPIC hash is already in the journal"""
+
+
+class BallotJournal:
+
+    def __init__(self, path, commit_window=0.0):
+        self.path = path
+        self.commit_window = commit_window
+
+        self._cond = threading.Condition()
+        self._pending = {}          # seq -> ballot, durable and not yet done
+        self._queued = set()        # epic hashes buffered, being flushed or pending
+        self._buffer = []           # (seq, ballot, line) waiting for the next flush
+        self._flushing = False
+        self._durable_seq = -1
+        self._failed = {}           # seq -> exception of a failed flush
+        self._next_seq = 0
+        self._file_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._load()
+        self._file = open(path, "ab")
+
+    # ---------------- Open / compact ----------------
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+
+        ballots = {}
+        with open(self.path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    print(f"⚠️ Ballot journal {self.path}: dropping torn tail")
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    print(f"⚠️ Ballot journal {self.path}: skipping unreadable line")
+                    continue
+
+                seq = record["seq"]
+                self._next_seq = max(self._next_seq, seq + 1)
+                if record["op"] == "ballot":
+                    ballots[seq] = record
+                else:
+                    ballots.pop(seq, None)
+
+        self._pending = dict(sorted(ballots.items()))
+        self._queued = {b["epic_hash"] for b in self._pending.values()}
+        self._durable_seq = self._next_seq - 1
+        self._rewrite(list(self._pending.values()))
+
+    def _rewrite(self, ballots):
+        """Replace the file with just the pending ballots (startup compaction)"""
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            for ballot in ballots:
+                f.write(self._encode(ballot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _encode(record):
+        return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+    # ---------------- Append (group commit) ----------------
+    def append(self, booth, candidate_id, epic_hash):
+        """Durably queue one ballot; returns its seq once it is on disk.
+
+        Raises AlreadyQueued if a ballot for epic_hash is already in the journal.
+        """
+        with self._cond:
+            if epic_hash in self._queued:
+                raise AlreadyQueued(epic_hash)
+            self._queued.add(epic_hash)
+            seq = self._next_seq
+            self._next_seq += 1
+            ballot = {
+                "op": "ballot",
+                "seq": seq,
+                "booth": booth,
+                "candidate_id": int(candidate_id),
+                "epic_hash": epic_hash,
+                "queued_at": time.time()
+            }
+            self._buffer.append((seq, ballot, self._encode(ballot)))
+
+            while self._durable_seq < seq and seq not in self._failed:
+                if self._flushing:
+                    self._cond.wait()
+                else:
+                    self._flush_locked()
+
+            error = self._failed.pop(seq, None)
+        if error is not None:
+            raise JournalError(f"Ballot not saved: {error}")
+        return seq
+
+    def _flush_locked(self):
+        """Called with the condition held by the thread that leads this group"""
+        self._flushing = True
+        try:
+            if self.commit_window:
+                self._cond.wait(self.commit_window)   # let more appends join this group
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+
+            self._cond.release()
+            error = None
+            try:
+                with self._file_lock:
+                    offset = self._file.tell()
+                    try:
+                        with STORAGE_SECONDS.time(op="journal_commit"):
+                            self._file.write(b"".join(line for _, _, line in batch))
+                            self._file.flush()
+                            os.fsync(self._file.fileno())
+                    except OSError as e:
+                        error = e
+                        try:
+                            self._file.truncate(offset)   # no half-written line in front of the next group
+                        except OSError:
+                            pass
+            finally:
+                self._cond.acquire()
+
+            BALLOT_COMMIT_SIZE.observe(len(batch))
+            if error is None:
+                for seq, ballot, _ in batch:
+                    self._pending[seq] = ballot
+                self._durable_seq = max(self._durable_seq, batch[-1][0])
+            else:
+                for seq, ballot, _ in batch:
+                    self._failed[seq] = error
+                    self._queued.discard(ballot["epic_hash"])
+        finally:
+            self._flushing = False
+            self._cond.notify_all()
+
+    # ---------------- Replay side ----------------
+    def mark_done(self, seq, outcome, **info):
+        with self._cond:
+            ballot = self._pending.pop(seq, None)
+            if ballot is None:
+                return
+            self._queued.discard(ballot["epic_hash"])
+        line = self._encode({"op": "done", "seq": seq, "outcome": outcome, **info})
+        with self._file_lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def next_pending(self, timeout=None):
+        """Oldest pending ballot, waiting up to `timeout` for one to arrive"""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            return next(iter(self._pending.values()), None)
+
+    def is_pending(self, epic_hash):
+        with self._cond:
+            return epic_hash in self._queued
+
+    def backlog(self):
+        return len(self._pending)
+
+    def lag_seconds(self):
+        """Age of the oldest ballot not yet on chain"""
+        with self._cond:
+            oldest = next(iter(self._pending.values()), None)
+        return time.time() - oldest["queued_at"] if oldest else 0.0
+
+    def close(self):
+        with self._cond, self._file_lock:
+            self._file.close()
+
+
+class BallotReplayer:
+    """Submits journaled ballots in order, exactly once on chain.
+
+    submit(ballot) sends one castVote and returns a dict to record with the
+    outcome; it raises BallotRejected for a permanent refusal and anything
+    else for a transient failure (the same ballot is retried with backoff).
+    has_voted(epic_hash) is checked first, so a ballot whose transaction made
+    it on chain before a crash is never sent twice.
+    """
+
+    def __init__(self, journal, submit, has_voted, backoff=1.0, max_backoff=60.0):
+        self.journal = journal
+        self.submit = submit
+        self.has_voted = has_voted
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._thread = None
+
+    def replay_one(self, ballot):
+        if self.has_voted(ballot["epic_hash"]):
+            outcome, info = "already_on_chain", {}
+        else:
+            try:
+                outcome, info = "cast", self.submit(ballot) or {}
+            except BallotRejected as e:
+                # a revert can also mean an earlier copy just landed
+                if self.has_voted(ballot["epic_hash"]):
+                    outcome, info = "already_on_chain", {}
+                else:
+                    outcome, info = "rejected", {"reason": str(e)}
+                    print(f"❌ Ballot {ballot['seq']} rejected by chain:", e)
+
+        self.journal.mark_done(ballot["seq"], outcome, **info)
+        BALLOTS_REPLAYED.inc(outcome=outcome)
+        return outcome
+
+    def start(self):
+        def loop():
+            delay = self.backoff
+            while True:
+                ballot = self.journal.next_pending(timeout=5)
+                if ballot is None:
+                    continue
+                try:
+                    self.replay_one(ballot)
+                    delay = self.backoff
+                except Exception as e:
+                    print(f"⚠️ Ballot replay paused ({self.journal.backlog()} queued):", e)
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
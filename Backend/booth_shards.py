@@ -0,0 +1,227 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+# ------------------------------
+# Booth shards
+# ------------------------------
+# A kiosk only ever serves one Polling_Booth_ID, so it does not need the
+# whole state roll or every enrolled face. `build` splits them per booth:
+#
+#   shards/<booth>/voters.csv       that booth's rows of dummy_voters.csv
+#   shards/<booth>/faces.npy        enrolled embeddings, float16 or float32
+#   shards/<booth>/faces.json       EPIC -> [first row, row count] in faces.npy
+#   shards/<booth>/candidates.json  EC candidate metadata (with --candidates)
+#   shards/<booth>/manifest.json
+#
+# A backend started with BOOTH_ID=<booth> reads only its shard: the roll is
+# imported from the small CSV and faces.npy is memory-mapped, so a template
+# is paged in when that voter shows up. Its vote index keeps only this
+# booth's VoteCast events, so the voted filter, Merkle trees and turnout do
+# too. Memory and startup scale with the booth, not the state.
+#
+# The shard roll is read-only: BLO edits go to the main backend (master
+# CSV), and the next `build` carries them to the shards.
+#
+#   python booth_shards.py build --float16 [--candidates]
+#   BOOTH_ID=PB-1001 gunicorn -c gunicorn.conf.py wsgi:app
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CSV = os.path.join(PROJECT_ROOT, "Dataset", "dummy_voters.csv")
+DEFAULT_EMBEDDINGS_DB = os.path.join(PROJECT_ROOT, "Dataset", "face_embeddings.db")
+DEFAULT_SHARD_DIR = os.path.join(PROJECT_ROOT, "Dataset", "shards")
+
+
+def shard_name(booth):
+    """Booth IDs are free text; keep the directory name filesystem-safe"""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", booth)
+
+
+class BoothShard:
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.booth = self.manifest["booth"]
+        self.voters_csv = os.path.join(path, "voters.csv")
+
+        self._faces = None
+        self._index = None
+
+    def _load_faces(self):
+        if self._index is None:
+            index_path = os.path.join(self.path, "faces.json")
+            if os.path.isfile(index_path):
+                with open(index_path, encoding="utf-8") as f:
+                    self._index = json.load(f)
+                self._faces = np.load(os.path.join(self.path, "faces.npy"), mmap_mode="r")
+            else:
+                self._index = {}
+
+    def face_template(self, epic):
+        """FaceTemplate from the mapped embeddings, or None if the voter was not enrolled"""
+        from face_templates import FaceTemplate
+
+        self._load_faces()
+        entry = self._index.get(epic)
+        if entry is None:
+            return None
+        start, count = entry
+        return FaceTemplate(np.asarray(self._faces[start:start + count], dtype=np.float32))
+
+    def face_templates(self):
+        self._load_faces()
+        return {epic: self.face_template(epic) for epic in self._index}
+
+    def candidates(self):
+        """(rows, block) snapshot from build time, or (None, None)"""
+        path = os.path.join(self.path, "candidates.json")
+        if not os.path.isfile(path):
+            return None, None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data["candidates"], data["block"]
+
+
+def open_shard(shard_dir, booth):
+    path = os.path.join(shard_dir, shard_name(booth))
+    if not os.path.isfile(os.path.join(path, "manifest.json")):
+        raise FileNotFoundError(f"No shard for booth {booth} in {shard_dir} (run: python booth_shards.py build)")
+    return BoothShard(path)
+
+
+# ------------------------------
+# Build
+# ------------------------------
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _split_roll(csv_path):
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        booths = {}
+        for row in reader:
+            if row.get("EPIC_ID"):
+                booths.setdefault(row["Polling_Booth_ID"], []).append(row)
+        return reader.fieldnames, booths
+
+
+def _embeddings_by_epic(db_path, epic_booth, min_prob):
+    """booth -> {epic: [embedding bytes, ...]} in one pass over the enrollment DB"""
+    out = {}
+    if not os.path.isfile(db_path):
+        return out
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for epic, blob in conn.execute(
+            "SELECT epic, embedding FROM embeddings WHERE prob >= ? ORDER BY epic, path", (min_prob,)
+        ):
+            booth = epic_booth.get(epic)
+            if booth is not None:
+                out.setdefault(booth, {}).setdefault(epic, []).append(blob)
+    finally:
+        conn.close()
+    return out
+
+
+def _fetch_candidates(booths):
+    """{booth: rows} plus the head block they were read at, straight from the EC contract"""
+    from dotenv import load_dotenv
+    from web3 import Web3
+    from candidate_catalog import CandidateCatalog
+    from rpc_client import provider_from_env
+
+    load_dotenv()
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "EC_ABI.json")) as f:
+        ec_abi = json.load(f)
+    w3 = Web3(provider_from_env())
+    ec = w3.eth.contract(address=Web3.to_checksum_address(os.getenv("VITE_EC_CONTRACT_ADDRESS")), abi=ec_abi)
+
+    catalog = CandidateCatalog(w3, ec)
+    head = w3.eth.block_number
+    results = catalog._fetch_many(sorted(booths))
+    return {b: CandidateCatalog._rows(r) for b, r in results.items()}, head
+
+
+def build_shards(csv_path, embeddings_db, out_dir, dtype="float16", min_prob=0.0, candidates=False):
+    fieldnames, roll = _split_roll(csv_path)
+    epic_booth = {row["EPIC_ID"]: booth for booth, rows in roll.items() for row in rows}
+    faces = _embeddings_by_epic(embeddings_db, epic_booth, min_prob)
+    candidate_rows, block = _fetch_candidates(roll) if candidates else ({}, None)
+
+    summary = []
+    for booth, rows in sorted(roll.items()):
+        path = os.path.join(out_dir, shard_name(booth))
+        os.makedirs(path, exist_ok=True)
+
+        tmp = os.path.join(path, "voters.csv.tmp")
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp, os.path.join(path, "voters.csv"))
+
+        index = {}
+        chunks = []
+        offset = 0
+        for epic, blobs in sorted(faces.get(booth, {}).items()):
+            chunks.extend(np.frombuffer(b, dtype=np.float32) for b in blobs)
+            index[epic] = [offset, len(blobs)]
+            offset += len(blobs)
+
+        matrix = np.stack(chunks).astype(dtype) if chunks else np.empty((0, 512), dtype=dtype)
+        with open(os.path.join(path, "faces.npy.tmp"), "wb") as f:
+            np.save(f, matrix)
+        os.replace(os.path.join(path, "faces.npy.tmp"), os.path.join(path, "faces.npy"))
+        _write_json(os.path.join(path, "faces.json"), index)
+
+        if booth in candidate_rows:
+            _write_json(os.path.join(path, "candidates.json"), {"block": block, "candidates": candidate_rows[booth]})
+
+        _write_json(os.path.join(path, "manifest.json"), {
+            "booth": booth,
+            "voters": len(rows),
+            "enrolled": len(index),
+            "embeddings": int(matrix.shape[0]),
+            "dtype": str(matrix.dtype),
+            "built": time.time()
+        })
+        summary.append((booth, len(rows), len(index), matrix.nbytes))
+
+    return summary
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split the roll, face embeddings and candidates per booth")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build")
+    p.add_argument("--csv", default=DEFAULT_CSV)
+    p.add_argument("--embeddings", default=DEFAULT_EMBEDDINGS_DB, help="enroll_faces.py database")
+    p.add_argument("--out", default=DEFAULT_SHARD_DIR)
+    p.add_argument("--float16", action="store_true", help="store embeddings as float16 (half the size)")
+    p.add_argument("--min-prob", type=float, default=0.0, help="skip enrolled faces below this detector score")
+    p.add_argument("--candidates", action="store_true", help="also snapshot EC candidates (needs RPC)")
+
+    args = parser.parse_args()
+    shards = build_shards(args.csv, args.embeddings, args.out,
+                          dtype="float16" if args.float16 else "float32",
+                          min_prob=args.min_prob, candidates=args.candidates)
+
+    for booth, voters, enrolled, nbytes in shards:
+        print(f"📦 {booth:16} {voters:>8} voters {enrolled:>8} enrolled {nbytes / 1e6:>8.1f} MB faces")
+    print(f"✅ {len(shards)} booth shards in {args.out}")
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from metrics import cache_lookup
+
+# ------------------------------
+# Candidate catalog
+# ------------------------------
+# Static candidate metadata (id, name, party) is cached per booth and only
+# refetched for a booth when a CandidateAdded event for that booth shows up.
+# Vote counts are NOT part of the cached metadata: they are read live from
+# the local VoteCast index, so they never go stale.
+
+
+class CandidateCatalog:
+
+    def __init__(self, w3, ec_contract, vote_index=None, start_block=0, chunk_size=2000):
+        self.w3 = w3
+        self.ec_contract = ec_contract
+        self.vote_index = vote_index
+        self.chunk_size = chunk_size
+
+        self._meta = {}        # booth -> [{Candidate_ID, Candidate_Name, Party_Name}]
+        self._lock = threading.Lock()
+        self._last_block = start_block - 1
+        self._thread = None
+
+    # ---------------- Fetch ----------------
+    @staticmethod
+    def _rows(result):
+        ids, names, parties, _votes = result
+        return [
+            {
+                "Candidate_ID": int(ids[i]),
+                "Candidate_Name": names[i],
+                "Party_Name": parties[i]
+            }
+            for i in range(len(ids))
+        ]
+
+    def _fetch_many(self, booths):
+        """getCandidatesByBooth for several booths, as one JSON-RPC batch when supported"""
+        calls = [self.ec_contract.functions.getCandidatesByBooth(b) for b in booths]
+
+        if hasattr(self.w3, "batch_requests") and len(calls) > 1:
+            try:
+                with self.w3.batch_requests() as batch:
+                    for c in calls:
+                        batch.add(c)
+                    results = batch.execute()
+                return dict(zip(booths, results))
+            except Exception as e:
+                print("⚠️ Batched candidate fetch failed, falling back:", e)
+
+        return {b: c.call() for b, c in zip(booths, calls)}
+
+    def prefetch(self, booths):
+        booths = sorted(set(b for b in booths if b))
+        if not booths:
+            return 0
+
+        # Remember the head first so no CandidateAdded after this point is missed
+        head = self.w3.eth.block_number
+        results = self._fetch_many(booths)
+
+        with self._lock:
+            for booth, result in results.items():
+                self._meta[booth] = self._rows(result)
+            self._last_block = max(self._last_block, head)
+
+        print(f"📋 Prefetched candidates for {len(results)} booths")
+        return len(results)
+
+    def seed(self, rows_by_booth, block):
+        """Use metadata read elsewhere (e.g. a booth shard) as of `block`; newer CandidateAdded events still invalidate it"""
+        with self._lock:
+            self._meta.update(rows_by_booth)
+            self._last_block = max(self._last_block, block)
+
+    def invalidate(self, booth=None):
+        with self._lock:
+            if booth is None:
+                self._meta.clear()
+            else:
+                self._meta.pop(booth, None)
+
+    # ---------------- Read ----------------
+    def metadata(self, booth):
+        with self._lock:
+            rows = self._meta.get(booth)
+        cache_lookup("candidate_cache", rows is not None)
+        if rows is None:
+            rows = self._rows(self._fetch_many([booth])[booth])
+            with self._lock:
+                self._meta[booth] = rows
+        return rows
+
+    def candidates(self, booth):
+        """Metadata joined with current vote counts (the /get-candidates shape)"""
+        counts = self.vote_index.vote_counts(booth) if self.vote_index is not None else {}
+        return [
+            {**c, "Votes": int(counts.get(c["Candidate_ID"], 0))}
+            for c in self.metadata(booth)
+        ]
+
+    # ---------------- CandidateAdded watcher ----------------
+    def poll_events(self):
+        head = self.w3.eth.block_number
+        start = self._last_block + 1
+        touched = set()
+
+        while start <= head:
+            end = min(start + self.chunk_size - 1, head)
+            for log in self.ec_contract.events.CandidateAdded.get_logs(from_block=start, to_block=end):
+                touched.add(log["args"]["pollingBoothId"])
+            start = end + 1
+
+        with self._lock:
+            self._last_block = max(self._last_block, head)
+            for booth in touched:
+                self._meta.pop(booth, None)
+
+        return touched
+
+    def start_watcher(self, interval=10):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    touched = self.poll_events()
+                    if touched:
+                        print("🔄 Candidate cache invalidated for:", ", ".join(sorted(touched)))
+                except Exception as e:
+                    print("❌ Candidate watcher error:", e)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
@@ -0,0 +1,554 @@
+import argparse
+import heapq
+import itertools
+import json
+import math
+import random
+from collections import deque
+
+# ------------------------------
+# Capacity simulator
+# ------------------------------
+# Discrete-event model of one polling day, for sizing kiosks, backends and
+# the chain before the election rather than during it:
+#
+#   voter arrives at booth -> waits for a free kiosk -> /verify-epic
+#   -> [OTP by SMS] -> face check on a backend face slot (retried on a
+#   mismatch, one capture per second like index.js) -> /get-candidates
+#   -> picks a candidate -> /cast-vote
+#
+# /cast-vote either waits for the castVote transaction to be mined (default)
+# or, with --journal (BALLOT_JOURNAL=1), answers after the journal fsync while
+# one replayer per backend worker submits ballots to the chain one at a time.
+# The chain mines a block every --block-time seconds holding at most
+# block gas limit / castVote gas votes.
+#
+# Timings default to rough guesses; pass the backend's benchmark output and
+# the measured ones replace them:
+#
+#   python gas_benchmark.py --json gas.json          castVote gas
+#   python loadtest.py --json load.json              per-endpoint latency
+#   python tracing.py summary --json traces.json     face / RPC span latency
+#
+#   python capacity_sim.py --booths 50 --electors 1200 --kiosks 2 \
+#       --measured gas.json load.json traces.json [--journal] [--json plan.json]
+
+# Share of the day's voters arriving in each opening hour (07:00 - 18:00)
+DEFAULT_PROFILE = [6, 9, 11, 10, 9, 8, 8, 9, 10, 11, 9]
+
+
+# ------------------------------
+# Latency distributions
+# ------------------------------
+class Latency:
+    """Seconds; lognormal fitted to a median and a 95th percentile"""
+
+    def __init__(self, p50, p95=None, source="default"):
+        self.p50 = p50
+        self.p95 = p95 if p95 is not None else p50
+        self.source = source
+        self._mu = math.log(max(p50, 1e-6))
+        self._sigma = max(0.0, (math.log(max(self.p95, 1e-6)) - self._mu) / 1.6449)
+
+    @classmethod
+    def from_ms(cls, stats, source):
+        return cls(stats["p50"] / 1000, stats["p95"] / 1000, source)
+
+    def sample(self, rng):
+        return rng.lognormvariate(self._mu, self._sigma) if self._sigma else self.p50
+
+    def describe(self):
+        return {"p50": round(self.p50, 4), "p95": round(self.p95, 4), "source": self.source}
+
+
+def _span_sum(spans, names):
+    """Latency of consecutive spans; summing percentiles over-estimates the tail a little"""
+    rows = [spans[n] for n in names if n in spans]
+    if not rows:
+        return None
+    return {"p50": sum(r["p50"] for r in rows), "p95": sum(r["p95"] for r in rows)}
+
+
+def load_measured(paths):
+    """Merge benchmark JSON files by their top-level key (castVote_gas, load_test, trace_summary, ...)"""
+    measured = {}
+    for path in paths or []:
+        with open(path, encoding="utf-8") as f:
+            measured.update(json.load(f))
+    return measured
+
+
+def build_timings(args, measured):
+    t = {
+        "walk_up": Latency(args.walk_up_p50, args.walk_up_p95),
+        "verify_epic": Latency(0.05, 0.2),
+        "face": Latency(0.35, 0.9),
+        "get_candidates": Latency(0.05, 0.2),
+        "choose": Latency(args.choose_p50, args.choose_p95),
+        "cast_vote": Latency(0.3, 1.0),
+        "rpc": Latency(0.08, 0.3),
+        "sms": Latency(args.sms_p50, args.sms_p95),
+        "otp_entry": Latency(12.0, 30.0),
+        "journal_commit": Latency(0.004, 0.02)
+    }
+
+    load = measured.get("load_test", {}).get("endpoints", {})
+    for name in ("verify_epic", "get_candidates", "cast_vote"):
+        if name in load:
+            t[name] = Latency.from_ms(load[name], "load_test")
+    if "verify_face" in load:
+        t["face"] = Latency.from_ms(load["verify_face"], "load_test")
+
+    # Traces isolate model time from HTTP and queueing, so they win for the face slot
+    spans = {r["name"]: r for r in measured.get("trace_summary", {}).get("spans", [])}
+    face = _span_sum(spans, ("face.decode", "face.detect", "face.embed", "face.match"))
+    if face:
+        t["face"] = Latency.from_ms(face, "trace_summary")
+    if "chain.dry_run" in spans:
+        t["rpc"] = Latency.from_ms(spans["chain.dry_run"], "trace_summary")
+
+    return t
+
+
+def cast_vote_gas(args, measured):
+    gas = measured.get("castVote_gas", {}).get(args.contract)
+    if gas:
+        return gas["mean"], "castVote_gas"
+    return args.gas, "default"
+
+
+# ------------------------------
+# Event engine
+# ------------------------------
+# Processes are generators that yield a delay in seconds or an Event to wait on
+class Event:
+
+    __slots__ = ("waiters", "triggered")
+
+    def __init__(self):
+        self.waiters = []
+        self.triggered = False
+
+
+class Simulator:
+
+    def __init__(self):
+        self.now = 0.0
+        self._queue = []
+        self._seq = itertools.count()
+
+    def at(self, delay, fn, *args):
+        heapq.heappush(self._queue, (self.now + delay, next(self._seq), fn, args))
+
+    def process(self, gen):
+        self._step(gen)
+
+    def trigger(self, event):
+        event.triggered = True
+        waiters, event.waiters = event.waiters, []
+        for gen in waiters:
+            self.at(0, self._step, gen)
+
+    def _step(self, gen):
+        try:
+            target = next(gen)
+        except StopIteration:
+            return
+        if isinstance(target, Event):
+            if target.triggered:
+                self.at(0, self._step, gen)
+            else:
+                target.waiters.append(gen)
+        else:
+            self.at(target, self._step, gen)
+
+    def run(self):
+        while self._queue:
+            self.now, _, fn, args = heapq.heappop(self._queue)
+            fn(*args)
+
+
+class Level:
+    """Time-weighted mean and max of a quantity such as a queue length"""
+
+    __slots__ = ("sim", "value", "peak", "_area", "_since")
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.value = 0
+        self.peak = 0
+        self._area = 0.0
+        self._since = 0.0
+
+    def add(self, delta):
+        self._area += self.value * (self.sim.now - self._since)
+        self._since = self.sim.now
+        self.value += delta
+        self.peak = max(self.peak, self.value)
+
+    def mean(self, until):
+        area = self._area + self.value * (until - self._since)
+        return area / until if until else 0.0
+
+
+class Resource:
+    """`capacity` identical servers with one FIFO line"""
+
+    def __init__(self, sim, capacity):
+        self.sim = sim
+        self.capacity = capacity
+        self.busy = Level(sim)
+        self.line = Level(sim)
+        self._waiting = deque()
+
+    def acquire(self):
+        event = Event()
+        if self.busy.value < self.capacity:
+            self.busy.add(1)
+            event.triggered = True
+        else:
+            self._waiting.append(event)
+            self.line.add(1)
+        return event
+
+    def release(self):
+        if self._waiting:
+            self.line.add(-1)
+            self.sim.trigger(self._waiting.popleft())
+        else:
+            self.busy.add(-1)
+
+
+# ------------------------------
+# Chain and ballot journals
+# ------------------------------
+class Chain:
+
+    def __init__(self, sim, block_time, votes_per_block):
+        self.sim = sim
+        self.block_time = block_time
+        self.votes_per_block = votes_per_block
+        self.mempool = deque()
+        self.pending = Level(sim)
+        self.blocks = 0
+        self.votes = 0
+        self.full_blocks = 0
+        self.inclusion = []
+        self._mining = False
+
+    def submit(self):
+        """Event that fires when the transaction is in a block"""
+        event = Event()
+        self.mempool.append((self.sim.now, event))
+        self.pending.add(1)
+        if not self._mining:
+            self._mining = True
+            next_block = math.floor(self.sim.now / self.block_time + 1) * self.block_time
+            self.sim.at(next_block - self.sim.now, self._mine)
+        return event
+
+    def _mine(self):
+        n = min(len(self.mempool), self.votes_per_block)
+        for _ in range(n):
+            sent, event = self.mempool.popleft()
+            self.inclusion.append(self.sim.now - sent)
+            self.sim.trigger(event)
+        self.pending.add(-n)
+        self.blocks += 1
+        self.votes += n
+        self.full_blocks += n == self.votes_per_block
+
+        if self.mempool:
+            self.sim.at(self.block_time, self._mine)
+        else:
+            self._mining = False
+
+
+class JournalReplayer:
+    """One backend worker's ballot journal, drained one castVote at a time"""
+
+    def __init__(self, sim, chain, timings, rng, stats):
+        self.sim = sim
+        self.chain = chain
+        self.timings = timings
+        self.rng = rng
+        self.stats = stats
+        self.ballots = deque()
+        self._wakeup = None
+
+    def append(self):
+        self.ballots.append(self.sim.now)
+        self.stats["backlog"].add(1)
+        if self._wakeup is not None:
+            event, self._wakeup = self._wakeup, None
+            self.sim.trigger(event)
+
+    def run(self):
+        while True:
+            if not self.ballots:
+                self._wakeup = Event()
+                yield self._wakeup
+                continue
+            queued = self.ballots[0]
+            yield self.timings["rpc"].sample(self.rng)    # hasVoted + dry run
+            yield self.timings["rpc"].sample(self.rng)    # send
+            yield self.chain.submit()
+            yield self.timings["rpc"].sample(self.rng)    # receipt poll
+            self.ballots.popleft()
+            self.stats["backlog"].add(-1)
+            self.stats["lag"].append(self.sim.now - queued)
+            self.stats["drained_at"] = self.sim.now
+
+
+# ------------------------------
+# Model
+# ------------------------------
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def arrivals(rng, voters, profile, hour=3600.0):
+    """Poisson arrival times, piecewise-constant rate per opening hour"""
+    total = sum(profile)
+    times = []
+    for h, weight in enumerate(profile):
+        rate = voters * weight / total / hour
+        t = h * hour
+        while rate:
+            t += rng.expovariate(rate)
+            if t >= (h + 1) * hour:
+                break
+            times.append(t)
+    return times
+
+
+def simulate(args, timings, gas):
+    rng = random.Random(args.seed)
+    sim = Simulator()
+    votes_per_block = max(1, int(args.block_gas_limit // gas))
+    chain = Chain(sim, args.block_time, votes_per_block)
+    close = len(args.profile) * 3600.0
+
+    face_slots = [Resource(sim, args.workers * args.face_slots) for _ in range(args.backends)]
+    journal_stats = {"backlog": Level(sim), "lag": [], "drained_at": 0.0}
+    journals = []
+    if args.journal:
+        for _ in range(args.backends * args.workers):
+            replayer = JournalReplayer(sim, chain, timings, rng, journal_stats)
+            journals.append(replayer)
+            sim.process(replayer.run())
+
+    booths = []
+    for b in range(args.booths):
+        booths.append({
+            "kiosks": Resource(sim, args.kiosks),
+            "backend": b % args.backends,
+            "waits": [],
+            "voted": [],
+            "turned_away": 0
+        })
+
+    def voter(booth):
+        kiosks = booth["kiosks"]
+        arrived = sim.now
+        yield kiosks.acquire()
+        booth["waits"].append(sim.now - arrived)
+
+        yield timings["walk_up"].sample(rng)
+        yield timings["verify_epic"].sample(rng)
+        if rng.random() < args.otp_rate:
+            yield timings["sms"].sample(rng)
+            yield timings["otp_entry"].sample(rng)
+
+        slots = face_slots[booth["backend"]]
+        matched = False
+        for attempt in range(args.face_attempts):
+            if attempt:
+                yield 1.0   # next capture from index.js
+            yield slots.acquire()
+            yield timings["face"].sample(rng)
+            slots.release()
+            if rng.random() >= args.face_retry:
+                matched = True
+                break
+        if not matched:
+            booth["turned_away"] += 1
+            kiosks.release()
+            return
+
+        yield timings["get_candidates"].sample(rng)
+        yield timings["choose"].sample(rng)
+
+        if args.journal:
+            yield timings["journal_commit"].sample(rng)
+            journals[rng.randrange(len(journals))].append()
+        else:
+            yield timings["cast_vote"].sample(rng)
+            yield chain.submit()
+            yield timings["rpc"].sample(rng)
+
+        booth["voted"].append(sim.now)
+        kiosks.release()
+
+    def arrive(booth):
+        sim.process(voter(booth))
+
+    voters = round(args.electors * args.turnout)
+    for booth in booths:
+        for t in arrivals(rng, voters, args.profile):
+            sim.at(t, arrive, booth)
+
+    sim.run()
+    end = max(sim.now, close)
+    return report(args, booths, face_slots, chain, journal_stats, close, end, votes_per_block)
+
+
+def report(args, booths, face_slots, chain, journal_stats, close, end, votes_per_block):
+    all_votes = [t for b in booths for t in b["voted"]]
+    all_waits = [w for b in booths for w in b["waits"]]
+    last_vote = max(all_votes, default=0.0)
+
+    per_booth = []
+    for i, b in enumerate(booths):
+        hours = [0] * (int(max(b["voted"], default=0) // 3600) + 1)
+        for t in b["voted"]:
+            hours[int(t // 3600)] += 1
+        per_booth.append({
+            "booth": i,
+            "votes": len(b["voted"]),
+            "turned_away": b["turned_away"],
+            "peak_votes_per_hour": max(hours),
+            "queue_peak": b["kiosks"].line.peak,
+            "queue_mean": round(b["kiosks"].line.mean(end), 2),
+            "wait_p95_minutes": round(percentile(b["waits"], 95) / 60, 1),
+            "kiosk_utilization": round(b["kiosks"].busy.mean(end) / args.kiosks, 3),
+            "last_vote_after_close_minutes": round(max(0.0, max(b["voted"], default=0.0) - close) / 60, 1)
+        })
+
+    worst = max(per_booth, key=lambda r: r["wait_p95_minutes"])
+    total_hours = [0] * (int(last_vote // 3600) + 1)
+    for t in all_votes:
+        total_hours[int(t // 3600)] += 1
+
+    result = {
+        "deployment": {
+            "booths": args.booths,
+            "kiosks_per_booth": args.kiosks,
+            "backends": args.backends,
+            "face_slots_per_backend": args.workers * args.face_slots,
+            "cast_mode": "journal" if args.journal else "wait_for_receipt",
+            "block_time": args.block_time,
+            "votes_per_block": votes_per_block
+        },
+        "votes": len(all_votes),
+        "turned_away": sum(b["turned_away"] for b in booths),
+        "peak_votes_per_hour": max(total_hours),
+        "wait_p50_minutes": round(percentile(all_waits, 50) / 60, 1),
+        "wait_p95_minutes": round(percentile(all_waits, 95) / 60, 1),
+        "wait_max_minutes": round(max(all_waits, default=0.0) / 60, 1),
+        "last_vote_after_close_minutes": round(max(0.0, last_vote - close) / 60, 1),
+        "worst_booth": worst,
+        "face": {
+            "utilization": round(sum(s.busy.mean(end) for s in face_slots) / (len(face_slots) * args.workers * args.face_slots), 3),
+            "queue_peak": max(s.line.peak for s in face_slots)
+        },
+        "chain": {
+            "blocks": chain.blocks,
+            "full_blocks": chain.full_blocks,
+            "block_utilization": round(chain.votes / (chain.blocks * votes_per_block), 3) if chain.blocks else 0.0,
+            "mempool_peak": chain.pending.peak,
+            "inclusion_p95_seconds": round(percentile(chain.inclusion, 95), 1)
+        },
+        "booths": per_booth
+    }
+    if args.journal:
+        result["journal"] = {
+            "backlog_peak": journal_stats["backlog"].peak,
+            "lag_p95_seconds": round(percentile(journal_stats["lag"], 95), 1),
+            "drained_after_close_minutes": round(max(0.0, journal_stats["drained_at"] - close) / 60, 1)
+        }
+    return result
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Polling-day capacity simulation for booths, backends and chain")
+    parser.add_argument("--measured", nargs="*", help="gas_benchmark / loadtest / tracing summary --json files")
+
+    p = parser.add_argument_group("deployment")
+    p.add_argument("--booths", type=int, default=10)
+    p.add_argument("--electors", type=int, default=1200, help="voters on each booth's roll")
+    p.add_argument("--turnout", type=float, default=0.65)
+    p.add_argument("--profile", type=lambda s: [float(x) for x in s.split(",")], default=DEFAULT_PROFILE,
+                   help="comma-separated arrival weight per opening hour")
+    p.add_argument("--kiosks", type=int, default=1, help="kiosks per booth")
+    p.add_argument("--backends", type=int, default=1, help="backend hosts; booths are spread round-robin")
+    p.add_argument("--workers", type=int, default=4, help="gunicorn workers per backend (one ballot journal each)")
+    p.add_argument("--face-slots", type=int, default=1, help="concurrent face checks per worker")
+    p.add_argument("--journal", action="store_true", help="BALLOT_JOURNAL=1: /cast-vote answers after the fsync")
+
+    p = parser.add_argument_group("chain")
+    p.add_argument("--block-time", type=float, default=12.0)
+    p.add_argument("--block-gas-limit", type=int, default=30_000_000)
+    p.add_argument("--gas", type=int, default=90_000, help="castVote gas if no castVote_gas measurement")
+    p.add_argument("--contract", choices=["v1", "v2"], default="v1", help="which measured contract to use")
+
+    p = parser.add_argument_group("people")
+    p.add_argument("--walk-up-p50", type=float, default=20.0)
+    p.add_argument("--walk-up-p95", type=float, default=45.0)
+    p.add_argument("--choose-p50", type=float, default=15.0)
+    p.add_argument("--choose-p95", type=float, default=40.0)
+    p.add_argument("--face-retry", type=float, default=0.2, help="chance one capture does not match")
+    p.add_argument("--face-attempts", type=int, default=20)
+    p.add_argument("--otp-rate", type=float, default=0.0, help="share of voters who also verify an SMS OTP")
+    p.add_argument("--sms-p50", type=float, default=4.0)
+    p.add_argument("--sms-p95", type=float, default=20.0)
+
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the plan to this file")
+    args = parser.parse_args()
+
+    measured = load_measured(args.measured)
+    timings = build_timings(args, measured)
+    gas, gas_source = cast_vote_gas(args, measured)
+
+    result = simulate(args, timings, gas)
+    result["inputs"] = {
+        "castVote_gas": {"gas": gas, "source": gas_source},
+        "timings": {name: t.describe() for name, t in timings.items()}
+    }
+
+    d = result["deployment"]
+    print(f"🏫 {d['booths']} booths x {d['kiosks_per_booth']} kiosks, {d['backends']} backends "
+          f"x {d['face_slots_per_backend']} face slots, castVote {gas} gas ({gas_source}), "
+          f"{d['votes_per_block']} votes/block every {d['block_time']}s, {d['cast_mode']}")
+    print(f"🗳️ {result['votes']} votes, peak {result['peak_votes_per_hour']} votes/hour, "
+          f"{result['turned_away']} turned away at the face check")
+    print(f"⏳ queue wait p50 {result['wait_p50_minutes']} min, p95 {result['wait_p95_minutes']} min, "
+          f"max {result['wait_max_minutes']} min; last vote {result['last_vote_after_close_minutes']} min after close")
+    w = result["worst_booth"]
+    print(f"🐢 worst booth #{w['booth']}: queue peak {w['queue_peak']}, wait p95 {w['wait_p95_minutes']} min, "
+          f"kiosks {w['kiosk_utilization']:.0%} busy")
+    print(f"🧠 face slots {result['face']['utilization']:.0%} busy, queue peak {result['face']['queue_peak']}")
+    c = result["chain"]
+    print(f"⛓️ {c['blocks']} blocks, {c['block_utilization']:.0%} full, mempool peak {c['mempool_peak']}, "
+          f"inclusion p95 {c['inclusion_p95_seconds']}s")
+    if "journal" in result:
+        j = result["journal"]
+        print(f"📒 journal backlog peak {j['backlog_peak']}, lag p95 {j['lag_p95_seconds']}s, "
+              f"drained {j['drained_after_close_minutes']} min after close")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"capacity_sim": result}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import threading
+import time
+
+# ------------------------------
+# Paginated EC reads
+# ------------------------------
+# Walks getPartiesPage / getCandidatesByBoothPage page by page. Every page of
+# one walk is read at the same block, and pages are cached per block number:
+# a repeat read at the same head costs no RPC, a new block drops the cache.
+
+
+class ContractPager:
+
+    def __init__(self, w3, ec_contract, page_size=50, head_ttl=1.0):
+        self.w3 = w3
+        self.ec_contract = ec_contract
+        self.page_size = page_size
+        self.head_ttl = head_ttl
+
+        self._head = (0, 0.0)   # (block number, fetched at)
+        self._block = None      # block the cached pages belong to
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def head(self):
+        block, fetched = self._head
+        if time.time() - fetched > self.head_ttl:
+            block = self.w3.eth.block_number
+            self._head = (block, time.time())
+        return block
+
+    def _page(self, key, fn, block):
+        with self._lock:
+            if self._block != block:
+                self._pages.clear()
+                self._block = block
+            if key in self._pages:
+                return self._pages[key]
+
+        result = fn.call(block_identifier=block)
+
+        with self._lock:
+            if self._block == block:
+                self._pages[key] = result
+        return result
+
+    def iter_parties(self, page_size=None):
+        limit = page_size or self.page_size
+        block = self.head()
+        offset = 0
+
+        while True:
+            ids, names, leaders, descs, logos, next_offset = self._page(
+                ("parties", offset, limit),
+                self.ec_contract.functions.getPartiesPage(offset, limit),
+                block
+            )
+            yield block, [
+                {
+                    "id": int(ids[i]),
+                    "name": names[i],
+                    "leader": leaders[i],
+                    "description": descs[i],
+                    "logo": logos[i]
+                }
+                for i in range(len(ids))
+            ]
+            if next_offset == 0:
+                return
+            offset = next_offset
+
+    def iter_candidates(self, booth, page_size=None):
+        limit = page_size or self.page_size
+        block = self.head()
+        offset = 0
+
+        while True:
+            ids, names, parties, votes, total = self._page(
+                ("candidates", booth, offset, limit),
+                self.ec_contract.functions.getCandidatesByBoothPage(booth, offset, limit),
+                block
+            )
+            yield block, int(total), [
+                {
+                    "Candidate_ID": int(ids[i]),
+                    "Candidate_Name": names[i],
+                    "Party_Name": parties[i],
+                    "Votes": int(votes[i])
+                }
+                for i in range(len(ids))
+            ]
+            offset += len(ids)
+            if len(ids) == 0 or offset >= total:
+                return
@@ -113,6 +113,58 @@ function removeParty(uint256 _partyId) external onlyElectionCommission {
     return (ids, names, leaders, descs, logos);
 }
 
+    // =========================
+    // Paginated party read
+    // =========================
+    // Scans party IDs (offset, offset + limit] once and returns the active
+    // ones plus the offset to pass for the next page (0 when there is none).
+    function getPartiesPage(uint256 offset, uint256 limit)
+        external
+        view
+        returns (
+            uint256[] memory ids,
+            string[] memory names,
+            string[] memory leaders,
+            string[] memory descs,
+            string[] memory logos,
+            uint256 nextOffset
+        )
+    {
+        uint256 end = offset + limit;
+        if (end > partyCount) end = partyCount;
+        uint256 span = end > offset ? end - offset : 0;
+
+        ids = new uint256[](span);
+        names = new string[](span);
+        leaders = new string[](span);
+        descs = new string[](span);
+        logos = new string[](span);
+
+        uint256 index = 0;
+        for (uint256 i = offset + 1; i <= end; i++) {
+            Party storage p = parties[i];
+            if (!p.exists) continue;
+
+            ids[index] = p.partyId;
+            names[index] = p.name;
+            leaders[index] = p.leader;
+            descs[index] = p.description;
+            logos[index] = p.logo;
+            index++;
+        }
+
+        // shrink arrays to the number of active parties found
+        assembly {
+            mstore(ids, index)
+            mstore(names, index)
+            mstore(leaders, index)
+            mstore(descs, index)
+            mstore(logos, index)
+        }
+
+        nextOffset = end < partyCount ? end : 0;
+    }
+
 
     // =========================
     // CANDIDATES
@@ -171,6 +223,46 @@ function removeParty(uint256 _partyId) external onlyElectionCommission {
         return (ids, names, partiesList, votes);
     }
 
+    // =========================
+    // Paginated candidate read
+    // =========================
+    function getCandidatesByBoothPage(
+        string calldata pollingBoothId,
+        uint256 offset,
+        uint256 limit
+    )
+        external
+        view
+        returns (
+            uint256[] memory ids,
+            string[] memory names,
+            string[] memory partiesList,
+            uint256[] memory votes,
+            uint256 total
+        )
+    {
+        uint256[] storage idList = candidateIdsByBooth[pollingBoothId];
+        total = idList.length;
+
+        uint256 end = offset + limit;
+        if (end > total) end = total;
+        uint256 count = end > offset ? end - offset : 0;
+
+        ids = new uint256[](count);
+        names = new string[](count);
+        partiesList = new string[](count);
+        votes = new uint256[](count);
+
+        for (uint256 i = 0; i < count; i++) {
+            Candidate storage c = candidates[pollingBoothId][idList[offset + i]];
+
+            ids[i] = c.candidateID;
+            names[i] = c.name;
+            partiesList[i] = c.party;
+            votes[i] = c.voteCount;
+        }
+    }
+
     function isCandidateValid(
         string calldata pollingBoothId,
         uint256 candidateId
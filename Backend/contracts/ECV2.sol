@@ -0,0 +1,215 @@
+// SPDX-License-Identifier: GPL-3.0
+pragma solidity ^0.8.27;
+
+/*
+   Gas-optimized ElectionCommission.
+
+   - Booth IDs are interned once: keccak256(boothId) => uint32 booth number,
+     so per-vote lookups hash nothing and key mappings by a small integer.
+   - Voting state is a single uint8 phase packed with the EC address.
+   - voteStatus() answers "is voting active AND is this candidate valid"
+     in one external call for Voting.castVote.
+*/
+contract ElectionCommissionV2 {
+
+    struct Candidate {
+        string name;
+        string party;
+        bool isCandidate;
+    }
+
+    struct Party {
+        uint256 partyId;
+        string name;
+        string leader;
+        string description;
+        string logo;
+        bool exists;
+    }
+
+    uint8 public constant PHASE_NOT_STARTED = 0;
+    uint8 public constant PHASE_ACTIVE = 1;
+    uint8 public constant PHASE_ENDED = 2;
+
+    uint8 public constant STATUS_OK = 0;
+    uint8 public constant STATUS_NOT_STARTED = 1;
+    uint8 public constant STATUS_ENDED = 2;
+    uint8 public constant STATUS_INVALID_CANDIDATE = 3;
+
+    // one slot: 20-byte address + 1-byte phase
+    address public electionCommission;
+    uint8 public phase;
+
+    // keccak256(boothId) => booth number (1-based, 0 = unknown)
+    mapping(bytes32 => uint32) public boothNumberByHash;
+    string[] private boothNames;
+
+    // booth number => candidateId => Candidate
+    mapping(uint32 => mapping(uint32 => Candidate)) public candidates;
+    mapping(uint32 => uint32[]) private candidateIdsByBooth;
+
+    mapping(uint256 => Party) public parties;
+    uint256 public partyCount;
+
+    event BoothRegistered(string pollingBoothId, uint32 boothNumber);
+    event CandidateAdded(string pollingBoothId, uint256 candidateId, string name, string party);
+    event PartyAdded(uint256 partyId, string name, string leader);
+    event PartyRemoved(uint256 partyId);
+    event VotingStarted();
+    event VotingEnded();
+
+    constructor() {
+        electionCommission = msg.sender;
+    }
+
+    modifier onlyElectionCommission() {
+        require(msg.sender == electionCommission, "Only EC allowed");
+        _;
+    }
+
+    // =========================
+    // BOOTHS
+    // =========================
+    function registerBooth(string calldata pollingBoothId)
+        public
+        onlyElectionCommission
+        returns (uint32 number)
+    {
+        require(bytes(pollingBoothId).length > 0, "Booth ID required");
+
+        bytes32 key = keccak256(bytes(pollingBoothId));
+        number = boothNumberByHash[key];
+        if (number != 0) return number;
+
+        boothNames.push(pollingBoothId);
+        number = uint32(boothNames.length);
+        boothNumberByHash[key] = number;
+
+        emit BoothRegistered(pollingBoothId, number);
+    }
+
+    function boothNumber(string calldata pollingBoothId) external view returns (uint32) {
+        return boothNumberByHash[keccak256(bytes(pollingBoothId))];
+    }
+
+    function boothName(uint32 number) external view returns (string memory) {
+        require(number > 0 && number <= boothNames.length, "Unknown booth");
+        return boothNames[number - 1];
+    }
+
+    function boothCount() external view returns (uint256) {
+        return boothNames.length;
+    }
+
+    // =========================
+    // PARTY FUNCTIONS
+    // =========================
+    function addParty(
+        string calldata _name,
+        string calldata _leader,
+        string calldata _description,
+        string calldata _logo
+    ) external onlyElectionCommission {
+
+        require(bytes(_name).length > 0, "Party name required");
+
+        partyCount++;
+
+        parties[partyCount] = Party(
+            partyCount,
+            _name,
+            _leader,
+            _description,
+            _logo,
+            true
+        );
+
+        emit PartyAdded(partyCount, _name, _leader);
+    }
+
+    function removeParty(uint256 _partyId) external onlyElectionCommission {
+        require(_partyId > 0 && _partyId <= partyCount, "Invalid party ID");
+        require(parties[_partyId].exists, "Party does not exist");
+
+        parties[_partyId].exists = false;
+
+        emit PartyRemoved(_partyId);
+    }
+
+    // =========================
+    // CANDIDATES
+    // =========================
+    function addCandidate(
+        string calldata pollingBoothId,
+        uint32 _candidateID,
+        string calldata _name,
+        string calldata _party
+    ) external onlyElectionCommission {
+
+        require(_candidateID != 0, "Invalid ID");
+
+        uint32 booth = registerBooth(pollingBoothId);
+        require(!candidates[booth][_candidateID].isCandidate, "Candidate exists");
+
+        candidates[booth][_candidateID] = Candidate(_name, _party, true);
+        candidateIdsByBooth[booth].push(_candidateID);
+
+        emit CandidateAdded(pollingBoothId, _candidateID, _name, _party);
+    }
+
+    function getCandidatesByBooth(uint32 booth)
+        external
+        view
+        returns (
+            uint256[] memory,
+            string[] memory,
+            string[] memory
+        )
+    {
+        uint32[] storage idList = candidateIdsByBooth[booth];
+        uint256 count = idList.length;
+
+        uint256[] memory ids = new uint256[](count);
+        string[] memory names = new string[](count);
+        string[] memory partiesList = new string[](count);
+
+        for (uint256 i = 0; i < count; i++) {
+            Candidate storage c = candidates[booth][idList[i]];
+            ids[i] = idList[i];
+            names[i] = c.name;
+            partiesList[i] = c.party;
+        }
+
+        return (ids, names, partiesList);
+    }
+
+    // =========================
+    // VOTING STATE
+    // =========================
+    // Single combined read used by VotingV2.castVote
+    function voteStatus(uint32 booth, uint32 candidateId) external view returns (uint8) {
+        uint8 p = phase;
+        if (p == PHASE_NOT_STARTED) return STATUS_NOT_STARTED;
+        if (p == PHASE_ENDED) return STATUS_ENDED;
+        if (!candidates[booth][candidateId].isCandidate) return STATUS_INVALID_CANDIDATE;
+        return STATUS_OK;
+    }
+
+    function votingStarted() external view returns (bool) {
+        return phase == PHASE_ACTIVE;
+    }
+
+    function votingEnded() external view returns (bool) {
+        return phase == PHASE_ENDED;
+    }
+
+    function start_voting() external onlyElectionCommission {
+        phase = PHASE_ACTIVE;
+        emit VotingStarted();
+    }
+
+    function end_voting() external onlyElectionCommission {
+        phase = PHASE_ENDED;
+        emit VotingEnded();
+    }
+}
@@ -0,0 +1,108 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.27;
+
+/*
+   Gas-optimized Voting, paired with ElectionCommissionV2.
+
+   - Booths are addressed by their interned uint32 number, never by string.
+   - A vote record is one packed uint64 (booth << 32 | candidateId); a
+     non-zero record doubles as the hasVoted flag, so castVote does a
+     single SSTORE per voter instead of hasVoted + a 3-slot struct.
+   - The EC address is immutable and castVote makes one external call.
+*/
+interface IECV2 {
+    function voteStatus(uint32 booth, uint32 candidateId) external view returns (uint8);
+
+    function boothName(uint32 booth) external view returns (string memory);
+
+    function candidates(
+        uint32,
+        uint32
+    )
+        external
+        view
+        returns (
+            string memory name,
+            string memory party,
+            bool isCandidate
+        );
+}
+
+contract VotingV2 {
+
+    IECV2 public immutable ec;
+
+    // booth number => candidate => total votes
+    mapping(uint32 => mapping(uint32 => uint256)) private voteCount;
+
+    // epicHash => (booth << 32) | candidateId, 0 = has not voted
+    mapping(bytes32 => uint64) private votes;
+
+    event VoteCast(
+        uint32 boothNumber,
+        uint32 candidateId,
+        bytes32 receiptHash
+    );
+
+    constructor(address _ecAddress) {
+        ec = IECV2(_ecAddress);
+    }
+
+    function castVote(
+        uint32 boothNumber,
+        uint32 candidateId,
+        bytes32 epicHash
+    ) external {
+
+        // status codes: see ElectionCommissionV2.STATUS_*
+        uint8 status = ec.voteStatus(boothNumber, candidateId);
+        require(status != 1, "Voting not started");
+        require(status != 2, "Voting ended");
+        require(status != 3, "Invalid candidate");
+
+        require(votes[epicHash] == 0, "Already voted");
+
+        unchecked {
+            voteCount[boothNumber][candidateId]++;
+        }
+
+        votes[epicHash] = (uint64(boothNumber) << 32) | uint64(candidateId);
+
+        emit VoteCast(boothNumber, candidateId, epicHash);
+    }
+
+    function hasVoted(bytes32 epicHash) external view returns (bool) {
+        return votes[epicHash] != 0;
+    }
+
+    // =========================
+    // VERIFY VOTE (main feature)
+    // =========================
+    function verifyMyVote(bytes32 epicHash)
+        external
+        view
+        returns (
+            string memory pollingBoothId,
+            uint candidateId,
+            string memory candidateName,
+            string memory party
+        )
+    {
+        uint64 record = votes[epicHash];
+        require(record != 0, "No vote found");
+
+        uint32 booth = uint32(record >> 32);
+        uint32 id = uint32(record);
+
+        (string memory name, string memory partyName, ) = ec.candidates(booth, id);
+
+        return (ec.boothName(booth), id, name, partyName);
+    }
+
+    function getVoteCount(
+        uint32 boothNumber,
+        uint32 candidateId
+    ) external view returns (uint) {
+        return voteCount[boothNumber][candidateId];
+    }
+}
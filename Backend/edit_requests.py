@@ -0,0 +1,149 @@
+import csv
+import os
+import time
+
+# ------------------------------
+# Voter edit-request queue
+# ------------------------------
+# Lives next to the roll in voters.db (same connection as VoterStore), so
+# approving a batch flips the request statuses and applies the edits to the
+# voters table in ONE transaction. Every request has its own request_id;
+# transitions are primary-key updates guarded by Status = 'PENDING', so an
+# old request for the same EPIC is never touched by a new decision.
+#
+# The old Dataset/voter_edit_requests.csv is imported once, on first start.
+
+EDIT_FIELDS = [
+    "EPIC_ID", "Polling_Booth_ID",
+    "Old_Name", "New_Name",
+    "Old_Age", "New_Age",
+    "Old_Phone", "New_Phone",
+    "Status"
+]
+
+# request field -> voter field it changes
+EDIT_TARGETS = {"New_Name": "Name", "New_Age": "Age", "New_Phone": "Phone_Number"}
+
+STATUSES = ("PENDING", "APPROVED", "REJECTED")
+
+
+class EditRequestQueue:
+
+    def __init__(self, voter_store, legacy_csv=None):
+        self.voters = voter_store
+
+        columns = ",\n".join(f'"{f}" TEXT' for f in EDIT_FIELDS)
+        with self.voters.transaction() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS edit_requests (
+                    request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {columns},
+                    created REAL,
+                    decided REAL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS edit_requests_booth_status "
+                "ON edit_requests (Polling_Booth_ID, Status, request_id)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS edit_requests_epic ON edit_requests (EPIC_ID)")
+
+        if legacy_csv and os.path.isfile(legacy_csv):
+            self._import_legacy(legacy_csv)
+
+    _INSERT = (
+        f"INSERT INTO edit_requests ({', '.join(EDIT_FIELDS)}, created) "
+        f"VALUES ({', '.join('?' * (len(EDIT_FIELDS) + 1))})"
+    )
+
+    def _import_legacy(self, path):
+        with self.voters.transaction() as conn:
+            if conn.execute("SELECT value FROM meta WHERE key = 'edit_csv_imported'").fetchone():
+                return
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = [r for r in csv.DictReader(f) if r.get("EPIC_ID")]
+            conn.executemany(self._INSERT, [
+                (*(r.get(k, "") for k in EDIT_FIELDS), None) for r in rows
+            ])
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('edit_csv_imported', '1')")
+
+        print(f"📥 Imported {len(rows)} edit requests from CSV")
+
+    # ---------------- Submit ----------------
+    def submit(self, row):
+        values = {**row, "Status": "PENDING"}
+        with self.voters.transaction() as conn:
+            cur = conn.execute(self._INSERT, (*(values.get(k, "") for k in EDIT_FIELDS), time.time()))
+            return cur.lastrowid
+
+    # ---------------- Read ----------------
+    def by_booth(self, booth, status="PENDING", limit=500):
+        with self.voters.transaction() as conn:
+            rows = conn.execute(
+                f"SELECT request_id, {', '.join(EDIT_FIELDS)} FROM edit_requests "
+                "WHERE Polling_Booth_ID = ? AND Status = ? ORDER BY request_id LIMIT ?",
+                (booth, status, limit)
+            ).fetchall()
+        return [dict(zip(["request_id", *EDIT_FIELDS], r)) for r in rows]
+
+    def latest_pending(self, epic):
+        """request_id of the newest pending request for an EPIC (old clients send only EPIC_ID)"""
+        with self.voters.transaction() as conn:
+            row = conn.execute(
+                "SELECT request_id FROM edit_requests WHERE EPIC_ID = ? AND Status = 'PENDING' "
+                "ORDER BY request_id DESC LIMIT 1",
+                (epic,)
+            ).fetchone()
+        return row[0] if row else None
+
+    # ---------------- Decide ----------------
+    def _pending(self, conn, request_ids, booth):
+        marks = ",".join("?" * len(request_ids))
+        sql = (f"SELECT request_id, {', '.join(EDIT_FIELDS)} FROM edit_requests "
+               f"WHERE request_id IN ({marks}) AND Status = 'PENDING'")
+        args = list(request_ids)
+        if booth is not None:
+            sql += " AND Polling_Booth_ID = ?"
+            args.append(booth)
+        return [dict(zip(["request_id", *EDIT_FIELDS], r)) for r in conn.execute(sql, args)]
+
+    def _mark(self, conn, request_ids, status):
+        now = time.time()
+        conn.executemany(
+            "UPDATE edit_requests SET Status = ?, decided = ? WHERE request_id = ? AND Status = 'PENDING'",
+            [(status, now, rid) for rid in request_ids]
+        )
+
+    def approve(self, request_ids, booth=None, before_commit=None):
+        """Approve pending requests and apply their edits to the roll, all or nothing.
+
+        Returns [(epic, {voter field: new value})] in request order.
+        before_commit(conn, edits) runs inside the transaction (e.g. to
+        mirror the edits into the CSV); if it raises, nothing is approved.
+        """
+        request_ids = list(dict.fromkeys(int(r) for r in request_ids))
+        if not request_ids:
+            return []
+
+        with self.voters.transaction() as conn:
+            rows = sorted(self._pending(conn, request_ids, booth), key=lambda r: r["request_id"])
+            edits = [
+                (r["EPIC_ID"], {field: r[key] for key, field in EDIT_TARGETS.items() if r.get(key)})
+                for r in rows
+            ]
+            self.voters.apply_edits(conn, edits)
+            self._mark(conn, [r["request_id"] for r in rows], "APPROVED")
+            if before_commit is not None and edits:
+                before_commit(conn, edits)
+
+        return edits
+
+    def reject(self, request_ids, booth=None):
+        request_ids = list(dict.fromkeys(int(r) for r in request_ids))
+        if not request_ids:
+            return 0
+
+        with self.voters.transaction() as conn:
+            rows = self._pending(conn, request_ids, booth)
+            self._mark(conn, [r["request_id"] for r in rows], "REJECTED")
+        return len(rows)
@@ -0,0 +1,176 @@
+import argparse
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+# ------------------------------
+# Face enrollment CLI
+# ------------------------------
+# Walks Dataset/P1/<EPIC>/*.jpg, decodes + detects faces in a process pool,
+# runs the crops through InceptionResnetV1 in batches and writes one row per
+# image (embedding + quality) to a SQLite file after every batch. Images
+# already in the file are skipped, so a crashed run simply resumes.
+#
+#   python enroll_faces.py --workers 8 --batch-size 64
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATASET = os.path.join(PROJECT_ROOT, "Dataset", "P1")
+DEFAULT_DB = os.path.join(PROJECT_ROOT, "Dataset", "face_embeddings.db")
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+_mtcnn = None
+
+
+# ------------------------------
+# Output database
+# ------------------------------
+def open_db(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings (
+            path TEXT PRIMARY KEY,
+            epic TEXT NOT NULL,
+            prob REAL NOT NULL,
+            face_px INTEGER NOT NULL,
+            embedding BLOB NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS embeddings_epic ON embeddings (epic)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS skipped (
+            path TEXT PRIMARY KEY,
+            epic TEXT NOT NULL,
+            reason TEXT NOT NULL
+        )
+    """)
+    conn.commit()
+    return conn
+
+
+def done_paths(conn):
+    done = {r[0] for r in conn.execute("SELECT path FROM embeddings")}
+    done.update(r[0] for r in conn.execute("SELECT path FROM skipped"))
+    return done
+
+
+# ------------------------------
+# Worker side: decode + detect
+# ------------------------------
+def _init_worker(image_size):
+    global _mtcnn
+    import torch
+    from facenet_pytorch import MTCNN
+
+    torch.set_num_threads(1)
+    _mtcnn = MTCNN(image_size=image_size, margin=0)
+
+
+def _detect(job):
+    epic, rel_path, abs_path = job
+
+    img = cv2.imread(abs_path)
+    if img is None:
+        return epic, rel_path, None, "decode_failed"
+
+    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    boxes, probs = _mtcnn.detect(rgb)
+    if boxes is None:
+        return epic, rel_path, None, "no_face"
+
+    # keep the largest face
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    i = int(np.argmax(areas))
+    box = boxes[i:i + 1]
+
+    face = _mtcnn.extract(rgb, box, None)
+    face_px = int(min(box[0, 2] - box[0, 0], box[0, 3] - box[0, 1]))
+
+    return epic, rel_path, (face.numpy().astype(np.float32), float(probs[i]), face_px), None
+
+
+# ------------------------------
+# Main
+# ------------------------------
+def find_images(dataset_dir):
+    for epic in sorted(os.listdir(dataset_dir)):
+        folder = os.path.join(dataset_dir, epic)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(IMAGE_EXTS):
+                yield epic, os.path.join(epic, name), os.path.join(folder, name)
+
+
+def enroll(dataset_dir, db_path, workers, batch_size, image_size=160):
+    import torch
+    from facenet_pytorch import InceptionResnetV1
+
+    conn = open_db(db_path)
+    done = done_paths(conn)
+    jobs = [j for j in find_images(dataset_dir) if j[1] not in done]
+
+    print(f"📁 {len(jobs)} images to enroll ({len(done)} already done)")
+    if not jobs:
+        return
+
+    model = InceptionResnetV1(pretrained='vggface2').eval()
+
+    faces, meta = [], []
+    processed = skipped = 0
+    started = time.time()
+
+    def flush():
+        nonlocal faces, meta
+        if faces:
+            with torch.no_grad():
+                embs = model(torch.from_numpy(np.stack(faces))).numpy().astype(np.float32)
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                [(path, epic, prob, px, emb.tobytes()) for (epic, path, prob, px), emb in zip(meta, embs)]
+            )
+        conn.commit()
+        faces, meta = [], []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(image_size,)) as pool:
+        for epic, path, result, reason in pool.map(_detect, jobs, chunksize=8):
+            processed += 1
+
+            if result is None:
+                skipped += 1
+                conn.execute("INSERT OR REPLACE INTO skipped VALUES (?, ?, ?)", (path, epic, reason))
+            else:
+                face, prob, face_px = result
+                faces.append(face)
+                meta.append((epic, path, prob, face_px))
+
+            if len(faces) >= batch_size:
+                flush()
+
+            if processed % (batch_size * 4) == 0:
+                rate = processed / (time.time() - started)
+                print(f"⏱️ {processed}/{len(jobs)} images, {rate:.1f} img/s")
+
+    flush()
+    conn.close()
+
+    elapsed = time.time() - started
+    print(f"✅ Enrolled {processed - skipped} images, skipped {skipped}, "
+          f"{processed / elapsed:.1f} img/s over {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build face embeddings for the voter dataset")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    enroll(args.dataset, args.db, args.workers, args.batch_size)
@@ -1,11 +1,9 @@
 import cv2
 from facenet_pytorch import MTCNN, InceptionResnetV1
-import torch
-from torch.nn.functional import cosine_similarity
-from PIL import Image
 import os
 import sys
 import json
+from face_templates import template_from_folder, embed_face, load_templates
 
 # Load models
 mtcnn = MTCNN(image_size=160, margin=0)
@@ -14,31 +12,34 @@ model = InceptionResnetV1(pretrained='vggface2').eval()
 # ------------------------------
 # BUILD FACE DATABASE
 # ------------------------------
-face_db = {}
 known_folder = "./Dataset/P1/"   # Correct path (case sensitive!)
 
-for voter_folder in os.listdir(known_folder):
-    folder_path = os.path.join(known_folder, voter_folder)
+SCORING_POLICY = os.getenv("FACE_SCORING_POLICY", "max")
 
-    if not os.path.isdir(folder_path):
-        continue
+# Voters enrolled by enroll_faces.py load instantly; the rest are embedded here.
+# BOOTH_ID=<booth> loads just that booth's shard (booth_shards.py build)
+BOOTH_ID = os.getenv("BOOTH_ID")
+if BOOTH_ID:
+    from booth_shards import open_shard
+    import csv
+
+    shard = open_shard(os.getenv("SHARD_DIR", "./Dataset/shards"), BOOTH_ID)
+    face_db = shard.face_templates()
+    with open(shard.voters_csv, newline='', encoding='utf-8') as f:
+        voter_folders = [row["EPIC_ID"] for row in csv.DictReader(f)]
+else:
+    face_db = load_templates("./Dataset/face_embeddings.db")
+    voter_folders = os.listdir(known_folder)
 
-    for img_name in os.listdir(folder_path):
-        img_path = os.path.join(folder_path, img_name)
-        img = cv2.imread(img_path)
-        if img is None:
-            continue
-            
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img_pil = Image.fromarray(img_rgb)
+for voter_folder in voter_folders:
+    folder_path = os.path.join(known_folder, voter_folder)
 
-        face = mtcnn(img_pil)
-        if face is None:
-            continue
+    if not os.path.isdir(folder_path) or voter_folder in face_db:
+        continue
 
-        embedding = model(face.unsqueeze(0))
-        face_db[voter_folder] = embedding   # One embedding per voter folder
-        break  # stop after 1 embedding image per voter
+    template = template_from_folder(folder_path, mtcnn, model)
+    if len(template):
+        face_db[voter_folder] = template   # All embeddings per voter folder
 
 print("Face database prepared for", len(face_db), "voters")
 
@@ -51,25 +52,21 @@ def verify_face(voter_id, image_path):
         if voter_id not in face_db:
             return False
 
-        known_embedding = face_db[voter_id]
+        template = face_db[voter_id]
 
         test_img = cv2.imread(image_path)
         if test_img is None:
             return False
 
-        test_rgb = cv2.cvtColor(test_img, cv2.COLOR_BGR2RGB)
-        test_pil = Image.fromarray(test_rgb)
-
-        face = mtcnn(test_pil)
-        if face is None:
+        test_embedding = embed_face(mtcnn, model, cv2.cvtColor(test_img, cv2.COLOR_BGR2RGB))
+        if test_embedding is None:
             return False
 
-        test_embedding = model(face.unsqueeze(0))
-        sim = cosine_similarity(test_embedding, known_embedding)
+        sim = template.score(test_embedding, SCORING_POLICY)
 
-        print("Similarity:", sim.item())
+        print("Similarity:", sim)
 
-        return sim.item() > 0.7  # threshold
+        return sim > 0.7  # threshold
     except Exception as e:
         print("Error:", str(e))
         return False
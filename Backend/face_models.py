@@ -0,0 +1,70 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import torch
+from facenet_pytorch import MTCNN, InceptionResnetV1
+
+# ------------------------------
+# Shared face models
+# ------------------------------
+# Loaded once per process on first import. Under gunicorn, gunicorn.conf.py
+# imports this module in the master before forking, so every worker shares
+# the weights copy-on-write instead of loading ~100 MB each.
+
+mtcnn = MTCNN(image_size=160)
+model = InceptionResnetV1(pretrained='vggface2').eval()
+
+for p in model.parameters():
+    p.requires_grad_(False)
+
+
+class FaceBusy(Exception):
+    pass
+
+
+class InferenceGate:
+    """Caps concurrent face inference per process.
+
+    At most `slots` requests run the models and at most `max_waiting` queue
+    behind them; anything beyond that fails fast with FaceBusy. The remaining
+    server threads stay free for OTP / BLO / verification requests.
+    """
+
+    def __init__(self, slots=1, max_waiting=2, timeout=10.0):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(slots)
+        self._max_pending = slots + max_waiting
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self):
+        with self._lock:
+            if self._pending >= self._max_pending:
+                raise FaceBusy()
+            self._pending += 1
+        try:
+            if not self._slots.acquire(timeout=self.timeout):
+                raise FaceBusy()
+            try:
+                yield
+            finally:
+                self._slots.release()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+face_gate = InferenceGate(
+    slots=int(os.getenv("FACE_SLOTS", "1")),
+    max_waiting=int(os.getenv("FACE_MAX_WAITING", "2")),
+    timeout=float(os.getenv("FACE_WAIT_SECONDS", "10"))
+)
+
+
+def limit_torch_threads():
+    """Per worker: N workers x all-core torch pools would oversubscribe the CPU"""
+    n = os.getenv("FACE_TORCH_THREADS")
+    if n:
+        torch.set_num_threads(int(n))
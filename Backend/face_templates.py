@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+
+import cv2
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from metrics import FACE_SECONDS
+from tracing import span
+
+# ------------------------------
+# Voter face templates
+# ------------------------------
+# One template per voter: every enrolled embedding stacked into an (n, 512)
+# L2-normalized matrix plus its precomputed, normalized centroid. A live
+# embedding is scored against the whole template with a single mat-vec.
+#
+# Scoring policies:
+#   max       best single-image similarity (previous app.py behaviour)
+#   centroid  similarity to the mean face, robust to one odd photo
+#   topk      mean of the k best similarities
+
+SCORING_POLICIES = ("max", "centroid", "topk")
+
+
+def _as_matrix(embeddings):
+    if isinstance(embeddings, torch.Tensor):
+        m = embeddings.detach().float()
+    else:
+        m = torch.as_tensor(np.asarray(embeddings, dtype=np.float32))
+    return F.normalize(m.reshape(-1, m.shape[-1]), dim=1)
+
+
+class FaceTemplate:
+
+    def __init__(self, embeddings):
+        if len(embeddings) == 0:
+            self.embeddings = torch.empty(0, 512)
+            self.centroid = None
+        else:
+            self.embeddings = _as_matrix(embeddings)
+            self.centroid = F.normalize(self.embeddings.mean(dim=0), dim=0)
+
+    def __len__(self):
+        return self.embeddings.shape[0]
+
+    def score(self, live_embedding, policy="max", k=3):
+        if len(self) == 0:
+            return 0.0
+
+        live = _as_matrix(live_embedding)[0]
+
+        with FACE_SECONDS.time(stage="match"), span("face.match", policy=policy):
+            if policy == "centroid":
+                return float(self.centroid @ live)
+
+            sims = self.embeddings @ live
+            if policy == "max":
+                return float(sims.max())
+            if policy == "topk":
+                return float(sims.topk(min(k, len(sims))).values.mean())
+
+        raise ValueError(f"Unknown scoring policy: {policy}")
+
+
+class EmbeddingBank:
+    """Growable stack of embeddings, e.g. faces that have already voted"""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = torch.empty(0, dim)
+
+    def clear(self):
+        with self._lock:
+            self._matrix = torch.empty(0, self.dim)
+
+    def append(self, embedding):
+        row = _as_matrix(embedding)
+        with self._lock:
+            self._matrix = torch.cat([self._matrix, row])
+
+    def max_similarity(self, live_embedding):
+        # append() swaps in a new tensor, so a snapshot taken under the lock stays consistent
+        with self._lock:
+            matrix = self._matrix
+        if matrix.shape[0] == 0:
+            return 0.0
+        with FACE_SECONDS.time(stage="match"), span("face.vote_lock_match"):
+            return float((matrix @ _as_matrix(live_embedding)[0]).max())
+
+    def __len__(self):
+        return self._matrix.shape[0]
+
+
+class SharedEmbeddingBank(EmbeddingBank):
+    """EmbeddingBank kept in SQLite, so every worker process sees every face locked by the others"""
+
+    def __init__(self, db_path, dim=512):
+        super().__init__(dim)
+        self._seen = 0            # highest row id already in _matrix
+        self._generation = 0      # bumped by clear(), from any process
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                embedding BLOB NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+        self._conn.commit()
+        self._sync()
+
+    def _sync(self):
+        """Pull rows other processes added since the last call"""
+        with self._lock:
+            generation = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+            if generation != self._generation:
+                self._matrix = torch.empty(0, self.dim)
+                self._seen = 0
+                self._generation = generation
+
+            rows = self._conn.execute(
+                "SELECT id, embedding FROM embeddings WHERE id > ? ORDER BY id", (self._seen,)
+            ).fetchall()
+            if rows:
+                new = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+                self._matrix = torch.cat([self._matrix, torch.from_numpy(new)])
+                self._seen = rows[-1][0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+            self._conn.commit()
+        self._sync()
+
+    def append(self, embedding):
+        rows = _as_matrix(embedding).numpy()
+        with self._lock:
+            self._conn.executemany("INSERT INTO embeddings (embedding) VALUES (?)",
+                                   [(r.astype(np.float32).tobytes(),) for r in rows])
+            self._conn.commit()
+        self._sync()
+
+    def max_similarity(self, live_embedding):
+        self._sync()
+        return super().max_similarity(live_embedding)
+
+    def __len__(self):
+        self._sync()
+        return super().__len__()
+
+
+# ------------------------------
+# Building templates
+# ------------------------------
+def decode_frame(data, max_side=0):
+    """JPEG / WebP / PNG bytes -> BGR frame, or None if undecodable.
+
+    The bytes are viewed in place (no copy) and go straight to the decoder;
+    frames larger than max_side are shrunk, since MTCNN gains nothing from
+    full-resolution video.
+    """
+    if not data:
+        return None
+    buf = np.frombuffer(data, dtype=np.uint8)
+    with FACE_SECONDS.time(stage="decode"), span("face.decode", bytes=len(data)):
+        frame = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        if frame is None:
+            return None
+        h, w = frame.shape[:2]
+        if max_side and max(h, w) > max_side:
+            scale = max_side / max(h, w)
+            frame = cv2.resize(frame, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def embed_face(mtcnn, model, rgb):
+    """RGB image (PIL or HxWx3 uint8 array) -> (1, 512) embedding, or None"""
+    with FACE_SECONDS.time(stage="detect"), span("face.detect"):
+        face = mtcnn(rgb)
+    if face is None:
+        return None
+    with FACE_SECONDS.time(stage="embed"), span("face.embed"), torch.no_grad():
+        return model(face.unsqueeze(0))
+
+
+def template_from_folder(folder, mtcnn, model):
+    embeddings = []
+    for img_name in sorted(os.listdir(folder)):
+        img = cv2.imread(os.path.join(folder, img_name))
+        if img is None:
+            continue
+
+        emb = embed_face(mtcnn, model, cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        if emb is not None:
+            embeddings.append(emb[0])
+
+    return FaceTemplate(torch.stack(embeddings) if embeddings else [])
+
+
+def load_templates(db_path, epics=None, min_prob=0.0):
+    """EPIC -> FaceTemplate from an enroll_faces.py database"""
+    if not os.path.isfile(db_path):
+        return {}
+
+    conn = sqlite3.connect(db_path)
+    if epics is None:
+        rows = conn.execute(
+            "SELECT epic, embedding FROM embeddings WHERE prob >= ? ORDER BY epic, path",
+            (min_prob,)
+        ).fetchall()
+    else:
+        epics = list(epics)
+        marks = ",".join("?" * len(epics))
+        rows = conn.execute(
+            f"SELECT epic, embedding FROM embeddings WHERE prob >= ? AND epic IN ({marks}) ORDER BY epic, path",
+            (min_prob, *epics)
+        ).fetchall() if epics else []
+    conn.close()
+
+    grouped = {}
+    for epic, blob in rows:
+        grouped.setdefault(epic, []).append(np.frombuffer(blob, dtype=np.float32))
+
+    return {epic: FaceTemplate(np.stack(embs)) for epic, embs in grouped.items()}
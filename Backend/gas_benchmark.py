@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import statistics
+
+import solcx
+from web3 import Web3, EthereumTesterProvider
+
+# ------------------------------
+# castVote gas benchmark
+# ------------------------------
+# Compiles EC.sol/Voting.sol and ECV2.sol/VotingV2.sol, deploys both pairs
+# on an in-process eth-tester chain, casts N votes against each and reports
+# gas per castVote and how many votes fit in one block.
+#
+#   pip install -r requirements-dev.txt
+#   python gas_benchmark.py --votes 200 --json gas.json
+#
+# Without access to binaries.soliditylang.org, pass a local compiler:
+#   python gas_benchmark.py --solc /usr/local/bin/solc-0.8.27
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contracts")
+SOLC_VERSION = os.getenv("SOLC_VERSION", "0.8.27")
+
+BOOTH = "PB-1001"
+CANDIDATES = [(1, "Amit", "Party A"), (2, "Neha", "Party B"), (3, "Ravi", "Party C")]
+
+
+def compile_contracts(files, solc_binary=None):
+    if solc_binary is None and SOLC_VERSION not in map(str, solcx.get_installed_solc_versions()):
+        solcx.install_solc(SOLC_VERSION)
+
+    sources = {}
+    for name in files:
+        with open(os.path.join(CONTRACTS_DIR, name), encoding="utf-8") as f:
+            sources[name] = {"content": f.read()}
+
+    out = solcx.compile_standard({
+        "language": "Solidity",
+        "sources": sources,
+        "settings": {
+            "optimizer": {"enabled": True, "runs": 200},
+            "outputSelection": {"*": {"*": ["abi", "evm.bytecode.object"]}}
+        }
+    }, **({"solc_binary": solc_binary} if solc_binary else {"solc_version": SOLC_VERSION}))
+
+    compiled = {}
+    for contracts in out["contracts"].values():
+        for name, c in contracts.items():
+            compiled[name] = (c["abi"], c["evm"]["bytecode"]["object"])
+    return compiled
+
+
+def deploy(w3, compiled, name, *args):
+    abi, bytecode = compiled[name]
+    tx = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact()
+    address = w3.eth.wait_for_transaction_receipt(tx).contractAddress
+    return w3.eth.contract(address=address, abi=abi)
+
+
+def transact(w3, fn):
+    receipt = w3.eth.wait_for_transaction_receipt(fn.transact())
+    assert receipt.status == 1
+    return receipt
+
+
+def bench_v1(w3, compiled, n_votes):
+    ec = deploy(w3, compiled, "ElectionCommission")
+    for cid, name, party in CANDIDATES:
+        transact(w3, ec.functions.addCandidate(BOOTH, cid, name, party))
+    transact(w3, ec.functions.start_voting())
+
+    voting = deploy(w3, compiled, "Voting", ec.address)
+
+    gas = []
+    for i in range(n_votes):
+        epic_hash = w3.keccak(text=f"EPIC{i:07d}")
+        cid = CANDIDATES[i % len(CANDIDATES)][0]
+        gas.append(transact(w3, voting.functions.castVote(BOOTH, cid, epic_hash)).gasUsed)
+    return gas
+
+
+def bench_v2(w3, compiled, n_votes):
+    ec = deploy(w3, compiled, "ElectionCommissionV2")
+    for cid, name, party in CANDIDATES:
+        transact(w3, ec.functions.addCandidate(BOOTH, cid, name, party))
+    transact(w3, ec.functions.start_voting())
+    booth = ec.functions.boothNumber(BOOTH).call()
+
+    voting = deploy(w3, compiled, "VotingV2", ec.address)
+
+    gas = []
+    for i in range(n_votes):
+        epic_hash = w3.keccak(text=f"EPIC{i:07d}")
+        cid = CANDIDATES[i % len(CANDIDATES)][0]
+        gas.append(transact(w3, voting.functions.castVote(booth, cid, epic_hash)).gasUsed)
+    return gas
+
+
+def summarize(gas, block_gas_limit):
+    mean = statistics.mean(gas)
+    return {
+        "votes": len(gas),
+        "mean": round(mean),
+        "min": min(gas),
+        "max": max(gas),
+        "votes_per_block": int(block_gas_limit // mean)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gas per castVote: V1 vs V2 contracts")
+    parser.add_argument("--votes", type=int, default=100)
+    parser.add_argument("--block-gas-limit", type=int, default=30_000_000)
+    parser.add_argument("--json", help="write results to this file (input for capacity planning)")
+    parser.add_argument("--solc", help="path to a solc binary (default: install SOLC_VERSION with py-solc-x)")
+    args = parser.parse_args()
+
+    compiled = compile_contracts(["EC.sol", "Voting.sol", "ECV2.sol", "VotingV2.sol"], args.solc)
+
+    w3 = Web3(EthereumTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+
+    results = {
+        "v1": summarize(bench_v1(w3, compiled, args.votes), args.block_gas_limit),
+        "v2": summarize(bench_v2(w3, compiled, args.votes), args.block_gas_limit)
+    }
+    results["saving_pct"] = round(100 * (1 - results["v2"]["mean"] / results["v1"]["mean"]), 1)
+
+    print(f"{'':4} {'mean':>8} {'min':>8} {'max':>8} {'votes/block':>12}")
+    for key in ("v1", "v2"):
+        r = results[key]
+        print(f"{key:4} {r['mean']:>8} {r['min']:>8} {r['max']:>8} {r['votes_per_block']:>12}")
+    print(f"⛽ castVote gas saving: {results['saving_pct']}%")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"castVote_gas": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# ------------------------------
+# Production serving (pre-fork)
+# ------------------------------
+#   cd Backend && gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The master imports face_models.py (torch + facenet weights) once, then
+# forks; workers share those pages copy-on-write. app.py itself is imported
+# in each worker after the fork, so SQLite connections, web3 sessions and the
+# background sync / sweeper threads are per process and never cross a fork.
+#
+# Graceful reload: `kill -HUP <master pid>` starts fresh workers (new code,
+# .env, voter roll) and lets old ones finish in-flight requests. The face
+# weights are kept; restart the master to pick up new ones. Jobs that run in
+# one worker only (chain sync, broadcast resume, ballot journals) are taken
+# over by a new worker once the old one exits (singletons.py).
+#
+# Env:
+#   WEB_BIND            default 0.0.0.0:5000
+#   WEB_WORKERS         default min(4, cpu count)
+#   WEB_THREADS         threads per worker, default 8
+#   WEB_TIMEOUT         default 120 (chain receipts can be slow)
+#   FACE_SLOTS          concurrent face inferences per worker (face_models.py)
+#   FACE_TORCH_THREADS  torch intra-op threads per worker, default cpu / workers
+#   METRICS_DIR         where workers pool their /metrics values, default a
+#                       fresh temp dir per master (kept across HUP reloads)
+#
+# Sessions, OTPs, uploaded kiosk frames and the face vote lock are shared
+# through STATE_DIR, so a kiosk's requests may land on any worker (each one
+# loads the voter's face template when it first needs it). The local webcam
+# (/start-camera) belongs to a single process: run with WEB_WORKERS=1 for a
+# USB-camera kiosk.
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("WEB_WORKERS", min(4, multiprocessing.cpu_count())))
+threads = int(os.getenv("WEB_THREADS", "8"))
+worker_class = "gthread"
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = 60
+keepalive = 5
+chdir = BACKEND_DIR
+preload_app = False     # only the face models are preloaded, see on_starting
+
+# Cross-worker state must live in shared files, not process memory
+os.environ.setdefault("OTP_BACKEND", "sqlite")
+os.environ.setdefault("SESSION_BACKEND", "sqlite")
+os.environ.setdefault("FRAME_BACKEND", "sqlite")
+os.environ.setdefault("FACE_TORCH_THREADS", str(max(1, multiprocessing.cpu_count() // workers)))
+
+_metrics_tmp = None   # METRICS_DIR made by on_starting, removed on exit
+
+
+def on_starting(server):
+    # Every worker writes its metrics here, so any one of them can answer a scrape
+    global _metrics_tmp
+    if not os.getenv("METRICS_DIR"):
+        _metrics_tmp = os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="evote-metrics-")
+
+    import face_models   # noqa: F401  (weights now live in the master)
+
+    # Move everything loaded so far out of the GC's generations so collections
+    # in the workers don't touch (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+    server.log.info("Face models loaded in master (pid %s)", os.getpid())
+
+
+def post_fork(server, worker):
+    from face_models import limit_torch_threads
+    limit_torch_threads()
+
+
+def child_exit(server, worker):
+    # Keep the finished worker's counters in the totals, drop its gauges
+    if os.getenv("METRICS_DIR"):
+        from metrics import mark_process_dead
+        mark_process_dead(os.environ["METRICS_DIR"], worker.pid)
+
+
+def on_exit(server):
+    if _metrics_tmp:
+        shutil.rmtree(_metrics_tmp, ignore_errors=True)
@@ -0,0 +1,236 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------------------
+# Kiosk sessions
+# ------------------------------
+# The voter in progress at each kiosk (EPIC, booth, trace id), keyed by the
+# X-Kiosk-Id header:
+#   MemorySessionBackend  - dict, single process (dev server)
+#   SQLiteSessionBackend  - shared file, so /verify-epic and /cast-vote may
+#                           land on different pre-fork workers
+# Camera frames uploaded by thin kiosks live in a KioskFrames store below,
+# with the same two kinds of backend.
+
+SESSION_FIELDS = ("epic", "polling_id", "trace_id")
+
+
+class MemorySessionBackend:
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, kiosk_id):
+        with self._lock:
+            s = self._sessions.get(kiosk_id)
+            return dict(s) if s else None
+
+    def update(self, kiosk_id, fields):
+        with self._lock:
+            s = self._sessions.setdefault(kiosk_id, dict.fromkeys(SESSION_FIELDS))
+            s.update(fields)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+class SQLiteSessionBackend:
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS kiosk_sessions (
+                kiosk_id TEXT PRIMARY KEY,
+                epic TEXT,
+                polling_id TEXT,
+                trace_id TEXT,
+                updated REAL
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, kiosk_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT epic, polling_id, trace_id FROM kiosk_sessions WHERE kiosk_id = ?",
+                (kiosk_id,)
+            ).fetchone()
+        return dict(zip(SESSION_FIELDS, row)) if row else None
+
+    def update(self, kiosk_id, fields):
+        cols = [f for f in SESSION_FIELDS if f in fields]
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO kiosk_sessions (kiosk_id, {', '.join(cols)}, updated) "
+                f"VALUES (?, {', '.join('?' * len(cols))}, ?) "
+                f"ON CONFLICT(kiosk_id) DO UPDATE SET "
+                f"{', '.join(f'{c} = excluded.{c}' for c in cols)}, updated = excluded.updated",
+                (kiosk_id, *(fields[c] for c in cols), time.time())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM kiosk_sessions")
+            self._conn.commit()
+
+
+class KioskSessions:
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, kiosk_id):
+        return self.backend.get(kiosk_id) or dict.fromkeys(SESSION_FIELDS)
+
+    def update(self, kiosk_id, **fields):
+        unknown = set(fields) - set(SESSION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown session fields: {', '.join(sorted(unknown))}")
+        self.backend.update(kiosk_id, fields)
+
+    def clear(self):
+        self.backend.clear()
+
+
+class MemoryFrameBackend:
+    """Decoded frames in this process, least recently used out first"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._frames = OrderedDict()   # kiosk_id -> (frame, stored at)
+        self._lock = threading.Lock()
+
+    def put(self, kiosk_id, frame, data, now):
+        with self._lock:
+            self._frames[kiosk_id] = (frame, now)
+            self._frames.move_to_end(kiosk_id)
+            while len(self._frames) > self.max_entries:
+                self._frames.popitem(last=False)
+
+    def get(self, kiosk_id):
+        with self._lock:
+            entry = self._frames.get(kiosk_id)
+            if entry is not None:
+                self._frames.move_to_end(kiosk_id)
+            return entry
+
+    def delete(self, kiosk_id):
+        with self._lock:
+            self._frames.pop(kiosk_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+    def __len__(self):
+        return len(self._frames)
+
+
+class SQLiteFrameBackend:
+    """Uploaded image bytes in a shared file, decoded by whichever worker reads them"""
+
+    def __init__(self, db_path, max_entries, decode):
+        self.max_entries = max_entries
+        self.decode = decode
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS kiosk_frames (
+                kiosk_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                stored REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS kiosk_frames_stored ON kiosk_frames (stored)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def put(self, kiosk_id, frame, data, now):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO kiosk_frames VALUES (?, ?, ?)", (kiosk_id, data, now))
+            self._conn.execute(
+                "DELETE FROM kiosk_frames WHERE kiosk_id IN "
+                "(SELECT kiosk_id FROM kiosk_frames ORDER BY stored DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def get(self, kiosk_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, stored FROM kiosk_frames WHERE kiosk_id = ?", (kiosk_id,)
+            ).fetchone()
+        return (self.decode(row[0]), row[1]) if row else None
+
+    def delete(self, kiosk_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM kiosk_frames WHERE kiosk_id = ?", (kiosk_id,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM kiosk_frames")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kiosk_frames").fetchone()[0]
+
+
+class KioskFrames:
+    """Latest uploaded frame per kiosk, at most `max_entries` of them.
+
+    The kiosk id comes from a client header, so the store is bounded both in
+    entries and in age (a frame older than `ttl_seconds` is never used).
+    """
+
+    def __init__(self, backend, ttl_seconds=300):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    def put(self, kiosk_id, frame, data):
+        """`frame` is the decoded image, `data` the bytes it was decoded from"""
+        self.backend.put(kiosk_id, frame, data, time.time())
+
+    def get(self, kiosk_id):
+        entry = self.backend.get(kiosk_id)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > self.ttl_seconds:
+            self.backend.delete(kiosk_id)
+            return None
+        return entry[0]
+
+    def clear(self):
+        self.backend.clear()
+
+    def __len__(self):
+        return len(self.backend)
+
+
+def make_frame_store(kind="memory", db_path=None, max_entries=256, ttl_seconds=300, decode=None):
+    if kind == "sqlite":
+        return KioskFrames(SQLiteFrameBackend(db_path, max_entries, decode), ttl_seconds)
+    if kind == "memory":
+        return KioskFrames(MemoryFrameBackend(max_entries), ttl_seconds)
+    raise ValueError(f"Unknown frame backend: {kind}")
+
+
+def make_session_store(kind="memory", db_path=None):
+    if kind == "sqlite":
+        return KioskSessions(SQLiteSessionBackend(db_path))
+    if kind == "memory":
+        return KioskSessions(MemorySessionBackend())
+    raise ValueError(f"Unknown session backend: {kind}")
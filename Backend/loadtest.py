@@ -0,0 +1,261 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# ------------------------------
+# End-to-end load test
+# ------------------------------
+# Boots app.py in-process against a local eth-tester chain (CHAIN_BACKEND=
+# tester) with the fake SMS sender, serves it on a random localhost port and
+# drives N concurrent simulated voters through the full kiosk flow:
+#
+#   /verify-epic -> /verify-face -> /get-candidates -> /cast-vote -> /verify-hash
+#
+# Every voter is its own kiosk (X-Kiosk-Id). Instead of a webcam, each kiosk
+# uploads a JPEG from the voter's Dataset/P1 folder as the /verify-face body,
+# like a browser kiosk (index.html?camera=browser) does. Voters are
+# cloned from the enrolled ones (LT00000001, ...) so one run can cast many
+# more votes than there are faces; the face vote lock is turned off for that.
+#
+#   pip install -r requirements-dev.txt
+#   python loadtest.py --voters 200 --concurrency 16 --json load.json
+
+FLOW = ["verify_epic", "verify_face", "get_candidates", "cast_vote", "verify_hash"]
+
+
+def configure_environment(state_dir):
+    """Must run before app.py is imported: it reads all of this at import time"""
+    os.environ["CHAIN_BACKEND"] = "tester"
+    os.environ["SMS_BACKEND"] = "fake"
+    os.environ["FACE_VOTE_LOCK"] = "0"
+    os.environ["STATE_DIR"] = state_dir
+    os.environ.setdefault("TRACE_FILE", os.path.join(state_dir, "traces", "trace.jsonl"))
+    # Queue face checks instead of shedding them, so latency shows the backlog
+    os.environ.setdefault("FACE_MAX_WAITING", "1000")
+    os.environ.setdefault("FACE_WAIT_SECONDS", "300")
+
+
+# ------------------------------
+# Synthetic camera
+# ------------------------------
+class FrameSource:
+    """Replays Dataset/P1/<epic>/*.jpg as JPEG camera frames, downscaled like a browser kiosk"""
+
+    def __init__(self, dataset_base, max_side=480):
+        self.dataset_base = dataset_base
+        self.max_side = max_side
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def frames(self, epic):
+        with self._lock:
+            frames = self._frames.get(epic)
+            if frames is None:
+                folder = os.path.join(self.dataset_base, epic)
+                frames = [
+                    self._encode(img) for img in (cv2.imread(os.path.join(folder, name)) for name in sorted(os.listdir(folder)))
+                    if img is not None
+                ]
+                self._frames[epic] = frames
+            return frames
+
+    def _encode(self, img):
+        h, w = img.shape[:2]
+        scale = min(1.0, self.max_side / max(h, w))
+        if scale < 1.0:
+            img = cv2.resize(img, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+        return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])[1].tobytes()
+
+    def next_frame(self, epic):
+        frames = self.frames(epic)
+        return random.choice(frames) if frames else None
+
+
+def clone_voters(backend, n):
+    """n synthetic voters, each wearing the face of an enrolled voter"""
+    enrolled = [
+        v for booth in backend.voter_store.booths() for v in backend.voter_store.iter_booth(booth)
+        if os.path.isdir(os.path.join(backend.DATASET_BASE, v["EPIC_ID"]))
+    ]
+    if not enrolled:
+        raise SystemExit(f"No voter in the roll has a face folder under {backend.DATASET_BASE}")
+
+    templates = {}
+    clones = []
+    for i in range(n):
+        src = enrolled[i % len(enrolled)]
+        epic = f"LT{i + 1:08d}"
+
+        if src["EPIC_ID"] not in templates:
+            templates[src["EPIC_ID"]] = backend.load_face_template(src["EPIC_ID"])
+
+        backend.voter_store.add({**src, "EPIC_ID": epic})   # store only; the CSV is untouched
+        backend.face_cache[epic] = templates[src["EPIC_ID"]]
+        clones.append((epic, src["EPIC_ID"]))
+
+    return clones
+
+
+# ------------------------------
+# Simulated kiosk
+# ------------------------------
+class Recorder:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies[endpoint].append(seconds * 1000)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+class Kiosk:
+
+    def __init__(self, port, kiosk_id, recorder):
+        self.port = port
+        self.kiosk_id = kiosk_id
+        self.recorder = recorder
+
+    def call(self, endpoint, method, path, body=None):
+        headers = {"X-Kiosk-Id": self.kiosk_id}
+        payload = None
+        if isinstance(body, bytes):
+            payload = body
+            headers["Content-Type"] = "image/jpeg"
+        elif body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+            status = resp.status
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - start
+
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = {}
+
+        ok = status < 400 and data.get("status") in ("found", "success", "ok", "queued")
+        self.recorder.record(endpoint, elapsed, ok)
+        return ok, data
+
+
+def run_voter(frames, port, recorder, epic, face_epic):
+    k = Kiosk(port, f"load-{epic}", recorder)
+
+    ok, _ = k.call("verify_epic", "POST", "/verify-epic", {"epic": epic})
+    if not ok:
+        return False
+
+    # The synthetic camera: this kiosk "sees" the voter's face
+    ok, _ = k.call("verify_face", "POST", "/verify-face", frames.next_frame(face_epic))
+    if not ok:
+        return False
+
+    ok, data = k.call("get_candidates", "GET", "/get-candidates")
+    if not ok or not data.get("candidates"):
+        return False
+    choice = random.choice(data["candidates"])["Candidate_ID"]
+
+    ok, data = k.call("cast_vote", "POST", "/cast-vote", {"candidate_id": choice})
+    if not ok:
+        return False
+
+    k.call("verify_hash", "POST", "/verify-hash", {"hashKey": data["receiptHash"]})
+    return True
+
+
+# ------------------------------
+# Report
+# ------------------------------
+def report(recorder, votes, wall_seconds):
+    from tracing import percentile
+
+    endpoints = {}
+    for name in FLOW:
+        values = sorted(recorder.latencies.get(name, []))
+        if not values:
+            continue
+        endpoints[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "p50": round(percentile(values, 50), 1),
+            "p95": round(percentile(values, 95), 1),
+            "p99": round(percentile(values, 99), 1),
+            "max": round(values[-1], 1)
+        }
+
+    return {
+        "votes": votes,
+        "wall_seconds": round(wall_seconds, 2),
+        "votes_per_second": round(votes / wall_seconds, 2) if wall_seconds else 0.0,
+        "endpoints": endpoints
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end voter load test on a local chain")
+    parser.add_argument("--voters", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--state-dir", help="receipts / indexes / traces for this run (default: temp dir)")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    state_dir = args.state_dir or tempfile.mkdtemp(prefix="evote-load-")
+    configure_environment(state_dir)
+
+    import app as backend
+    from werkzeug.serving import make_server
+
+    clones = clone_voters(backend, args.voters)
+    frames = FrameSource(backend.DATASET_BASE)
+
+    server = make_server("127.0.0.1", 0, backend.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🚦 {args.voters} voters, {args.concurrency} kiosks, state in {state_dir}")
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda c: run_voter(frames, server.server_port, recorder, *c),
+            clones
+        ))
+    wall = time.perf_counter() - start
+    server.shutdown()
+
+    result = report(recorder, sum(results), wall)
+
+    print(f"{'endpoint':16} {'count':>6} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, r in result["endpoints"].items():
+        print(f"{name:16} {r['count']:>6} {r['errors']:>7} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f} {r['max']:>9.1f}")
+    print(f"🗳️ {result['votes']}/{args.voters} votes in {result['wall_seconds']}s "
+          f"= {result['votes_per_second']} votes/s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"load_test": result}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
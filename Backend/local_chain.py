@@ -0,0 +1,72 @@
+import csv
+import threading
+
+from eth_account import Account
+from web3 import Web3, EthereumTesterProvider
+
+from gas_benchmark import compile_contracts, deploy, transact
+from metrics import RPC_SECONDS
+from tracing import span
+
+# ------------------------------
+# In-process chain for load runs
+# ------------------------------
+# CHAIN_BACKEND=tester makes app.py boot against an eth-tester chain instead
+# of ALCHEMY_URL: EC.sol and Voting.sol are compiled and deployed, three
+# candidates are added for every booth in the voter roll, voting is started
+# and a freshly funded account plays the role of VOTER_PRIVATE_KEY.
+
+CANDIDATE_NAMES = [("Amit", "Party A"), ("Neha", "Party B"), ("Ravi", "Party C")]
+
+
+class LockedTesterProvider(EthereumTesterProvider):
+    """eth-tester is not thread-safe; Flask threads and sync loops share one lock"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def make_request(self, method, params):
+        with RPC_SECONDS.time(method=method), span(f"rpc.{method}"), self._lock:
+            return super().make_request(method, params)
+
+
+class LocalChain:
+
+    def __init__(self, w3, ec_address, voting_address, voter_private_key, deploy_block):
+        self.w3 = w3
+        self.ec_address = ec_address
+        self.voting_address = voting_address
+        self.voter_private_key = voter_private_key
+        self.deploy_block = deploy_block
+
+
+def booths_from_roll(voters_csv):
+    with open(voters_csv, newline='', encoding='utf-8') as f:
+        return sorted({row["Polling_Booth_ID"] for row in csv.DictReader(f) if row.get("Polling_Booth_ID")})
+
+
+def start_local_chain(voters_csv, fund_ether=100):
+    compiled = compile_contracts(["EC.sol", "Voting.sol"])
+
+    w3 = Web3(LockedTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+    deploy_block = w3.eth.block_number
+
+    ec = deploy(w3, compiled, "ElectionCommission")
+    for booth in booths_from_roll(voters_csv):
+        for cid, (name, party) in enumerate(CANDIDATE_NAMES, start=1):
+            transact(w3, ec.functions.addCandidate(booth, cid, name, party))
+    transact(w3, ec.functions.start_voting())
+
+    voting = deploy(w3, compiled, "Voting", ec.address)
+
+    # The backend signs votes itself, so it needs a key rather than an unlocked account
+    voter = Account.create()
+    w3.eth.wait_for_transaction_receipt(w3.eth.send_transaction({
+        "to": voter.address,
+        "value": w3.to_wei(fund_ether, "ether")
+    }))
+
+    print(f"⛓️ Local chain ready: EC {ec.address}, Voting {voting.address}")
+    return LocalChain(w3, ec.address, voting.address, voter.key.hex(), deploy_block)
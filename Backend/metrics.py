@@ -0,0 +1,305 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# ------------------------------
+# In-process metrics (Prometheus text format)
+# ------------------------------
+# Tiny dependency-free counters and histograms, rendered by GET /metrics so
+# an offline booth network can still be scraped (or just curl'd).
+#
+# Under gunicorn every worker has its own values, and a scrape lands on one
+# of them. With METRICS_DIR set (gunicorn.conf.py makes one per master), each
+# process writes a snapshot to <dir>/<pid>.json every few seconds and on each
+# scrape, and /metrics adds up every snapshot in the directory:
+#   counters, histograms  summed; a finished worker's totals are folded into
+#                         dead.json (mark_process_dead), so they never go back
+#   gauges                summed over live workers only
+# Other workers' numbers may be up to METRICS_FLUSH_SECONDS old.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        return self._values.get(key, 0)
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, v in sorted((self.values() if values is None else values).items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {v}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def values(self):
+        with self._lock:
+            return {key: list(s) for key, s in self._series.items()}
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, s in sorted((self.values() if values is None else values).items()):
+            for bound, n in zip(self.buckets, s):
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, ('le', bound))} {n}")
+            lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, ('le', '+Inf'))} {s[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {s[-2]}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {s[-1]}")
+        return lines
+
+
+class Gauge:
+    """Current value; set() it, or set_function() to read it at scrape time"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn, **labels):
+        self.set(fn, **labels)
+
+    def values(self):
+        with self._lock:
+            items = list(self._values.items())
+        return {key: v() if callable(v) else v for key, v in items}
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for key, v in sorted((self.values() if values is None else values).items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {v}")
+        return lines
+
+
+def _add(total, value):
+    """Sum of two samples: numbers, or histogram rows added bucket by bucket"""
+    if total is None:
+        return value
+    if isinstance(value, list):
+        return [a + b for a, b in zip(total, value)]
+    return total + value
+
+
+def _merge(into, snapshot, gauges=True):
+    for name, metric in snapshot.items():
+        if metric["type"] == "gauge" and not gauges:
+            continue
+        series = into.setdefault(name, {})
+        for key, value in metric["values"]:
+            key = tuple(key)
+            series[key] = _add(series.get(key), value)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _dir_lock(directory):
+    """Exclusive lock over a metrics directory (compaction vs. scrape)"""
+    try:
+        import fcntl
+    except ImportError:   # no pre-fork server on Windows: single process
+        return nullcontext()
+
+    @contextmanager
+    def held():
+        with open(os.path.join(directory, ".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+    return held()
+
+
+def mark_process_dead(directory, pid):
+    """Fold a finished worker's counters and histograms into dead.json; drop its gauges"""
+    path = os.path.join(directory, f"{pid}.json")
+    with _dir_lock(directory):
+        snapshot = _read_json(path)
+        if not snapshot:
+            return
+        dead = _read_json(os.path.join(directory, "dead.json"))
+        merged = {}
+        _merge(merged, dead)
+        _merge(merged, snapshot, gauges=False)
+        types = {name: m["type"] for d in (dead, snapshot) for name, m in d.items()}
+        _write_json(os.path.join(directory, "dead.json"), {
+            name: {"type": types[name], "values": [[list(k), v] for k, v in series.items()]}
+            for name, series in merged.items()
+        })
+        os.remove(path)
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+        self.directory = None
+        self._flusher = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    # ---------------- Multi-process ----------------
+    def enable_multiprocess(self, directory, interval=5):
+        """Share this process's values through `directory` (see the top of this file)"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.write_snapshot()
+        atexit.register(self.write_snapshot)
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot()
+                except Exception as e:
+                    print("❌ Metrics snapshot error:", e)
+
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=loop, daemon=True)
+            self._flusher.start()
+
+    def snapshot(self):
+        return {
+            m.name: {"type": type(m).__name__.lower(), "values": [[list(k), v] for k, v in m.values().items()]}
+            for m in self._metrics
+        }
+
+    def write_snapshot(self):
+        _write_json(os.path.join(self.directory, f"{os.getpid()}.json"), self.snapshot())
+
+    def _collect(self):
+        """name -> {labels: value} summed over every snapshot in the directory"""
+        self.write_snapshot()
+        merged = {}
+        with _dir_lock(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    _merge(merged, _read_json(os.path.join(self.directory, name)))
+        return merged
+
+    def render(self):
+        merged = self._collect() if self.directory else None
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render(None if merged is None else merged.get(m.name, {})))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ------------------------------
+# Backend instruments
+# ------------------------------
+FACE_SECONDS = REGISTRY.register(Histogram(
+    "evote_face_seconds", "Face pipeline stage latency", ["stage"]))          # detect | embed | match
+RPC_SECONDS = REGISTRY.register(Histogram(
+    "evote_rpc_seconds", "JSON-RPC call latency by method", ["method"]))
+STORAGE_SECONDS = REGISTRY.register(Histogram(
+    "evote_storage_seconds", "CSV / SQLite read latency", ["op"]))
+SMS_SECONDS = REGISTRY.register(Histogram(
+    "evote_sms_send_seconds", "SMS send latency", ["outcome"]))
+HTTP_SECONDS = REGISTRY.register(Histogram(
+    "evote_http_seconds", "HTTP request latency by endpoint", ["endpoint"]))
+
+VERIFICATIONS = REGISTRY.register(Counter(
+    "evote_verification_total", "Verification outcomes", ["endpoint", "status"]))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "evote_cache_requests_total", "Cache lookups", ["cache", "result"]))
+RPC_NODE_ERRORS = REGISTRY.register(Counter(
+    "evote_rpc_node_errors_total", "JSON-RPC transport failures by node index", ["node", "reason"]))
+VOTED_FILTER_CHECKS = REGISTRY.register(Counter(
+    "evote_voted_filter_total", "Already-voted filter lookups", ["result"]))  # negative | voted | false_positive
+
+BALLOT_COMMIT_SIZE = REGISTRY.register(Histogram(
+    "evote_ballot_commit_size", "Ballots per journal fsync", buckets=(1, 2, 4, 8, 16, 32, 64, 128)))
+BALLOTS_REPLAYED = REGISTRY.register(Counter(
+    "evote_ballots_replayed_total", "Journaled ballots settled on chain", ["outcome"]))
+BALLOT_BACKLOG = REGISTRY.register(Gauge(
+    "evote_ballot_backlog", "Journaled ballots not yet on chain", ["journal"]))
+BALLOT_LAG_SECONDS = REGISTRY.register(Gauge(
+    "evote_ballot_lag_seconds", "Age of the oldest journaled ballot not yet on chain", ["journal"]))
+
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,29 @@
+import asyncio
+
+# ------------------------------
+# Signer nonces for async_app.py
+# ------------------------------
+# The async server fetches the pending nonce in the same concurrent round as
+# its other reads, so two votes can fetch the same value. The floor makes
+# them take different ones without holding a lock across any RPC call.
+
+
+class NonceFloor:
+    """Nonces for the one signer without holding a lock across RPC calls.
+
+    Each vote fetches the pending nonce concurrently with its other reads;
+    at send time it takes max(fetched, last sent + 1) under a short lock, so
+    concurrent votes never reuse a nonce. A failed send forgets the floor.
+    """
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self._next = None
+
+    def take(self, fetched):
+        nonce = fetched if self._next is None else max(fetched, self._next)
+        self._next = nonce + 1
+        return nonce
+
+    def forget(self):
+        self._next = None
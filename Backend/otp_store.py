@@ -0,0 +1,245 @@
+import heapq
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+# ------------------------------
+# OTP store
+# ------------------------------
+# One OTPStore fronts a pluggable backend:
+#   MemoryOTPBackend  - dict + expiry min-heap, single process
+#   SQLiteOTPBackend  - shared file, survives restarts, safe across workers
+# Both enforce a hard cap on live OTPs and a per-number token bucket, and a
+# background sweeper drops expired entries so abandoned requests never pile up.
+
+
+def _check(rec, otp_input, now):
+    """(result, consume) for a stored (otp, expires) record and a submitted OTP"""
+    if not rec:
+        return "missing", False
+    otp, expires = rec
+    if expires < now:
+        return "expired", True
+    if not secrets.compare_digest(otp, otp_input):
+        return "invalid", False
+    return "ok", True
+
+
+class MemoryOTPBackend:
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._otps = {}       # mobile -> (otp, expires)
+        self._heap = []       # (expires, mobile), may hold stale entries
+        self._buckets = {}    # mobile -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def put(self, mobile, otp, expires):
+        with self._lock:
+            if mobile not in self._otps:
+                while len(self._otps) >= self.max_entries and self._heap:
+                    self._evict_one()
+            self._otps[mobile] = (otp, expires)
+            heapq.heappush(self._heap, (expires, mobile))
+
+    def _evict_one(self):
+        exp, mobile = heapq.heappop(self._heap)
+        rec = self._otps.get(mobile)
+        if rec is not None and rec[1] == exp:
+            del self._otps[mobile]
+
+    def get(self, mobile):
+        with self._lock:
+            return self._otps.get(mobile)
+
+    def delete(self, mobile):
+        with self._lock:
+            self._otps.pop(mobile, None)
+
+    def consume(self, mobile, otp_input, now):
+        with self._lock:
+            result, consume = _check(self._otps.get(mobile), otp_input, now)
+            if consume:
+                del self._otps[mobile]
+        return result
+
+    def sweep(self, now):
+        removed = 0
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                exp, mobile = heapq.heappop(self._heap)
+                rec = self._otps.get(mobile)
+                if rec is not None and rec[1] == exp:
+                    del self._otps[mobile]
+                    removed += 1
+
+            # idle buckets are full again, no need to keep them
+            self._buckets = {m: b for m, b in self._buckets.items() if b[1] > now - 3600}
+        return removed
+
+    def take_token(self, mobile, capacity, refill_seconds, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(mobile, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) / refill_seconds)
+            if tokens < 1:
+                self._buckets[mobile] = (tokens, now)
+                return False
+            self._buckets[mobile] = (tokens - 1, now)
+            return True
+
+    def __len__(self):
+        return len(self._otps)
+
+
+class SQLiteOTPBackend:
+
+    def __init__(self, db_path, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS otps (
+                mobile TEXT PRIMARY KEY,
+                otp TEXT NOT NULL,
+                expires REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS otps_expires ON otps (expires)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS otp_buckets (
+                mobile TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+
+    def _tx(self, fn):
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write
+        # sequences stay atomic across worker processes
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put(self, mobile, otp, expires):
+        def fn(conn):
+            exists = conn.execute("SELECT 1 FROM otps WHERE mobile = ?", (mobile,)).fetchone()
+            if not exists:
+                count = conn.execute("SELECT COUNT(*) FROM otps").fetchone()[0]
+                if count >= self.max_entries:
+                    conn.execute(
+                        "DELETE FROM otps WHERE mobile IN "
+                        "(SELECT mobile FROM otps ORDER BY expires LIMIT ?)",
+                        (count - self.max_entries + 1,)
+                    )
+            conn.execute("INSERT OR REPLACE INTO otps VALUES (?, ?, ?)", (mobile, otp, expires))
+        self._tx(fn)
+
+    def get(self, mobile):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT otp, expires FROM otps WHERE mobile = ?", (mobile,)
+            ).fetchone()
+
+    def delete(self, mobile):
+        with self._lock:
+            self._conn.execute("DELETE FROM otps WHERE mobile = ?", (mobile,))
+
+    def consume(self, mobile, otp_input, now):
+        # Check and delete in one write transaction: two workers can never both accept an OTP
+        def fn(conn):
+            rec = conn.execute("SELECT otp, expires FROM otps WHERE mobile = ?", (mobile,)).fetchone()
+            result, consume = _check(rec, otp_input, now)
+            if consume:
+                conn.execute("DELETE FROM otps WHERE mobile = ?", (mobile,))
+            return result
+        return self._tx(fn)
+
+    def sweep(self, now):
+        def fn(conn):
+            removed = conn.execute("DELETE FROM otps WHERE expires <= ?", (now,)).rowcount
+            conn.execute("DELETE FROM otp_buckets WHERE updated <= ?", (now - 3600,))
+            return removed
+        return self._tx(fn)
+
+    def take_token(self, mobile, capacity, refill_seconds, now):
+        def fn(conn):
+            row = conn.execute(
+                "SELECT tokens, updated FROM otp_buckets WHERE mobile = ?", (mobile,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) / refill_seconds)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO otp_buckets VALUES (?, ?, ?)", (mobile, tokens, now))
+            return allowed
+        return self._tx(fn)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM otps").fetchone()[0]
+
+
+class OTPStore:
+
+    def __init__(self, backend, ttl_seconds=180, rate_capacity=2, rate_refill_seconds=30):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.rate_capacity = rate_capacity
+        self.rate_refill_seconds = rate_refill_seconds
+        self._sweeper = None
+
+    def allow_send(self, mobile):
+        """Token bucket per number: burst of rate_capacity, then one per refill period"""
+        return self.backend.take_token(mobile, self.rate_capacity, self.rate_refill_seconds, time.time())
+
+    def issue(self, mobile):
+        otp = str(secrets.randbelow(900000) + 100000)
+        self.backend.put(mobile, otp, time.time() + self.ttl_seconds)
+        return otp
+
+    def discard(self, mobile):
+        self.backend.delete(mobile)
+
+    def verify(self, mobile, otp_input):
+        """Returns 'missing', 'expired', 'invalid' or 'ok' (the OTP is consumed on 'ok')"""
+        return self.backend.consume(mobile, str(otp_input), time.time())
+
+    def start_sweeper(self, interval=30):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    removed = self.backend.sweep(time.time())
+                    if removed:
+                        print(f"🧹 Swept {removed} expired OTPs")
+                except Exception as e:
+                    print("❌ OTP sweeper error:", e)
+
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=loop, daemon=True)
+            self._sweeper.start()
+
+    def __len__(self):
+        return len(self.backend)
+
+
+def make_otp_store(kind="memory", db_path=None, max_entries=100000, **kwargs):
+    if kind == "sqlite":
+        backend = SQLiteOTPBackend(db_path, max_entries)
+    elif kind == "memory":
+        backend = MemoryOTPBackend(max_entries)
+    else:
+        raise ValueError(f"Unknown OTP backend: {kind}")
+    return OTPStore(backend, **kwargs)
@@ -0,0 +1,342 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+from eth_hash.auto import keccak
+
+from receipt_store import normalize_hash
+
+# ------------------------------
+# Per-booth Merkle trees over VoteCast receipts
+# ------------------------------
+# One append-only tree per booth. Leaves are added in chain order (block,
+# log index) from the local vote index, up to the last block the index has
+# fully synced, so every backend process builds the same tree and the same
+# roots. Roots are published periodically to merkle_roots.db and served
+# next to O(log n) inclusion proofs, which anyone can check offline with
+# `python receipt_merkle.py verify proof.json` against a published root.
+#
+#   leaf = keccak(0x00 || receiptHash || uint256 candidateId)
+#   node = keccak(0x01 || left || right)
+#
+# The tree keeps only complete subtrees, 32 bytes per node in one bytearray
+# per level (~64 bytes per vote). For a size that is not a power of two the
+# root bags the "peaks" right to left, which gives the same root as the
+# RFC 6962 tree hash. Append, root and proof are all O(log n).
+#
+# A VotingReset starts a new epoch: the trees are rebuilt from the votes
+# after it, and published roots are kept per epoch (the block of the reset,
+# -1 before any reset).
+
+EMPTY_ROOT = keccak(b"")
+
+
+def leaf_hash(receipt_hash, candidate_id):
+    return keccak(b"\x00" + bytes.fromhex(normalize_hash(receipt_hash)) + int(candidate_id).to_bytes(32, "big"))
+
+
+def node_hash(left, right):
+    return keccak(b"\x01" + left + right)
+
+
+def verify_proof(leaf, path, root):
+    """path: [["L" | "R", sibling hex], ...] from the leaf up"""
+    h = leaf
+    for side, sibling in path:
+        sibling = bytes.fromhex(normalize_hash(sibling))
+        h = node_hash(sibling, h) if side == "L" else node_hash(h, sibling)
+    return h == bytes.fromhex(normalize_hash(root))
+
+
+class MerkleTree:
+
+    def __init__(self):
+        self.size = 0
+        self.levels = []   # level -> bytearray of 32-byte nodes
+
+    def _node(self, level, index):
+        return bytes(self.levels[level][index * 32:(index + 1) * 32])
+
+    def append(self, leaf):
+        """Add one leaf hash; returns its index"""
+        index = self.size
+        node, level, i = leaf, 0, index
+        while True:
+            if level == len(self.levels):
+                self.levels.append(bytearray())
+            self.levels[level] += node
+            if i % 2 == 0:
+                break
+            node = node_hash(self._node(level, i - 1), node)
+            i //= 2
+            level += 1
+        self.size += 1
+        return index
+
+    def _peaks(self, size):
+        """(level, first leaf) of each complete subtree, left to right"""
+        peaks = []
+        start = 0
+        for level in range(size.bit_length() - 1, -1, -1):
+            if size >> level & 1:
+                peaks.append((level, start))
+                start += 1 << level
+        return peaks
+
+    def _peak_hash(self, level, start):
+        return self._node(level, start >> level)
+
+    @staticmethod
+    def _bag(hashes):
+        acc = hashes[-1]
+        for h in reversed(hashes[:-1]):
+            acc = node_hash(h, acc)
+        return acc
+
+    def root(self, size=None):
+        size = self.size if size is None else size
+        if size == 0:
+            return EMPTY_ROOT
+        return self._bag([self._peak_hash(*p) for p in self._peaks(size)])
+
+    def proof(self, index):
+        """Audit path for leaf `index` against root()"""
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+
+        peaks = self._peaks(self.size)
+        pos = next(n for n, (level, start) in enumerate(peaks) if start <= index < start + (1 << level))
+        level, _ = peaks[pos]
+
+        path = []
+        for lvl in range(level):
+            j = index >> lvl
+            path.append(("L" if j & 1 else "R", self._node(lvl, j ^ 1).hex()))
+
+        hashes = [self._peak_hash(*p) for p in peaks]
+        if pos + 1 < len(peaks):
+            path.append(("R", self._bag(hashes[pos + 1:]).hex()))
+        for h in reversed(hashes[:pos]):
+            path.append(("L", h.hex()))
+        return path
+
+    def nbytes(self):
+        return sum(len(level) for level in self.levels)
+
+
+# ------------------------------
+# All booths, fed from the vote index
+# ------------------------------
+class ReceiptForest:
+
+    def __init__(self, roots_db):
+        self.trees = {}       # booth -> MerkleTree
+        self.leaves = {}      # receipt hash bytes -> (booth, index, candidate_id)
+        self.block = -1       # last vote index block included
+        self.reset = None     # last VotingReset (block, log index) the trees start after
+        self._lock = threading.Lock()
+        self._thread = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(roots_db)), exist_ok=True)
+        self._conn = sqlite3.connect(roots_db, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS merkle_roots (
+                booth TEXT NOT NULL,
+                epoch INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                root TEXT NOT NULL,
+                block INTEGER NOT NULL,
+                published REAL NOT NULL,
+                PRIMARY KEY (booth, epoch, size)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    @property
+    def epoch(self):
+        return self.reset[0] if self.reset else -1
+
+    def refresh(self, vote_index):
+        """Append votes from blocks the index has fully synced since the last refresh"""
+        reset = vote_index.last_reset()
+        with self._lock:
+            if reset != self.reset:
+                # Votes before the reset no longer count: start every tree again
+                self.trees.clear()
+                self.leaves.clear()
+                self.block = -1
+                self.reset = reset
+
+        synced = vote_index.last_block()
+        if synced <= self.block:
+            return 0
+
+        rows = vote_index.ordered_votes(self.block + 1, synced)
+        with self._lock:
+            for receipt_hash, booth, candidate_id in rows:
+                key = bytes.fromhex(receipt_hash)
+                if key in self.leaves:
+                    continue
+                tree = self.trees.setdefault(booth, MerkleTree())
+                index = tree.append(leaf_hash(receipt_hash, candidate_id))
+                self.leaves[key] = (booth, index, candidate_id)
+            self.block = synced
+        return len(rows)
+
+    def root(self, booth):
+        with self._lock:
+            tree = self.trees.get(booth)
+            return {
+                "booth": booth,
+                "size": tree.size if tree else 0,
+                "root": (tree.root() if tree else EMPTY_ROOT).hex(),
+                "block": self.block,
+                "epoch": self.epoch
+            }
+
+    def proof(self, receipt_hash):
+        """Inclusion proof for a receipt, or None if it is not in a tree yet"""
+        key = bytes.fromhex(normalize_hash(receipt_hash))
+        with self._lock:
+            entry = self.leaves.get(key)
+            if entry is None:
+                return None
+            booth, index, candidate_id = entry
+            tree = self.trees[booth]
+            return {
+                "booth": booth,
+                "receipt_hash": key.hex(),
+                "candidate_id": candidate_id,
+                "leaf_index": index,
+                "tree_size": tree.size,
+                "root": tree.root().hex(),
+                "block": self.block,
+                "epoch": self.epoch,
+                "path": tree.proof(index)
+            }
+
+    # ---------------- Published roots ----------------
+    def publish(self):
+        """Record the current root of every booth whose tree grew"""
+        now = time.time()
+        with self._lock:
+            rows = [(b, self.epoch, t.size, t.root().hex(), self.block, now) for b, t in self.trees.items()]
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO merkle_roots VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def published(self, booth, limit=100):
+        """Roots published for `booth`, newest epoch first"""
+        rows = self._conn.execute(
+            "SELECT epoch, size, root, block, published FROM merkle_roots WHERE booth = ? "
+            "ORDER BY epoch DESC, size DESC LIMIT ?",
+            (booth, limit)
+        ).fetchall()
+        return [dict(zip(("epoch", "size", "root", "block", "published"), r)) for r in rows]
+
+    def start(self, vote_index, interval=5, publish_seconds=60):
+        def loop():
+            last_publish = 0.0
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh(vote_index)
+                    if time.monotonic() - last_publish >= publish_seconds:
+                        self.publish()
+                        last_publish = time.monotonic()
+                except Exception as e:
+                    print("❌ Merkle refresh error:", e)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+#   python receipt_merkle.py verify proof.json [--root <published root>]
+#   python receipt_merkle.py bench --leaves 1000000 --proofs 100000 [--json merkle.json]
+def _verify_cli(args):
+    with open(args.proof, encoding="utf-8") as f:
+        proof = json.load(f)
+    proof = proof.get("proof", proof)   # accept the raw /api/merkle/proof response too
+
+    root = args.root or proof["root"]
+    leaf = leaf_hash(proof["receipt_hash"], proof["candidate_id"])
+    ok = verify_proof(leaf, proof["path"], root)
+    print(f"{'✅' if ok else '❌'} receipt {proof['receipt_hash']} "
+          f"{'is' if ok else 'is NOT'} leaf {proof['leaf_index']} of booth {proof['booth']} root {root}")
+    return 0 if ok else 1
+
+
+def _bench_cli(args):
+    rng = random.Random(42)
+    receipts = [rng.randbytes(32) for _ in range(args.leaves)]
+
+    tree = MerkleTree()
+    start = time.perf_counter()
+    for r in receipts:
+        tree.append(leaf_hash(r.hex(), rng.randrange(8)))
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    root = tree.root()
+    root_seconds = time.perf_counter() - start
+
+    indexes = [rng.randrange(args.leaves) for _ in range(args.proofs)]
+    start = time.perf_counter()
+    proofs = [tree.proof(i) for i in indexes]
+    prove = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i, path in zip(indexes, proofs):
+        leaf = tree._node(0, i)
+        if not verify_proof(leaf, path, root.hex()):
+            raise SystemExit(f"Proof for leaf {i} failed")
+    check = time.perf_counter() - start
+
+    result = {
+        "leaves": args.leaves,
+        "build_seconds": round(build, 3),
+        "appends_per_second": round(args.leaves / build),
+        "root_ms": round(root_seconds * 1000, 3),
+        "proofs": args.proofs,
+        "proofs_per_second": round(args.proofs / prove),
+        "verifies_per_second": round(args.proofs / check),
+        "proof_length": len(proofs[0]) if proofs else 0,
+        "tree_bytes": tree.nbytes()
+    }
+
+    print(f"🌳 {args.leaves} leaves built in {result['build_seconds']}s "
+          f"({result['appends_per_second']} appends/s), root in {result['root_ms']} ms")
+    print(f"🧾 {result['proofs_per_second']} proofs/s, {result['verifies_per_second']} verifies/s, "
+          f"{result['proof_length']} hashes per proof, {result['tree_bytes'] / 1e6:.1f} MB of nodes")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"merkle": result}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="VoteCast receipt Merkle trees")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("verify", help="check an inclusion proof offline")
+    p.add_argument("proof", help="JSON from /api/merkle/proof")
+    p.add_argument("--root", help="published root to check against (default: the one in the proof)")
+
+    p = sub.add_parser("bench", help="build / proof throughput")
+    p.add_argument("--leaves", type=int, default=1_000_000)
+    p.add_argument("--proofs", type=int, default=100_000)
+    p.add_argument("--json", help="write the result to this file")
+
+    args = parser.parse_args()
+    sys.exit(_verify_cli(args) if args.command == "verify" else _bench_cli(args))
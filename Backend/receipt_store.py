@@ -0,0 +1,158 @@
+import csv
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+from metrics import STORAGE_SECONDS, cache_lookup
+
+# ------------------------------
+# Receipt store
+# ------------------------------
+# Vote receipts (hashKey -> candidate / booth) live in a SQLite table keyed
+# by the receipt hash, so a lookup is a single primary-key probe no matter
+# how many votes were cast. A small LRU sits in front for hot receipts.
+
+RECEIPT_FIELDS = ["hashKey", "candidateId", "candidateName", "party", "pollingBoothId"]
+
+
+def normalize_hash(hash_key):
+    """Lowercase hex without 0x, so '0xAB..' and 'ab..' hit the same row"""
+    return str(hash_key).strip().lower().removeprefix("0x")
+
+
+class ReceiptStore:
+
+    def __init__(self, db_path, cache_size=4096):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS receipts (
+                hash TEXT PRIMARY KEY,
+                hashKey TEXT NOT NULL,
+                candidateId TEXT,
+                candidateName TEXT,
+                party TEXT,
+                pollingBoothId TEXT
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    # ---------------- LRU ----------------
+    def _cache_get(self, key):
+        row = self._cache.get(key)
+        if row is not None:
+            self._cache.move_to_end(key)
+        return row
+
+    def _cache_put(self, key, row):
+        self._cache[key] = row
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # ---------------- Write ----------------
+    def add(self, hash_key, candidate_id, candidate_name, party, polling_booth):
+        row = {
+            "hashKey": hash_key,
+            "candidateId": str(candidate_id),
+            "candidateName": candidate_name,
+            "party": party,
+            "pollingBoothId": polling_booth
+        }
+        key = normalize_hash(hash_key)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO receipts VALUES (?, ?, ?, ?, ?, ?)",
+                (key, *(row[f] for f in RECEIPT_FIELDS))
+            )
+            self._conn.commit()
+            self._cache_put(key, row)
+
+        return row
+
+    def import_csv(self, csv_path, batch_size=5000):
+        """Bulk load an existing hashKey.csv; rows already present are kept"""
+        imported = 0
+
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            batch = []
+
+            for row in reader:
+                if not row.get("hashKey"):
+                    continue
+                batch.append((normalize_hash(row["hashKey"]), *(row.get(k, "") for k in RECEIPT_FIELDS)))
+
+                if len(batch) >= batch_size:
+                    imported += self._insert_batch(batch)
+                    batch = []
+
+            if batch:
+                imported += self._insert_batch(batch)
+
+        return imported
+
+    def _insert_batch(self, batch):
+        with self._lock:
+            cur = self._conn.executemany(
+                "INSERT OR IGNORE INTO receipts VALUES (?, ?, ?, ?, ?, ?)",
+                batch
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    # ---------------- Read ----------------
+    def get(self, hash_key):
+        key = normalize_hash(hash_key)
+
+        with self._lock:
+            row = self._cache_get(key)
+            cache_lookup("receipt_cache", row is not None)
+            if row is not None:
+                return row
+
+            with STORAGE_SECONDS.time(op="receipt_lookup"):
+                found = self._conn.execute(
+                    "SELECT hashKey, candidateId, candidateName, party, pollingBoothId "
+                    "FROM receipts WHERE hash = ?",
+                    (key,)
+                ).fetchone()
+
+            if found is None:
+                return None
+
+            row = dict(zip(RECEIPT_FIELDS, found))
+            self._cache_put(key, row)
+            return row
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM receipts").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ------------------------------
+# CLI: python receipt_store.py <hashKey.csv> [receipts.db]
+# ------------------------------
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    src = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, "Dataset", "hashKey.csv")
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.join(project_root, "Dataset", "receipts.db")
+
+    store = ReceiptStore(dst)
+    n = store.import_csv(src)
+    print(f"✅ Imported {n} receipts into {dst} ({store.count()} total)")
+    store.close()
@@ -0,0 +1,338 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from web3.providers import JSONBaseProvider
+
+from metrics import RPC_SECONDS, RPC_NODE_ERRORS
+from tracing import span
+
+# ------------------------------
+# Pooled, batching, fail-over JSON-RPC provider
+# ------------------------------
+# Drop-in replacement for Web3.HTTPProvider:
+#   - one keep-alive requests.Session with a sized connection pool
+#   - read calls from concurrent threads that arrive within a few ms of each
+#     other are sent as ONE JSON-RPC batch (call_all() below issues a
+#     request's independent reads concurrently so they coalesce)
+#   - per-method timeouts (eth_getLogs may take far longer than eth_call)
+#   - several nodes (RPC_URLS=url1,url2,...): transport errors and 5xx move
+#     to the next node; a background health check benches nodes that are
+#     down or lagging behind the best head and restores them when they recover
+#
+# Writes (eth_sendRawTransaction) are never coalesced, and never re-sent to
+# another node once the first one may have received them: only a refused or
+# timed-out connect, or an HTTP 429, moves a write on.
+
+DEFAULT_TIMEOUTS = {
+    "eth_getLogs": 60,
+    "eth_sendRawTransaction": 30,
+    "eth_estimateGas": 20
+}
+
+NOT_IDEMPOTENT = {"eth_sendRawTransaction", "eth_sendTransaction"}
+
+BATCHABLE = {
+    "eth_call", "eth_blockNumber", "eth_chainId", "eth_gasPrice", "eth_getBalance",
+    "eth_getBlockByNumber", "eth_getCode", "eth_getTransactionCount",
+    "eth_getTransactionByHash", "eth_getTransactionReceipt", "net_version"
+}
+
+
+def _never_sent(error):
+    """True when the connection failed before any of the request went out"""
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectTimeout) or isinstance(reason, NewConnectionError)
+
+
+class RPCNode:
+
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+        self.healthy = True
+        self.failures = 0
+        self.retry_at = 0.0
+        self.head = 0
+
+    def __repr__(self):
+        # URLs often embed an API key; never print them
+        return f"<RPCNode {self.index} {'up' if self.healthy else 'down'} head={self.head}>"
+
+
+class _Pending:
+
+    def __init__(self, method, params):
+        self.method = method
+        self.params = params
+        self.response = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class PooledRPCProvider(JSONBaseProvider):
+
+    def __init__(self, urls, pool_size=32, timeouts=None, default_timeout=10.0,
+                 batch_window=0.002, max_batch=50, fail_cooldown=5.0, max_lag_blocks=5):
+        super().__init__()
+        if isinstance(urls, str):
+            urls = [urls]
+        if not urls:
+            raise ValueError("At least one RPC URL is required")
+
+        self.nodes = [RPCNode(i, u) for i, u in enumerate(urls)]
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.default_timeout = default_timeout
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.fail_cooldown = fail_cooldown
+        self.max_lag_blocks = max_lag_blocks
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.nodes), pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self._id_lock = threading.Lock()
+        self._queue = []
+        self._queue_lock = threading.Lock()
+        self._flusher = None
+        self._health_thread = None
+
+    def __str__(self):
+        return f"PooledRPCProvider({len(self.nodes)} nodes)"
+
+    def timeout_for(self, method):
+        return self.timeouts.get(method, self.default_timeout)
+
+    # ---------------- Transport + fail-over ----------------
+    def _candidates(self):
+        now = time.monotonic()
+        up = [n for n in self.nodes if n.healthy or n.retry_at <= now]
+        return up or list(self.nodes)   # everything benched: still try rather than fail outright
+
+    def _mark_failed(self, node, reason):
+        RPC_NODE_ERRORS.inc(node=node.index, reason=reason)
+        node.failures += 1
+        node.healthy = False
+        node.retry_at = time.monotonic() + self.fail_cooldown * min(2 ** (node.failures - 1), 12)
+
+    def _mark_ok(self, node):
+        node.failures = 0
+        node.healthy = True
+
+    def _post(self, payload, timeout, idempotent=True):
+        """POST to the first node that answers; returns decoded JSON.
+
+        With idempotent=False an error after the request may have reached a
+        node is raised as is instead of trying the next node.
+        """
+        last_error = None
+        for node in self._candidates():
+            try:
+                resp = self.session.post(node.url, data=payload, timeout=timeout)
+            except (requests.Timeout, requests.ConnectionError) as e:
+                self._mark_failed(node, "timeout" if isinstance(e, requests.Timeout) else "connection")
+                if not idempotent and not _never_sent(e):
+                    raise
+                last_error = e
+                continue
+
+            if resp.status_code == 429 or resp.status_code >= 500:
+                self._mark_failed(node, f"http_{resp.status_code}")
+                last_error = requests.HTTPError(f"RPC node {node.index} returned HTTP {resp.status_code}")
+                if not idempotent and resp.status_code != 429:
+                    raise last_error
+                continue
+
+            resp.raise_for_status()
+            self._mark_ok(node)
+            return self.decode_rpc_response(resp.content)
+
+        raise ConnectionError(f"All RPC nodes failed: {last_error}")
+
+    def encode_rpc_request(self, method, params):
+        with self._id_lock:   # request_counter is shared by every thread
+            return super().encode_rpc_request(method, params)
+
+    # ---------------- web3 provider API ----------------
+    def make_request(self, method, params):
+        with RPC_SECONDS.time(method=method), span(f"rpc.{method}"):
+            if self.batch_window and method in BATCHABLE:
+                return self._enqueue(method, params)
+            return self._post(self.encode_rpc_request(method, params), self.timeout_for(method),
+                              idempotent=method not in NOT_IDEMPOTENT)
+
+    def make_batch_request(self, batch_requests):
+        if not batch_requests:
+            return []
+        timeout = max(self.timeout_for(m) for m, _ in batch_requests)
+        with RPC_SECONDS.time(method="batch"), span("rpc.batch", size=len(batch_requests)):
+            responses = self._post(self.encode_batch_rpc_request(batch_requests), timeout,
+                                   idempotent=not any(m in NOT_IDEMPOTENT for m, _ in batch_requests))
+        if not isinstance(responses, list):
+            return responses    # a single error object for the whole batch
+        return sorted(responses, key=lambda r: r.get("id", 0))
+
+    # ---------------- Coalescing ----------------
+    def _enqueue(self, method, params):
+        item = _Pending(method, params)
+        with self._queue_lock:
+            self._queue.append(item)
+            if self._flusher is None:
+                self._flusher = threading.Timer(self.batch_window, self._flush)
+                self._flusher.daemon = True
+                self._flusher.start()
+            elif len(self._queue) >= self.max_batch:
+                self._flusher.cancel()
+                threading.Thread(target=self._flush, daemon=True).start()
+
+        # Backstop for a flush that never ran: the node timeout plus the window
+        if not item.done.wait(self.timeout_for(method) + self.batch_window + 5):
+            raise TimeoutError(f"No response for batched {method}")
+        if item.error is not None:
+            raise item.error
+        return item.response
+
+    def _flush(self):
+        with self._queue_lock:
+            items, self._queue = self._queue, []
+            self._flusher = None
+        if not items:
+            return
+
+        try:
+            if len(items) == 1:
+                item = items[0]
+                item.response = self._post(self.encode_rpc_request(item.method, item.params),
+                                           self.timeout_for(item.method))
+                return
+
+            by_id = {}
+            encoded = []
+            for item in items:
+                raw = self.encode_rpc_request(item.method, item.params)
+                by_id[self.decode_rpc_response(raw)["id"]] = item
+                encoded.append(raw)
+
+            timeout = max(self.timeout_for(i.method) for i in items)
+            with span("rpc.batch", size=len(items)):
+                responses = self._post(b"[" + b", ".join(encoded) + b"]", timeout)
+            if not isinstance(responses, list):
+                responses = [{**responses, "id": rid} for rid in by_id]
+            for r in responses:
+                item = by_id.get(r.get("id"))
+                if item is not None:
+                    item.response = r
+        except Exception as e:
+            for item in items:
+                item.error = e
+        finally:
+            # Every waiter wakes up, whatever failed above
+            for item in items:
+                if item.response is None and item.error is None:
+                    item.error = ConnectionError("No response for request in batch")
+                item.done.set()
+
+    # ---------------- Health checks ----------------
+    def check_health(self):
+        heads = {}
+        payload = self.encode_rpc_request("eth_blockNumber", [])
+        for node in self.nodes:
+            try:
+                resp = self.session.post(node.url, data=payload, timeout=3)
+                resp.raise_for_status()
+                heads[node.index] = int(self.decode_rpc_response(resp.content)["result"], 16)
+            except Exception:
+                self._mark_failed(node, "health")
+
+        if not heads:
+            return self.nodes
+
+        best = max(heads.values())
+        for node in self.nodes:
+            if node.index not in heads:
+                continue
+            node.head = heads[node.index]
+            if best - node.head > self.max_lag_blocks:
+                self._mark_failed(node, "lagging")
+            else:
+                self._mark_ok(node)
+        return self.nodes
+
+    def start_health_checks(self, interval=10):
+        if len(self.nodes) < 2 or self._health_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_health()
+                except Exception as e:
+                    print("❌ RPC health check error:", e)
+
+        self._health_thread = threading.Thread(target=loop, daemon=True)
+        self._health_thread.start()
+
+
+# ------------------------------
+# Helpers
+# ------------------------------
+_call_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="rpc-call")
+
+
+def call_all(*contract_calls):
+    """.call() several contract functions concurrently; the provider batches them"""
+    futures = [_call_pool.submit(c.call) for c in contract_calls]
+    return [f.result() for f in futures]
+
+
+def parse_timeouts(spec):
+    """'eth_getLogs=60,eth_call=5' -> {'eth_getLogs': 60.0, 'eth_call': 5.0}"""
+    out = {}
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        method, _, seconds = part.partition("=")
+        out[method.strip()] = float(seconds)
+    return out
+
+
+def provider_from_env():
+    """RPC_URLS (comma-separated) or ALCHEMY_URL, tuned by RPC_* env vars"""
+    urls = [u.strip() for u in (os.getenv("RPC_URLS") or os.getenv("ALCHEMY_URL") or "").split(",") if u.strip()]
+    provider = PooledRPCProvider(
+        urls,
+        pool_size=int(os.getenv("RPC_POOL_SIZE", "32")),
+        timeouts=parse_timeouts(os.getenv("RPC_TIMEOUTS")),
+        default_timeout=float(os.getenv("RPC_TIMEOUT", "10")),
+        batch_window=float(os.getenv("RPC_BATCH_WINDOW_MS", "2")) / 1000
+    )
+    provider.start_health_checks(int(os.getenv("RPC_HEALTH_SECONDS", "10")))
+    return provider
+
+
+def async_provider_from_env():
+    """AsyncHTTPProvider on the first RPC_URLS / ALCHEMY_URL node, timed like the pooled one.
+
+    No batching or fail-over here: concurrency comes from the event loop.
+    """
+    import aiohttp
+    from web3 import AsyncHTTPProvider
+
+    class TimedAsyncHTTPProvider(AsyncHTTPProvider):
+        async def make_request(self, method, params):
+            with RPC_SECONDS.time(method=method), span(f"rpc.{method}"):
+                return await super().make_request(method, params)
+
+    urls = [u.strip() for u in (os.getenv("RPC_URLS") or os.getenv("ALCHEMY_URL") or "").split(",") if u.strip()]
+    if not urls:
+        raise ValueError("At least one RPC URL is required")
+    return TimedAsyncHTTPProvider(
+        urls[0],
+        request_kwargs={"timeout": aiohttp.ClientTimeout(total=float(os.getenv("RPC_TIMEOUT", "10")))}
+    )
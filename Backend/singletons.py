@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+# ------------------------------
+# One process per STATE_DIR
+# ------------------------------
+# Some jobs must run in exactly one process per STATE_DIR: chain sync into
+# the shared vote index, broadcast resume, each ballot journal. An flock on
+# STATE_DIR/.<name>.lock picks that process, and is held until it exits.
+#
+# During a graceful reload (kill -HUP) the new workers start while the old
+# ones still hold those locks. So when the claim fails, run_singleton keeps
+# retrying in the background and starts the job in whichever process gets
+# the lock once the old holder exits.
+
+_held = []   # lock files of the claims this process holds
+
+
+def claim(state_dir, name):
+    """True if this process now holds `name` (until it exits)"""
+    try:
+        import fcntl
+    except ImportError:   # no pre-fork server on Windows: single process
+        return True
+
+    f = open(os.path.join(state_dir, f'.{name}.lock'), 'w')
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return False
+    _held.append(f)
+    return True
+
+
+def run_singleton(state_dir, name, start, retry_seconds=5):
+    """Call start() in the one process holding `name`: now if it is free, else once the holder exits.
+
+    Returns True if start() ran now.
+    """
+    if claim(state_dir, name):
+        start()
+        return True
+
+    def wait():
+        while not claim(state_dir, name):
+            time.sleep(retry_seconds)
+        print(f"🔑 Took over {name}")
+        try:
+            start()
+        except Exception as e:
+            print(f"❌ {name} failed to start:", e)
+
+    threading.Thread(target=wait, daemon=True, name=f"singleton-{name}").start()
+    return False
@@ -0,0 +1,270 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+
+# ------------------------------
+# Bulk SMS broadcast engine
+# ------------------------------
+# Broadcasts run as background jobs: numbers are normalized and deduplicated,
+# a bounded pool of workers sends them at a capped rate with retry/backoff,
+# and every outcome is appended to a per-job checkpoint log so a restarted
+# backend resumes a job where it stopped instead of texting everyone twice.
+
+
+def normalize_phone(mobile, default_country="91"):
+    """Digits only, with the country code added to bare 10-digit numbers"""
+    digits = re.sub(r"\D", "", mobile or "")
+    if len(digits) == 10:
+        digits = default_country + digits
+    return digits
+
+
+# ------------------------------
+# Senders
+# ------------------------------
+class TwilioSender:
+
+    def __init__(self, client, from_number):
+        self.client = client
+        self.from_number = from_number
+
+    def __call__(self, to, body):
+        self.client.messages.create(body=body, from_=self.from_number, to=to)
+
+
+class FakeSMSSender:
+    """Local stand-in for Twilio: records messages, optional latency and failure rate"""
+
+    def __init__(self, latency=0.0, fail_rate=0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def __call__(self, to, body):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise RuntimeError("fake SMS failure")
+        with self._lock:
+            self.sent.append((to, body))
+
+
+# ------------------------------
+# Rate limiter (shared by all workers of a job)
+# ------------------------------
+class RateLimiter:
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ------------------------------
+# Jobs
+# ------------------------------
+JOB_ID = re.compile(r"[0-9a-f]{12}")
+
+
+class BroadcastJob:
+
+    def __init__(self, job_id, message, recipients, checkpoint_dir):
+        self.job_id = job_id
+        self.message = message
+        self.recipients = recipients
+        self.meta_path = os.path.join(checkpoint_dir, f"{job_id}.json")
+        self.log_path = os.path.join(checkpoint_dir, f"{job_id}.log")
+
+        self.sent = 0
+        self.failed = 0
+        self.state = "queued"
+        self.started_at = None
+        self.finished_at = None
+        self.done = set()
+        self._lock = threading.Lock()
+        self._log = None
+
+    def save_meta(self):
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "job_id": self.job_id,
+                "message": self.message,
+                "recipients": self.recipients,
+                "state": self.state,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }, f)
+        os.replace(tmp, self.meta_path)
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint_dir, job_id):
+        """Rebuild a job from its meta file and outcome log, or None if there is none"""
+        meta_path = os.path.join(checkpoint_dir, f"{job_id}.json")
+        if not os.path.isfile(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        job = cls(meta["job_id"], meta["message"], meta["recipients"], checkpoint_dir)
+        job.state = meta["state"]
+        job.started_at = meta.get("started_at")
+        job.finished_at = meta.get("finished_at")
+        job.load_checkpoint()
+        return job
+
+    def load_checkpoint(self):
+        if not os.path.isfile(self.log_path):
+            return
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                outcome, _, number = line.strip().partition(",")
+                if not number:
+                    continue
+                self.done.add(number)
+                if outcome == "sent":
+                    self.sent += 1
+                else:
+                    self.failed += 1
+
+    def record(self, number, outcome):
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.log_path, "a", encoding="utf-8")
+            self._log.write(f"{outcome},{number}\n")
+            self._log.flush()
+            self.done.add(number)
+            if outcome == "sent":
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def status(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        processed = self.sent + self.failed
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "total": len(self.recipients),
+            "sent": self.sent,
+            "failed": self.failed,
+            "pending": len(self.recipients) - processed,
+            "elapsed_seconds": round(elapsed, 2)
+        }
+
+
+class BroadcastEngine:
+
+    def __init__(self, sender, checkpoint_dir, workers=8, rate_per_second=10,
+                 max_retries=3, backoff_seconds=1.0):
+        self.sender = sender
+        self.checkpoint_dir = checkpoint_dir
+        self.workers = workers
+        self.rate_per_second = rate_per_second
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self.jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def start(self, message, numbers):
+        recipients = list(dict.fromkeys(n for n in map(normalize_phone, numbers) if n))
+        job = BroadcastJob(uuid.uuid4().hex[:12], message, recipients, self.checkpoint_dir)
+        job.save_meta()
+        self._launch(job)
+        return job
+
+    def resume_pending(self):
+        """Restart every job whose checkpoint says it never finished"""
+        resumed = []
+        for name in sorted(os.listdir(self.checkpoint_dir)):
+            if not name.endswith(".json"):
+                continue
+            job = BroadcastJob.from_checkpoint(self.checkpoint_dir, name[:-len(".json")])
+            if job.state == "finished" or job.job_id in self.jobs:
+                continue
+
+            self._launch(job)
+            resumed.append(job)
+        return resumed
+
+    def status(self, job_id):
+        """Live status for jobs run here; other workers' jobs are read from their checkpoint"""
+        job = self.jobs.get(job_id)
+        if job is None and JOB_ID.fullmatch(job_id):
+            job = BroadcastJob.from_checkpoint(self.checkpoint_dir, job_id)
+        return job.status() if job else None
+
+    def _launch(self, job):
+        with self._lock:
+            self.jobs[job.job_id] = job
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _send_with_retry(self, number, body, limiter):
+        for attempt in range(self.max_retries + 1):
+            # Retries count against the job's rate too
+            limiter.wait()
+            try:
+                self.sender("+" + number, body)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print("❌ Broadcast error:", number, e)
+                    return False
+                time.sleep(self.backoff_seconds * (2 ** attempt) * (0.5 + random.random() / 2))
+
+    def _run(self, job):
+        job.state = "running"
+        job.started_at = time.time()
+        job.save_meta()
+
+        todo = queue.Queue()
+        for number in job.recipients:
+            if number not in job.done:
+                todo.put(number)
+
+        limiter = RateLimiter(self.rate_per_second)
+
+        def worker():
+            while True:
+                try:
+                    number = todo.get_nowait()
+                except queue.Empty:
+                    return
+                ok = self._send_with_retry(number, job.message, limiter)
+                job.record(number, "sent" if ok else "failed")
+
+        pool = [threading.Thread(target=worker, daemon=True) for _ in range(self.workers)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+
+        job.close()
+        job.state = "finished"
+        job.finished_at = time.time()
+        job.save_meta()
+        print(f"📨 Broadcast {job.job_id} finished: {job.sent} sent, {job.failed} failed")
@@ -0,0 +1,351 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+# ------------------------------
+# Offline tally audit
+# ------------------------------
+# Recomputes every booth / candidate tally from the VoteCast events alone and
+# cross-checks them against what the contracts report:
+#
+#   logs     - VoteCast events counted here
+#   counted  - Voting.getVoteCount(booth, candidate)
+#   ec_field - the vote column of EC.getCandidatesByBooth(booth)
+#
+# Events come from the local vote index (--index vote_index.db) or straight
+# from RPC (--rpc), split into block ranges that a process pool fetches and
+# decodes in parallel. Each range comes back as numpy columns; the merge is
+# one np.unique over (booth, candidate) keys, so tens of millions of events
+# cost seconds of counting once they are fetched. Either way only votes after
+# the last VotingReset in the audited range are counted.
+#
+#   python tally_audit.py --index ../Dataset/vote_index.db
+#   python tally_audit.py --rpc --from-block 5000000 --workers 16 --json audit.json
+#
+# Exit status is 1 when any tally disagrees.
+
+VOTE_CAST_SIGNATURE = "VoteCast(string,uint256,bytes32)"
+VOTING_RESET_SIGNATURE = "VotingReset()"
+
+
+# ------------------------------
+# Range workers (run in child processes)
+# ------------------------------
+class Chunk:
+    """Columns for one block range; booth is a code into `booths`"""
+
+    def __init__(self, booths, booth, candidate, receipt_prefix, block, log_index, resets=()):
+        self.booths = booths
+        self.booth = booth
+        self.candidate = candidate
+        self.receipt_prefix = receipt_prefix
+        self.block = block
+        self.log_index = log_index
+        self.resets = list(resets)
+
+    def __len__(self):
+        return len(self.candidate)
+
+
+def _columns(rows, resets=()):
+    """rows: (booth, candidate_id, receipt hex, block, log_index)"""
+    codes = {}
+    booth = np.fromiter((codes.setdefault(r[0], len(codes)) for r in rows), np.int32, len(rows))
+    return Chunk(
+        list(codes),
+        booth,
+        np.fromiter((int(r[1]) for r in rows), np.int64, len(rows)),
+        np.fromiter((int(r[2][:16], 16) for r in rows), np.uint64, len(rows)),
+        np.fromiter((r[3] for r in rows), np.int64, len(rows)),
+        np.fromiter((r[4] for r in rows), np.int32, len(rows)),
+        resets
+    )
+
+
+def read_index_range(db_path, start, end):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT booth, candidate_id, receipt_hash, block_number, log_index FROM votes "
+            "WHERE block_number BETWEEN ? AND ?",
+            (start, end)
+        ).fetchall()
+        resets = conn.execute(
+            "SELECT block_number, log_index FROM resets WHERE block_number BETWEEN ? AND ?",
+            (start, end)
+        ).fetchall()
+    finally:
+        conn.close()
+    return _columns(rows, [tuple(r) for r in resets])
+
+
+def check_index(db_path):
+    """Last synced block of a vote index; SystemExit if it predates VotingReset tracking"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "resets" not in tables:
+            raise SystemExit(f"❌ {db_path} does not record VotingReset events: "
+                             "rebuild it with the current backend, or audit with --rpc")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'last_block'").fetchone()
+        return row[0] if row else conn.execute("SELECT COALESCE(MAX(block_number), -1) FROM votes").fetchone()[0]
+    finally:
+        conn.close()
+
+
+_provider = None
+
+
+def _rpc():
+    global _provider
+    if _provider is None:
+        from rpc_client import provider_from_env
+        _provider = provider_from_env()
+    return _provider
+
+
+def _decode_vote(data):
+    """ABI-decode VoteCast's (string, uint256, bytes32) data by hand: ~10x faster than web3"""
+    data = data[2:]
+    offset = int(data[0:64], 16) * 2
+    candidate = int(data[64:128], 16)
+    receipt = data[128:192]
+    length = int(data[offset:offset + 64], 16) * 2
+    booth = bytes.fromhex(data[offset + 64:offset + 64 + length]).decode("utf-8")
+    return booth, candidate, receipt
+
+
+def fetch_rpc_range(address, topics, start, end):
+    """eth_getLogs for one range; halves the range when the node refuses its size"""
+    vote_topic, reset_topic = topics
+    response = _rpc().make_request("eth_getLogs", [{
+        "address": address,
+        "topics": [[vote_topic, reset_topic]],
+        "fromBlock": hex(start),
+        "toBlock": hex(end)
+    }])
+
+    if "error" in response:
+        if end > start:
+            mid = (start + end) // 2
+            a = fetch_rpc_range(address, topics, start, mid)
+            b = fetch_rpc_range(address, topics, mid + 1, end)
+            return merge_chunks([a, b])
+        raise RuntimeError(f"eth_getLogs {start}-{end}: {response['error']}")
+
+    rows = []
+    resets = []
+    for log in response["result"]:
+        position = (int(log["blockNumber"], 16), int(log["logIndex"], 16))
+        if log["topics"][0] == reset_topic:
+            resets.append(position)
+            continue
+        rows.append((*_decode_vote(log["data"]), *position))
+    return _columns(rows, resets)
+
+
+# ------------------------------
+# Merge + count
+# ------------------------------
+def merge_chunks(chunks):
+    booths = {}
+    parts = []
+    for c in chunks:
+        remap = np.array([booths.setdefault(b, len(booths)) for b in c.booths] or [0], dtype=np.int32)
+        parts.append(remap[c.booth] if len(c) else c.booth)
+    cat = lambda field, dtype: np.concatenate([getattr(c, field) for c in chunks] or [np.empty(0, dtype)])
+    return Chunk(
+        list(booths),
+        np.concatenate(parts or [np.empty(0, np.int32)]),
+        cat("candidate", np.int64),
+        cat("receipt_prefix", np.uint64),
+        cat("block", np.int64),
+        cat("log_index", np.int32),
+        sorted(r for c in chunks for r in c.resets)
+    )
+
+
+def after_last_reset(events):
+    """Votes cast before the last VotingReset no longer count"""
+    if not events.resets:
+        return events, None
+    block, log_index = events.resets[-1]
+    keep = (events.block > block) | ((events.block == block) & (events.log_index > log_index))
+    return Chunk(events.booths, events.booth[keep], events.candidate[keep], events.receipt_prefix[keep],
+                 events.block[keep], events.log_index[keep]), (block, log_index)
+
+
+def tally(events):
+    """{booth: {candidate_id: votes}} with one vectorized group-by"""
+    if not len(events):
+        return {}
+    width = int(events.candidate.max()) + 1
+    keys, counts = np.unique(events.booth.astype(np.int64) * width + events.candidate, return_counts=True)
+    out = {}
+    for key, n in zip(keys.tolist(), counts.tolist()):
+        out.setdefault(events.booths[key // width], {})[key % width] = n
+    return out
+
+
+def duplicate_receipts(events):
+    """Receipt hashes (64-bit prefix) seen more than once; hasVoted should make this empty"""
+    values, counts = np.unique(events.receipt_prefix, return_counts=True)
+    return [f"{int(v):016x}" for v in values[counts > 1]]
+
+
+# ------------------------------
+# Contract cross-check
+# ------------------------------
+def chain_counts(w3, voting_contract, ec_contract, booths, workers=16):
+    """{booth: {candidate_id: (getVoteCount, EC vote field, name)}}"""
+    def one(booth):
+        ids, names, _parties, votes = ec_contract.functions.getCandidatesByBooth(booth).call()
+        counted = [voting_contract.functions.getVoteCount(booth, cid).call() for cid in ids]
+        return booth, {int(cid): (int(c), int(v), name) for cid, name, v, c in zip(ids, names, votes, counted)}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(one, booths))
+
+
+def compare(logs, chain):
+    # With the EC.sol in this tree the vote column is never written (Voting.sol
+    # keeps its own counts): an all-zero column is reported, not flagged
+    check_ec_field = any(v[1] for c in chain.values() for v in c.values())
+    rows = []
+    for booth in sorted(set(logs) | set(chain)):
+        candidates = chain.get(booth, {})
+        for cid in sorted(set(logs.get(booth, {})) | set(candidates)):
+            n = logs.get(booth, {}).get(cid, 0)
+            counted, ec_field, name = candidates.get(cid, (None, None, None))
+            problems = []
+            if counted is None:
+                problems.append("not_a_candidate")
+            else:
+                if counted != n:
+                    problems.append("getVoteCount")
+                if check_ec_field and ec_field != n:
+                    problems.append("ec_field")
+            rows.append({
+                "booth": booth, "candidate_id": cid, "name": name,
+                "logs": n, "counted": counted, "ec_field": ec_field, "mismatch": problems
+            })
+    return rows
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+def _ranges(start, end, size):
+    return [(s, min(s + size - 1, end)) for s in range(start, end + 1, size)]
+
+
+def _contracts():
+    from dotenv import load_dotenv
+    from web3 import Web3
+    from rpc_client import provider_from_env
+
+    load_dotenv()
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(here, "VotingABI.json")) as f:
+        voting_abi = json.load(f)
+    with open(os.path.join(here, "EC_ABI.json")) as f:
+        ec_abi = json.load(f)
+
+    w3 = Web3(provider_from_env())
+    voting = w3.eth.contract(address=os.getenv("VITE_VOTING_CONTRACT_ADDRESS"), abi=voting_abi)
+    ec = w3.eth.contract(address=os.getenv("VITE_EC_CONTRACT_ADDRESS"), abi=ec_abi)
+    return w3, voting, ec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute tallies from VoteCast events and cross-check the contracts")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--index", help="read events from a vote_index.db")
+    source.add_argument("--rpc", action="store_true", help="read events with eth_getLogs (RPC_URLS / ALCHEMY_URL)")
+    parser.add_argument("--from-block", type=int, default=int(os.getenv("VOTING_DEPLOY_BLOCK", "0")))
+    parser.add_argument("--to-block", type=int, help="default: chain head (rpc) / last indexed block (index)")
+    parser.add_argument("--chunk", type=int, default=2000, help="blocks per range")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--booths", help="comma-separated booths to audit (default: every booth with votes)")
+    parser.add_argument("--no-chain", action="store_true", help="only recompute, skip the contract cross-check")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    w3 = voting = ec = None
+    if args.rpc or not args.no_chain:
+        w3, voting, ec = _contracts()
+
+    if args.index:
+        last_block = check_index(args.index)
+        if args.to_block is None:
+            args.to_block = last_block
+        job, job_args = read_index_range, (args.index,)
+    else:
+        if args.to_block is None:
+            args.to_block = w3.eth.block_number
+        topics = ("0x" + w3.keccak(text=VOTE_CAST_SIGNATURE).hex().removeprefix("0x"),
+                  "0x" + w3.keccak(text=VOTING_RESET_SIGNATURE).hex().removeprefix("0x"))
+        job, job_args = fetch_rpc_range, (voting.address, topics)
+
+    ranges = _ranges(args.from_block, args.to_block, args.chunk)
+    print(f"🔎 {len(ranges)} block ranges {args.from_block}-{args.to_block} on {args.workers} workers")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        chunks = list(pool.map(job, *zip(*[(*job_args, s, e) for s, e in ranges]), chunksize=4)) if ranges else []
+    fetched = time.perf_counter()
+
+    events, reset = after_last_reset(merge_chunks(chunks))
+    logs = tally(events)
+    duplicates = duplicate_receipts(events)
+    counted_at = time.perf_counter()
+
+    booths = args.booths.split(",") if args.booths else sorted(logs)
+    logs = {b: logs.get(b, {}) for b in booths}
+    chain = {} if args.no_chain else chain_counts(w3, voting, ec, booths)
+    rows = compare(logs, chain) if chain else [
+        {"booth": b, "candidate_id": c, "logs": n, "mismatch": []} for b in booths for c, n in sorted(logs[b].items())
+    ]
+    mismatches = [r for r in rows if r["mismatch"]]
+
+    print(f"{'booth':14} {'cand':>5} {'logs':>10} {'counted':>10} {'ec_field':>10}  mismatch")
+    for r in rows:
+        print(f"{r['booth']:14} {r['candidate_id']:>5} {r['logs']:>10} {str(r.get('counted', '-')):>10} "
+              f"{str(r.get('ec_field', '-')):>10}  {','.join(r['mismatch'])}")
+
+    if reset:
+        print(f"♻️ Counting only votes after the VotingReset at block {reset[0]}")
+    if duplicates:
+        print(f"❌ {len(duplicates)} receipt hashes appear more than once")
+    if chain and len(events) and all(r["ec_field"] in (0, None) for r in rows):
+        print("ℹ️ EC vote fields are all 0 (never written by Voting.sol): not compared")
+
+    report = {
+        "events": len(events),
+        "ranges": len(ranges),
+        "fetch_seconds": round(fetched - started, 2),
+        "count_seconds": round(counted_at - fetched, 3),
+        "events_per_second": round(len(events) / (fetched - started)) if fetched > started else 0,
+        "last_reset": reset,
+        "duplicate_receipts": duplicates,
+        "rows": rows,
+        "mismatches": len(mismatches)
+    }
+    print(f"🧮 {report['events']} events in {report['fetch_seconds']}s "
+          f"({report['events_per_second']} events/s), {len(mismatches)} mismatching rows")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"tally_audit": report}, f, indent=2)
+
+    return 1 if mismatches or duplicates else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
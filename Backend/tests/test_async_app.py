@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from nonce_floor import NonceFloor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_votes_fetching_the_same_nonce_take_consecutive_ones():
+    floor = NonceFloor()
+    assert [floor.take(7) for _ in range(3)] == [7, 8, 9]
+
+
+def test_a_higher_fetched_nonce_moves_the_floor_up():
+    floor = NonceFloor()
+    floor.take(3)
+    assert floor.take(10) == 10
+    assert floor.take(4) == 11
+
+
+def test_a_failed_send_forgets_the_floor():
+    floor = NonceFloor()
+    floor.take(5)
+    floor.take(5)
+    floor.forget()
+    assert floor.take(5) == 5   # the node never saw 6, so it is handed out again
+
+
+def test_concurrent_votes_never_share_a_nonce():
+    async def run():
+        floor = NonceFloor()
+        fetched = 42   # every vote fetched before any of them sent
+
+        async def vote(delay):
+            await asyncio.sleep(delay)
+            async with floor.lock:
+                nonce = floor.take(fetched)
+                await asyncio.sleep(0)   # the send, awaited under the lock
+                return nonce
+
+        return await asyncio.gather(*(vote(i % 3 / 1000) for i in range(20)))
+
+    nonces = asyncio.run(run())
+    assert sorted(nonces) == list(range(42, 62))
+
+
+# Boots async_app.py on a local eth-tester chain in a fresh interpreter (app.py
+# reads its configuration at import time) and casts one vote through /cast-vote.
+CAST_ONE_VOTE = r"""
+import asyncio, json, sys
+from loadtest import configure_environment
+configure_environment(sys.argv[1])
+
+from aiohttp.test_utils import TestClient, TestServer
+import async_app
+core = async_app.core
+
+voter = next(core.voter_store.iter_booth(core.voter_store.booths()[0]))
+core.kiosk_sessions.update("k1", epic=voter["EPIC_ID"], polling_id=voter["Polling_Booth_ID"])
+
+async def main():
+    async with TestClient(TestServer(async_app.make_app())) as client:
+        headers = {"X-Kiosk-Id": "k1"}
+        first = await client.post("/cast-vote", json={"candidate_id": 1}, headers=headers)
+        vote = await first.json()
+        again = await client.post("/cast-vote", json={"candidate_id": 1}, headers=headers)
+        receipt = await client.post("/verify-hash", json={"hashKey": vote.get("receiptHash")})
+        return {
+            "vote": [first.status, vote],
+            "again": [again.status, await again.json()],
+            "receipt": [receipt.status, await receipt.json()]
+        }
+
+print(json.dumps(asyncio.run(main())))
+"""
+
+
+def test_cast_vote_round_on_a_tester_chain(tmp_path):
+    pytest.importorskip("facenet_pytorch")
+    solcx = pytest.importorskip("solcx")
+    if not solcx.get_installed_solc_versions():
+        pytest.skip("no solc installed for py-solc-x")
+
+    out = subprocess.run(
+        [sys.executable, "-c", CAST_ONE_VOTE, str(tmp_path / "state")],
+        cwd=BACKEND_DIR, check=True, timeout=600, capture_output=True, text=True
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+
+    status, vote = result["vote"]
+    assert status == 200 and vote["status"] == "success"
+
+    status, again = result["again"]
+    assert status == 400 and again["message"].startswith("Vote rejected")
+
+    status, receipt = result["receipt"]
+    assert status == 200 and receipt["vote"]["candidateId"] in (1, "1")
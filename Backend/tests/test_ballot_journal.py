@@ -0,0 +1,124 @@
+import json
+import threading
+
+import pytest
+
+from ballot_journal import AlreadyQueued, BallotJournal, BallotRejected, BallotReplayer, JournalError
+
+
+def lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_pending_ballots_survive_reopen(tmp_path):
+    path = str(tmp_path / "ballots.jsonl")
+    journal = BallotJournal(path)
+    first = journal.append("PB-1", 1, "aa")
+    journal.append("PB-1", 2, "bb")
+    journal.mark_done(first, "cast", tx="0x1")
+    journal.close()
+
+    reopened = BallotJournal(path)
+    assert reopened.backlog() == 1
+    assert reopened.next_pending()["epic_hash"] == "bb"
+    assert reopened.append("PB-1", 3, "cc") == 2   # seq keeps counting after compaction
+    assert [r["op"] for r in lines(path)] == ["ballot", "ballot"]
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    path = str(tmp_path / "ballots.jsonl")
+    journal = BallotJournal(path)
+    journal.append("PB-1", 1, "aa")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op":"ballot","seq":1,')
+
+    assert BallotJournal(path).backlog() == 1
+
+
+def test_same_epic_cannot_be_queued_twice_concurrently(tmp_path):
+    journal = BallotJournal(str(tmp_path / "ballots.jsonl"), commit_window=0.05)
+    outcomes = []
+
+    def vote():
+        try:
+            outcomes.append(journal.append("PB-1", 1, "aa"))
+        except AlreadyQueued:
+            outcomes.append("duplicate")
+
+    threads = [threading.Thread(target=vote) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert outcomes.count("duplicate") == 7
+    assert journal.backlog() == 1 and journal.is_pending("aa")
+
+
+def test_concurrent_appends_share_group_commits(tmp_path):
+    journal = BallotJournal(str(tmp_path / "ballots.jsonl"), commit_window=0.02)
+    threads = [threading.Thread(target=journal.append, args=("PB-1", 1, f"{i:02x}")) for i in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert journal.backlog() == 50
+    assert sorted(r["seq"] for r in lines(journal.path)) == list(range(50))
+
+
+class FailingFile:
+    """Wraps the journal file: the next ballot write gets part way to disk, then fails"""
+
+    def __init__(self, f):
+        self.f = f
+        self.fail_next = False
+
+    def write(self, data):
+        if self.fail_next and b'"op":"ballot"' in data:
+            self.fail_next = False
+            self.f.write(data[:10])
+            raise OSError("disk full")
+        return self.f.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def test_failed_flush_keeps_done_lines_and_no_torn_ballot(tmp_path):
+    journal = BallotJournal(str(tmp_path / "ballots.jsonl"))
+    seq = journal.append("PB-1", 1, "aa")
+    journal._file = FailingFile(journal._file)
+    journal._file.fail_next = True
+
+    with pytest.raises(JournalError):
+        journal.append("PB-1", 2, "bb")
+    assert not journal.is_pending("bb")          # may be queued again
+    journal.mark_done(seq, "cast")
+    journal.append("PB-1", 2, "bb")
+    journal.close()
+
+    assert [(r["op"], r["seq"]) for r in lines(journal.path)] == [("ballot", 0), ("done", 0), ("ballot", 2)]
+
+
+def test_replayer_never_sends_a_ballot_already_on_chain(tmp_path):
+    journal = BallotJournal(str(tmp_path / "ballots.jsonl"))
+    on_chain = {"aa"}
+    sent = []
+
+    def submit(ballot):
+        if ballot["candidate_id"] == 9:
+            raise BallotRejected("invalid candidate")
+        sent.append(ballot["epic_hash"])
+        return {"tx": "0x1"}
+
+    replayer = BallotReplayer(journal, submit, lambda h: h in on_chain)
+    for epic, cid in (("aa", 1), ("bb", 2), ("cc", 9)):
+        journal.append("PB-1", cid, epic)
+
+    outcomes = []
+    while journal.backlog():
+        outcomes.append(replayer.replay_one(journal.next_pending()))
+    assert outcomes == ["already_on_chain", "cast", "rejected"]
+    assert sent == ["bb"]
@@ -0,0 +1,29 @@
+import pytest
+
+from edit_requests import EditRequestQueue
+from voter_store import VoterStore
+
+
+@pytest.fixture
+def queue(tmp_path):
+    store = VoterStore(str(tmp_path / "voters.db"))
+    store.add({"EPIC_ID": "ABC0000001", "Name": "Asha", "Polling_Booth_ID": "PB-1", "Phone_Number": "9000000001"})
+    return EditRequestQueue(store)
+
+
+def test_before_commit_failure_approves_nothing(queue):
+    rid = queue.submit({"EPIC_ID": "ABC0000001", "Polling_Booth_ID": "PB-1", "Old_Name": "Asha", "New_Name": "Asha R"})
+
+    def failing_csv_write(conn, edits):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        queue.approve([rid], before_commit=failing_csv_write)
+    assert queue.voters.get("ABC0000001")["Name"] == "Asha"
+    assert queue.latest_pending("ABC0000001") == rid
+
+    mirrored = []
+    edits = queue.approve([rid], before_commit=lambda conn, e: mirrored.extend(e))
+    assert edits == mirrored == [("ABC0000001", {"Name": "Asha R"})]
+    assert queue.voters.get("ABC0000001")["Name"] == "Asha R"
+    assert queue.latest_pending("ABC0000001") is None
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("cv2")
+
+from face_templates import EmbeddingBank, SharedEmbeddingBank  # noqa: E402
+
+
+def test_concurrent_appends_are_all_kept():
+    bank = EmbeddingBank(dim=8)
+    rows = torch.eye(8)
+
+    def worker():
+        for i in range(200):
+            bank.append(rows[i % 8])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(bank) == 1600
+    assert bank.max_similarity(rows[3]) == pytest.approx(1.0)
+
+
+def test_empty_bank_scores_zero():
+    bank = EmbeddingBank(dim=8)
+    assert bank.max_similarity(torch.ones(8)) == 0.0
+    bank.append(torch.ones(8))
+    bank.clear()
+    assert len(bank) == 0
+
+
+def test_shared_bank_is_seen_by_every_process(tmp_path):
+    path = str(tmp_path / "voted_faces.db")
+    worker_a = SharedEmbeddingBank(path, dim=8)
+    worker_b = SharedEmbeddingBank(path, dim=8)
+    face = torch.eye(8)[2]
+
+    worker_a.append(face)
+    assert worker_b.max_similarity(face) == pytest.approx(1.0)
+    assert SharedEmbeddingBank(path, dim=8).max_similarity(face) == pytest.approx(1.0)   # survives restarts
+
+    worker_b.clear()
+    assert worker_a.max_similarity(face) == 0.0
+    worker_a.append(torch.eye(8)[5])
+    assert len(worker_b) == 1
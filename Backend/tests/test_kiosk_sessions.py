@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from kiosk_sessions import make_frame_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make(request, tmp_path):
+    def make(**kwargs):
+        return make_frame_store(request.param, db_path=str(tmp_path / "frames.db"), decode=bytes.decode, **kwargs)
+    return make
+
+
+def test_frames_are_bounded(make):
+    frames = make(max_entries=2)
+    frames.put("k1", "f1", b"f1")
+    time.sleep(0.01)
+    frames.put("k2", "f2", b"f2")
+    time.sleep(0.01)
+    frames.put("k3", "f3", b"f3")
+
+    assert len(frames) == 2
+    assert frames.get("k1") is None
+    assert (frames.get("k2"), frames.get("k3")) == ("f2", "f3")
+
+
+def test_old_frames_are_never_used(make):
+    frames = make(ttl_seconds=0.05)
+    frames.put("k1", "f1", b"f1")
+    time.sleep(0.1)
+    assert frames.get("k1") is None
+    assert len(frames) == 0
+
+
+def test_memory_frames_evict_least_recently_used():
+    frames = make_frame_store("memory", max_entries=2)
+    frames.put("k1", "f1", b"f1")
+    frames.put("k2", "f2", b"f2")
+    assert frames.get("k1") == "f1"
+    frames.put("k3", "f3", b"f3")
+    assert frames.get("k2") is None
+
+
+def test_sqlite_frames_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "frames.db")
+    a = make_frame_store("sqlite", db_path=path, decode=bytes.decode)
+    b = make_frame_store("sqlite", db_path=path, decode=bytes.decode)
+    a.put("k1", "ignored", b"jpeg")
+    assert b.get("k1") == "jpeg"
@@ -0,0 +1,27 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip("facenet_pytorch")
+solcx = pytest.importorskip("solcx")
+
+
+def test_small_load_run_casts_every_vote(tmp_path):
+    if not solcx.get_installed_solc_versions():
+        pytest.skip("no solc installed for py-solc-x")
+
+    report = tmp_path / "load.json"
+    subprocess.run(
+        [sys.executable, "loadtest.py", "--voters", "4", "--concurrency", "2",
+         "--state-dir", str(tmp_path / "state"), "--json", str(report)],
+        cwd=BACKEND_DIR, check=True, timeout=600
+    )
+
+    result = json.loads(report.read_text())["load_test"]
+    assert result["votes"] == 4
+    assert all(e["errors"] == 0 for e in result["endpoints"].values())
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, Registry, mark_process_dead
+
+
+def make_registry():
+    registry = Registry()
+    counter = registry.register(Counter("t_requests_total", "Requests", ["endpoint"]))
+    hist = registry.register(Histogram("t_seconds", "Latency", ["op"], buckets=(0.1, 1.0)))
+    gauge = registry.register(Gauge("t_backlog", "Backlog", ["journal"]))
+    return registry, counter, hist, gauge
+
+
+def test_exposition_format():
+    registry, counter, _, gauge = make_registry()
+    counter.inc(endpoint="verify_epic")
+    counter.inc(2, endpoint='say "hi"\n')
+    gauge.set_function(lambda: 7, journal=0)
+
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP t_requests_total Requests", "# TYPE t_requests_total counter"]
+    assert 't_requests_total{endpoint="verify_epic"} 1' in lines
+    assert 't_requests_total{endpoint="say \\"hi\\"\\n"} 2' in lines
+    assert "# TYPE t_seconds histogram" in lines
+    assert 't_backlog{journal="0"} 7' in lines
+    assert registry.render().endswith("\n")
+
+
+def test_histogram_buckets_are_cumulative():
+    registry, _, hist, _ = make_registry()
+    for v in (0.05, 0.5, 0.5, 3.0):
+        hist.observe(v, op="read")
+
+    lines = registry.render().splitlines()
+    assert 't_seconds_bucket{op="read",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{op="read",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{op="read",le="+Inf"} 4' in lines
+    assert 't_seconds_sum{op="read"} 4.05' in lines
+    assert 't_seconds_count{op="read"} 4' in lines
+
+
+def _worker(directory, n):
+    registry, counter, hist, gauge = make_registry()
+    registry.directory = directory
+    counter.inc(n, endpoint="cast_vote")
+    hist.observe(0.5, op="read")
+    gauge.set(1, journal=os.getpid())
+    registry.write_snapshot()
+
+
+@pytest.mark.skipif(os.name != "posix", reason="pre-fork mode is POSIX only")
+def test_workers_are_summed_and_survive_exit(tmp_path):
+    directory = str(tmp_path)
+    ctx = multiprocessing.get_context("fork")
+    pids = []
+    for n in (2, 3):
+        p = ctx.Process(target=_worker, args=(directory, n))
+        p.start()
+        p.join()
+        pids.append(p.pid)
+
+    registry, counter, _, _ = make_registry()
+    registry.directory = directory
+    counter.inc(endpoint="cast_vote")
+
+    lines = registry.render().splitlines()
+    assert 't_requests_total{endpoint="cast_vote"} 6' in lines
+    assert 't_seconds_count{op="read"} 2' in lines
+    assert sum(line.startswith("t_backlog{") for line in lines) == 2
+
+    for pid in pids:
+        mark_process_dead(directory, pid)
+
+    lines = registry.render().splitlines()
+    assert 't_requests_total{endpoint="cast_vote"} 6' in lines   # never goes backwards
+    assert 't_seconds_count{op="read"} 2' in lines
+    assert not any(line.startswith("t_backlog{") for line in lines)
+    assert sorted(os.listdir(directory)) == [".lock", f"{os.getpid()}.json", "dead.json"]
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from otp_store import make_otp_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return make_otp_store(request.param, db_path=str(tmp_path / "otp.db"), max_entries=3,
+                          ttl_seconds=60, rate_capacity=2, rate_refill_seconds=30)
+
+
+def test_issue_and_verify_consumes_the_otp(store):
+    otp = store.issue("9000000001")
+    assert len(otp) == 6
+    assert store.verify("9000000001", "000000" if otp != "000000" else "111111") == "invalid"
+    assert store.verify("9000000001", otp) == "ok"
+    assert store.verify("9000000001", otp) == "missing"
+
+
+def test_expired_otp_is_rejected_and_dropped(store):
+    otp = store.issue("9000000001")
+    store.backend.put("9000000001", otp, time.time() - 1)
+    assert store.verify("9000000001", otp) == "expired"
+    assert len(store) == 0
+
+
+def test_cap_evicts_the_soonest_to_expire(store):
+    now = time.time()
+    for i, mobile in enumerate(["1", "2", "3"]):
+        store.backend.put(mobile, "123456", now + 10 + i)
+    store.backend.put("4", "123456", now + 100)
+
+    assert len(store) == 3
+    assert store.backend.get("1") is None
+    assert store.backend.get("4") is not None
+
+
+def test_sweep_removes_only_expired(store):
+    now = time.time()
+    store.backend.put("1", "123456", now - 5)
+    store.backend.put("2", "123456", now + 60)
+    assert store.backend.sweep(now) == 1
+    assert store.backend.get("2") is not None
+
+
+def test_token_bucket_burst_then_refill(store):
+    now = 1000.0
+    take = lambda t: store.backend.take_token("9000000001", 2, 30, t)
+    assert take(now) and take(now)
+    assert not take(now + 1)
+    assert take(now + 31)
+    assert not take(now + 31)
+
+
+def test_one_otp_is_accepted_by_only_one_worker(tmp_path):
+    workers = [make_otp_store("sqlite", db_path=str(tmp_path / "otp.db")) for _ in range(4)]
+    otp = workers[0].issue("9000000001")
+
+    results = []
+    barrier = threading.Barrier(len(workers))
+
+    def verify(store):
+        barrier.wait()
+        results.append(store.verify("9000000001", otp))
+
+    threads = [threading.Thread(target=verify, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(results) == ["missing"] * 3 + ["ok"]
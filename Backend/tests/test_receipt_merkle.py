@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+pytest.importorskip("eth_hash")
+
+from receipt_merkle import EMPTY_ROOT, MerkleTree, leaf_hash, node_hash, verify_proof  # noqa: E402
+
+
+def rfc6962_root(leaves):
+    """Reference tree hash: split at the largest power of two below n"""
+    if len(leaves) == 1:
+        return leaves[0]
+    k = 1 << (len(leaves) - 1).bit_length() - 1
+    return node_hash(rfc6962_root(leaves[:k]), rfc6962_root(leaves[k:]))
+
+
+def build(n):
+    leaves = [leaf_hash(os.urandom(32).hex(), i % 4) for i in range(n)]
+    tree = MerkleTree()
+    for leaf in leaves:
+        tree.append(leaf)
+    return tree, leaves
+
+
+def test_empty_tree():
+    assert MerkleTree().root() == EMPTY_ROOT
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8, 13, 32, 33, 100])
+def test_root_matches_rfc6962_and_every_proof_verifies(n):
+    tree, leaves = build(n)
+    root = tree.root()
+    assert root == rfc6962_root(leaves)
+    for i, leaf in enumerate(leaves):
+        assert verify_proof(leaf, tree.proof(i), root.hex())
+    assert tree.root(n // 2 or 1) == rfc6962_root(leaves[:n // 2 or 1])
+
+
+def test_proof_fails_for_another_candidate_or_root():
+    receipt = "ab" * 32
+    tree = MerkleTree()
+    tree.append(leaf_hash(receipt, 1))
+    for _ in range(6):
+        tree.append(leaf_hash(os.urandom(32).hex(), 0))
+
+    path = tree.proof(0)
+    assert verify_proof(leaf_hash(receipt, 1), path, tree.root().hex())
+    assert not verify_proof(leaf_hash(receipt, 2), path, tree.root().hex())
+    assert not verify_proof(leaf_hash(receipt, 1), path, tree.root(6).hex())
+
+
+def test_proof_index_out_of_range():
+    tree, _ = build(3)
+    with pytest.raises(IndexError):
+        tree.proof(3)
@@ -0,0 +1,162 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip("requests")
+pytest.importorskip("web3")
+
+from rpc_client import PooledRPCProvider  # noqa: E402
+
+
+class StubNode:
+    """JSON-RPC node on localhost: records every POST body, answers eth_* with a fixed result"""
+
+    def __init__(self, status=200, delay=0.0):
+        self.status = status
+        self.delay = delay
+        self.bodies = []
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                node.bodies.append(body)
+                time.sleep(node.delay)
+                if node.status != 200:
+                    self.send_response(node.status)
+                    self.end_headers()
+                    return
+                answer = lambda r: {"jsonrpc": "2.0", "id": r["id"], "result": "0x10"}
+                out = json.dumps([answer(r) for r in body] if isinstance(body, list) else answer(body)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def requests(self):
+        return [r for b in self.bodies for r in (b if isinstance(b, list) else [b])]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def nodes():
+    made = []
+
+    def make(**kwargs):
+        made.append(StubNode(**kwargs))
+        return made[-1]
+
+    yield make
+    for n in made:
+        n.close()
+
+
+def closed_port_url():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    url = f"http://127.0.0.1:{s.getsockname()[1]}"
+    s.close()
+    return url
+
+
+def test_reads_fail_over_on_5xx_and_timeout(nodes):
+    down, slow, good = nodes(status=503), nodes(delay=0.5), nodes()
+    provider = PooledRPCProvider([down.url, slow.url, good.url], batch_window=0, default_timeout=0.2)
+
+    assert provider.make_request("eth_blockNumber", [])["result"] == "0x10"
+    assert [len(n.requests()) for n in (down, slow, good)] == [1, 1, 1]
+    assert [n.healthy for n in provider.nodes] == [False, False, True]
+
+
+def test_write_is_not_resent_after_a_timeout(nodes):
+    slow, good = nodes(delay=0.5), nodes()
+    provider = PooledRPCProvider([slow.url, good.url], timeouts={"eth_sendRawTransaction": 0.2})
+
+    with pytest.raises(requests.Timeout):
+        provider.make_request("eth_sendRawTransaction", ["0xf86c"])
+    assert len(slow.requests()) == 1
+    assert good.requests() == []
+
+
+def test_write_is_not_resent_after_a_5xx(nodes):
+    down, good = nodes(status=502), nodes()
+    provider = PooledRPCProvider([down.url, good.url])
+
+    with pytest.raises(requests.HTTPError):
+        provider.make_request("eth_sendRawTransaction", ["0xf86c"])
+    assert good.requests() == []
+
+
+def test_write_moves_on_when_the_node_refuses_the_connection(nodes):
+    good = nodes()
+    provider = PooledRPCProvider([closed_port_url(), good.url])
+
+    assert provider.make_request("eth_sendRawTransaction", ["0xf86c"])["result"] == "0x10"
+    assert [r["method"] for r in good.requests()] == ["eth_sendRawTransaction"]
+
+
+def test_concurrent_reads_are_sent_as_one_batch(nodes):
+    node = nodes()
+    provider = PooledRPCProvider([node.url], batch_window=0.05)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.make_request("eth_call", [{}, "latest"])))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(node.bodies) == 1 and len(node.bodies[0]) == 5
+    assert sorted(r["id"] for r in results) == sorted(r["id"] for r in node.bodies[0])
+
+
+def test_writes_are_never_coalesced(nodes):
+    node = nodes()
+    provider = PooledRPCProvider([node.url], batch_window=0.05)
+
+    threads = [threading.Thread(target=provider.make_request, args=("eth_sendRawTransaction", ["0xf86c"]))
+               for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(node.bodies) == 3 and not any(isinstance(b, list) for b in node.bodies)
+
+
+def test_batch_encoding_error_wakes_every_waiter(nodes):
+    node = nodes()
+    provider = PooledRPCProvider([node.url], batch_window=0.05)
+
+    errors = []
+
+    def call(params):
+        try:
+            provider.make_request("eth_call", params)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(p,), daemon=True) for p in ([{}, "latest"], [object()])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert not any(t.is_alive() for t in threads)
+    assert len(errors) == 2 and node.bodies == []
@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+import singletons
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="flock singletons are POSIX only")
+
+
+def _hold(state_dir, name, ready, release):
+    assert singletons.claim(state_dir, name)
+    ready.set()
+    release.wait(10)
+
+
+def test_reload_takes_over_once_the_old_holder_exits(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    ready, release = ctx.Event(), ctx.Event()
+    old_worker = ctx.Process(target=_hold, args=(str(tmp_path), "vote_index_sync", ready, release))
+    old_worker.start()
+    assert ready.wait(10)
+
+    # The new worker imports while the old one still holds the lock
+    started = threading.Event()
+    assert not singletons.run_singleton(str(tmp_path), "vote_index_sync", started.set, retry_seconds=0.05)
+    assert not started.wait(0.3)
+
+    release.set()
+    old_worker.join(10)
+    assert started.wait(5)
+
+
+def test_free_singleton_starts_at_once(tmp_path):
+    started = []
+    assert singletons.run_singleton(str(tmp_path), "broadcast_resume", lambda: started.append(True))
+    assert started == [True]
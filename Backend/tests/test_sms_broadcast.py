@@ -0,0 +1,75 @@
+import time
+
+from sms_broadcast import BroadcastEngine, BroadcastJob, FakeSMSSender, normalize_phone
+
+
+class FlakySender(FakeSMSSender):
+    """Fails the first `failures` attempts per number, then records the send time"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.attempts = {}
+        self.times = []
+
+    def __call__(self, to, body):
+        self.times.append(time.monotonic())
+        self.attempts[to] = self.attempts.get(to, 0) + 1
+        if self.attempts[to] <= self.failures:
+            raise RuntimeError("fake SMS failure")
+        super().__call__(to, body)
+
+
+def wait_finished(engine, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while engine.status(job_id)["state"] != "finished":
+        assert time.time() < deadline, "broadcast did not finish"
+        time.sleep(0.01)
+    return engine.status(job_id)
+
+
+def test_normalize_and_dedupe(tmp_path):
+    assert normalize_phone("98765 43210") == "919876543210"
+    engine = BroadcastEngine(FakeSMSSender(), str(tmp_path), workers=2, rate_per_second=0)
+    job = engine.start("hi", ["9876543210", "+91 98765-43210", "", "9876543211"])
+    assert job.recipients == ["919876543210", "919876543211"]
+    assert wait_finished(engine, job.job_id)["sent"] == 2
+
+
+def test_retries_take_rate_tokens(tmp_path):
+    sender = FlakySender(failures=2)
+    engine = BroadcastEngine(sender, str(tmp_path), workers=4, rate_per_second=50,
+                             max_retries=3, backoff_seconds=0)
+    job = engine.start("hi", [f"90000000{i:02d}" for i in range(5)])
+    status = wait_finished(engine, job.job_id)
+
+    assert (status["sent"], status["failed"]) == (5, 0)
+    # 15 attempts at 50/s: the limiter spaces every one of them, retries included
+    assert len(sender.times) == 15
+    assert sender.times[-1] - sender.times[0] >= 14 / 50 * 0.9
+
+
+def test_status_of_a_job_run_by_another_worker(tmp_path):
+    engine = BroadcastEngine(FakeSMSSender(), str(tmp_path), workers=2, rate_per_second=0)
+    job = engine.start("hi", ["9000000001", "9000000002"])
+    wait_finished(engine, job.job_id)
+
+    other = BroadcastEngine(FakeSMSSender(), str(tmp_path))
+    status = other.status(job.job_id)
+    assert (status["state"], status["sent"], status["pending"]) == ("finished", 2, 0)
+    assert other.status("../../etc/passwd") is None
+    assert other.status("0" * 12) is None
+
+
+def test_resume_skips_numbers_already_sent(tmp_path):
+    job = BroadcastJob("abcdef012345", "hi", ["911", "912", "913"], str(tmp_path))
+    job.save_meta()
+    job.record("911", "sent")
+    job.close()
+
+    sender = FakeSMSSender()
+    engine = BroadcastEngine(sender, str(tmp_path), rate_per_second=0)
+    assert [j.job_id for j in engine.resume_pending()] == ["abcdef012345"]
+    status = wait_finished(engine, "abcdef012345")
+    assert status["sent"] == 3
+    assert sorted(to for to, _ in sender.sent) == ["+912", "+913"]
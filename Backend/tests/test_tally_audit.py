@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from tally_audit import after_last_reset, check_index, duplicate_receipts, merge_chunks, read_index_range, tally  # noqa: E402
+from vote_index import VoteIndex  # noqa: E402
+
+
+def vote(index, receipt, block, booth, candidate):
+    index.add_log({
+        "args": {"receiptHash": bytes.fromhex(receipt), "pollingBoothId": booth, "candidateId": candidate},
+        "transactionHash": bytes([block]) * 32, "blockNumber": block, "logIndex": 0
+    })
+
+
+def test_index_audit_counts_only_votes_after_the_last_reset(tmp_path):
+    path = str(tmp_path / "vote_index.db")
+    index = VoteIndex(path)
+    vote(index, "aa" * 32, 1, "PB-1", 1)
+    vote(index, "bb" * 32, 2, "PB-2", 2)
+    index.add_reset({"blockNumber": 3, "logIndex": 0})
+    vote(index, "aa" * 32, 4, "PB-1", 2)
+    vote(index, "cc" * 32, 5, "PB-1", 2)
+    index._set_last_block(5)
+
+    assert check_index(path) == 5
+    chunks = [read_index_range(path, s, e) for s, e in ((0, 2), (3, 5))]
+    events, reset = after_last_reset(merge_chunks(chunks))
+
+    assert reset == (3, 0)
+    assert tally(events) == {"PB-1": {2: 2}}
+    assert duplicate_receipts(events) == []
+
+
+def test_index_without_resets_table_is_refused(tmp_path):
+    path = str(tmp_path / "old_index.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE votes (receipt_hash TEXT PRIMARY KEY, block_number INTEGER)")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(SystemExit):
+        check_index(path)
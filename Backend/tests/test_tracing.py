@@ -0,0 +1,29 @@
+import os
+
+from tracing import Tracer, summarize, percentile
+
+
+def test_spans_go_to_a_per_process_file(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    t = Tracer(path)
+    assert t.start_span("stage.cast_vote", trace_id="t1") is None   # not enabled yet
+
+    t.enable()
+    try:
+        with t.span("stage.cast_vote", trace_id="t1"):
+            with t.span("rpc.send"):
+                pass
+    finally:
+        for h in list(t._logger.handlers):
+            t._logger.removeHandler(h)
+            h.close()
+
+    assert os.listdir(tmp_path) == [f"trace.jsonl.{os.getpid()}"]
+    sessions, rows = summarize(path)
+    assert sessions == 1
+    assert sorted(r["name"] for r in rows) == ["rpc.send", "stage.cast_vote"]
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
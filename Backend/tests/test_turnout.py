@@ -0,0 +1,42 @@
+from turnout import RingSeries, TurnoutTracker
+from vote_index import VoteIndex
+
+
+def test_ring_counts_and_rolls_over():
+    ring = RingSeries(60, 4)
+    assert ring.add(0) and ring.add(59) and ring.add(60)
+    assert ring.buckets(now=60) == [[-120, 0], [-60, 0], [0, 2], [60, 1]]
+
+    assert ring.add(240)                 # 3 buckets later: 60 and 120, 180 zeroed on the way
+    assert ring.buckets(now=240) == [[60, 1], [120, 0], [180, 0], [240, 1]]
+    assert not ring.add(0)               # rolled out of the ring
+    assert ring.add(120, n=5)            # still inside
+    assert ring.buckets(now=240, last=2) == [[180, 0], [240, 1]]
+
+
+def test_ring_jump_past_whole_window_clears_everything():
+    ring = RingSeries(60, 4)
+    ring.add(0, n=3)
+    ring.add(60 * 100)
+    assert [c for _, c in ring.buckets(now=6000)] == [0, 0, 0, 1]
+    assert [c for _, c in ring.buckets(now=6000 + 600)] == [0, 0, 0, 0]
+
+
+def test_tracker_refresh_counts_timed_votes_only(tmp_path):
+    index = VoteIndex(str(tmp_path / "vote_index.db"))
+    for n, (block, booth) in enumerate(((1, "PB-1"), (1, "PB-2"), (2, "PB-1"))):
+        index.add_log({
+            "args": {"receiptHash": bytes([n]) * 32, "pollingBoothId": booth, "candidateId": 1},
+            "transactionHash": bytes([n]) * 32, "blockNumber": block, "logIndex": n
+        })
+    index._conn.execute("INSERT INTO block_times VALUES (1, 600)")
+    index._conn.commit()
+    index._set_last_block(2)
+
+    tracker = TurnoutTracker()
+    assert tracker.refresh(index) == 2     # block 2 has no timestamp yet
+    assert tracker.block == 1
+    assert tracker.booth_totals() == {"PB-1": 1, "PB-2": 1}
+
+    snap = tracker.snapshot(resolution="1m", last=3, now=660)
+    assert snap["total"] == 2 and snap["buckets"] == [[540, 0], [600, 2], [660, 0]]
@@ -0,0 +1,99 @@
+from receipt_merkle import ReceiptForest
+from vote_index import VoteIndex
+from vote_verifier import VoteVerifier
+from voted_filter import VotedFilter
+
+EPIC_A = "aa" * 32
+EPIC_B = "bb" * 32
+
+
+def vote_log(receipt, block, log_index, booth="B1", candidate=1, tx=None):
+    return {
+        "args": {"receiptHash": bytes.fromhex(receipt), "pollingBoothId": booth, "candidateId": candidate},
+        "transactionHash": bytes.fromhex(tx or f"{block:030x}{log_index:034x}"),
+        "blockNumber": block,
+        "logIndex": log_index
+    }
+
+
+def reset_log(block, log_index):
+    return {"args": {}, "blockNumber": block, "logIndex": log_index}
+
+
+def test_revote_after_reset_is_kept(tmp_path):
+    index = VoteIndex(str(tmp_path / "vote_index.db"))
+    index.add_log(vote_log(EPIC_A, 10, 0, candidate=1))
+    index.add_log(vote_log(EPIC_B, 10, 1, candidate=2))
+    index.add_reset(reset_log(20, 0))
+    index.add_log(vote_log(EPIC_A, 30, 0, candidate=3))
+
+    assert index.last_reset() == (20, 0)
+    assert index.by_receipt(EPIC_A)["candidate_id"] == 3
+    assert index.by_receipt(EPIC_B) is None
+    assert index.vote_counts("B1") == {3: 1}
+    assert index.count() == 1
+    assert index.receipts_since(0) == [EPIC_A]
+
+
+def test_vote_in_reset_block_before_reset_does_not_count(tmp_path):
+    index = VoteIndex(str(tmp_path / "vote_index.db"))
+    index.add_log(vote_log(EPIC_A, 20, 0))
+    index.add_reset(reset_log(20, 1))
+    index.add_log(vote_log(EPIC_B, 20, 2))
+
+    assert index.by_receipt(EPIC_A) is None
+    assert [r[0] for r in index.ordered_votes(0, 100)] == [EPIC_B]
+
+
+def test_shard_index_keeps_only_its_booth(tmp_path):
+    index = VoteIndex(str(tmp_path / "vote_index.db"), booth="B1")
+    assert index.add_log(vote_log(EPIC_A, 10, 0, booth="B1")) is not None
+    assert index.add_log(vote_log(EPIC_B, 10, 1, booth="B2")) is None
+
+    assert index.count() == 1
+    assert index.by_receipt(EPIC_B) is None
+    assert index.receipts_since(0) == [EPIC_A]
+
+
+def test_consumers_rebuild_after_reset(tmp_path):
+    index = VoteIndex(str(tmp_path / "vote_index.db"))
+    index._set_last_block(10)
+    index.add_log(vote_log(EPIC_A, 10, 0, candidate=1))
+
+    forest = ReceiptForest(str(tmp_path / "merkle_roots.db"))
+    voted = VotedFilter(100)
+    forest.refresh(index)
+    voted.refresh(index)
+    forest.publish()
+    assert forest.proof(EPIC_A)["candidate_id"] == 1
+    assert voted.might_have_voted(EPIC_A)
+
+    index.add_reset(reset_log(20, 0))
+    index.add_log(vote_log(EPIC_A, 30, 0, candidate=2))
+    index._set_last_block(30)
+    forest.refresh(index)
+    voted.refresh(index)
+    forest.publish()
+
+    proof = forest.proof(EPIC_A)
+    assert (proof["candidate_id"], proof["leaf_index"], proof["epoch"]) == (2, 0, 20)
+    assert [r["epoch"] for r in forest.published("B1")] == [20, -1]
+    assert len(voted) == 1
+
+
+class _Unreachable:
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected chain call: {name}")
+
+
+def test_verifier_drops_cached_votes_after_reset(tmp_path):
+    index = VoteIndex(str(tmp_path / "vote_index.db"))
+    index.add_log(vote_log(EPIC_A, 10, 0, candidate=1))
+
+    verifier = VoteVerifier(_Unreachable(), _Unreachable(), _Unreachable(), vote_index=index)
+    verifier._candidates = {("B1", 1): ("One", "P1"), ("B1", 2): ("Two", "P2")}
+    assert verifier.by_receipt(EPIC_A)["candidate_id"] == 1
+
+    index.add_reset(reset_log(20, 0))
+    index.add_log(vote_log(EPIC_A, 30, 0, candidate=2))
+    assert verifier.by_receipt(EPIC_A)["candidate_id"] == 2
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from vote_index import VoteIndex
+from voted_filter import BloomFilter, VotedFilter
+
+
+@pytest.mark.parametrize("kind", ["set", "bloom"])
+def test_no_false_negatives(kind):
+    f = VotedFilter(2000, kind=kind)
+    voted = [os.urandom(32) for _ in range(2000)]
+    for d in voted:
+        f.add(d)
+    assert all(f.might_have_voted(d) for d in voted)
+    assert f.might_have_voted(voted[0].hex())
+    assert len(f) <= 2000
+
+
+def test_bloom_false_positive_rate_is_near_target():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for _ in range(10000):
+        bloom.add(os.urandom(32))
+    false_positives = sum(os.urandom(32) in bloom for _ in range(20000))
+    assert false_positives / 20000 < 0.03
+
+
+def test_set_settles_bloom_false_positives():
+    f = VotedFilter(10, error_rate=0.5)
+    voted = [os.urandom(32) for _ in range(200)]   # far past capacity: the bit array saturates
+    for d in voted:
+        f.add(d)
+    others = [os.urandom(32) for _ in range(2000)]
+    assert sum(d in f._bloom for d in others) > 1000
+    assert not any(f.might_have_voted(d) for d in others)
+    assert all(f.might_have_voted(d) for d in voted)
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        VotedFilter(10, kind="cuckoo")
+
+
+def test_refresh_reads_new_votes_from_the_index(tmp_path):
+    index = VoteIndex(str(tmp_path / "vote_index.db"))
+    f = VotedFilter(100)
+
+    def vote(receipt, block):
+        index.add_log({
+            "args": {"receiptHash": bytes.fromhex(receipt), "pollingBoothId": "PB-1", "candidateId": 1},
+            "transactionHash": os.urandom(32), "blockNumber": block, "logIndex": 0
+        })
+
+    vote("aa" * 32, 5)
+    index._set_last_block(5)
+    assert f.refresh(index) == 1
+
+    vote("bb" * 32, 9)            # cast_vote indexes its own log before sync reaches block 9
+    assert f.refresh(index) == 1
+    assert f.might_have_voted("bb" * 32)
+    assert not f.might_have_voted("cc" * 32)
@@ -0,0 +1,47 @@
+import csv
+import os
+import time
+
+from voter_store import VoterStore, VOTER_FIELDS
+
+
+def write_roll(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=VOTER_FIELDS)
+        writer.writeheader()
+        for epic, booth, phone in rows:
+            writer.writerow({"EPIC_ID": epic, "Name": epic.lower(), "Polling_Booth_ID": booth, "Phone_Number": phone})
+
+
+def test_hand_edit_is_picked_up_by_the_watcher(tmp_path):
+    roll = str(tmp_path / "voters.csv")
+    write_roll(roll, [("ABC0000001", "PB-1", "+91 90000 00001")])
+    store = VoterStore(str(tmp_path / "voters.db"), roll)
+    assert store.sync_csv()
+    assert not store.sync_csv()
+    assert store.by_phone("919000000001")["EPIC_ID"] == "ABC0000001"
+
+    store.start_watch(interval=0.05)
+    write_roll(roll, [("ABC0000001", "PB-1", "9000000001"), ("ABC0000002", "PB-2", "9000000002")])
+    os.utime(roll, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+    deadline = time.time() + 5
+    while store.count() != 2:
+        assert time.time() < deadline, "CSV edit was not re-imported"
+        time.sleep(0.02)
+    assert store.booths() and sorted(store.booths()) == ["PB-1", "PB-2"]
+
+
+def test_keyset_pages_cover_the_booth(tmp_path):
+    roll = str(tmp_path / "voters.csv")
+    write_roll(roll, [(f"ABC{i:07d}", "PB-1", f"90000{i:05d}") for i in range(25)])
+    store = VoterStore(str(tmp_path / "voters.db"), roll)
+    store.sync_csv()
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = store.page("PB-1", cursor, limit=10, fields=["Name"])
+        seen += [r["EPIC_ID"] for r in rows]
+        if cursor is None:
+            break
+    assert seen == sorted(f"ABC{i:07d}" for i in range(25))
@@ -0,0 +1,175 @@
+import argparse
+import contextvars
+import glob
+import json
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# ------------------------------
+# Lightweight voter-journey tracing
+# ------------------------------
+# A trace ID is minted when a voter starts at /verify-epic and follows them
+# through /verify-face, /get-candidates and /cast-vote. Every stage and every
+# RPC / model call inside it becomes a span, written as one JSON line to a
+# rotating local file. `python tracing.py summary` prints p50/p95/p99.
+#
+# Spans are only written once the server calls tracer.enable() (app.py
+# does); tools that import the face or RPC modules trace nothing. Each
+# process writes and rotates its own <TRACE_FILE>.<pid>, so gunicorn
+# workers never rotate a file another worker still has open.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TRACE_FILE = os.path.join(PROJECT_ROOT, "Dataset", "traces", "trace.jsonl")
+
+_current = contextvars.ContextVar("evote_span", default=None)
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+
+    def __init__(self, tracer, name, trace_id, parent_id, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _current.set(self)
+
+    def end(self, **attrs):
+        duration = time.perf_counter() - self._t0
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            _current.set(None)   # ended from a different context
+        self.attrs.update(attrs)
+        self.tracer.write({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(duration * 1000, 3),
+            **({"attrs": self.attrs} if self.attrs else {})
+        })
+
+
+class Tracer:
+
+    def __init__(self, path=DEFAULT_TRACE_FILE, max_bytes=10 * 1024 * 1024, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.enabled = False
+        self._logger = logging.getLogger("evote.trace")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+
+    def enable(self):
+        """Start writing spans to this process's own file"""
+        if self.enabled:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        handler = RotatingFileHandler(f"{self.path}.{os.getpid()}", maxBytes=self.max_bytes,
+                                      backupCount=self.backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+        self.enabled = True
+
+    def write(self, record):
+        self._logger.info(json.dumps(record, default=str))
+
+    def start_span(self, name, trace_id=None, **attrs):
+        """Child of the current span; a new root if trace_id is given. None when untraced."""
+        parent = _current.get()
+        trace_id = trace_id or (parent.trace_id if parent else None)
+        if not self.enabled or trace_id is None:
+            return None
+        parent_id = parent.span_id if parent and parent.trace_id == trace_id else None
+        return Span(self, name, trace_id, parent_id, attrs)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        s = self.start_span(name, **attrs)
+        try:
+            yield s
+        finally:
+            if s is not None:
+                s.end()
+
+
+tracer = Tracer(os.getenv("TRACE_FILE", DEFAULT_TRACE_FILE))
+span = tracer.span
+
+
+def current_trace_id():
+    s = _current.get()
+    return s.trace_id if s else None
+
+
+# ------------------------------
+# Summary CLI
+# ------------------------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(path):
+    """Every process's file (and rotated backup) for `path`"""
+    durations = defaultdict(list)
+    traces = set()
+
+    for f in sorted(glob.glob(path + "*")):
+        with open(f, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                durations[rec["name"]].append(rec["duration_ms"])
+                traces.add(rec["trace_id"])
+
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append({
+            "name": name,
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99)
+        })
+    rows.sort(key=lambda r: r["p95"], reverse=True)
+    return len(traces), rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency summary from trace files")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("--file", default=os.getenv("TRACE_FILE", DEFAULT_TRACE_FILE))
+    parser.add_argument("--json", help="also write the summary to this file (input for capacity_sim.py)")
+    args = parser.parse_args()
+
+    n_traces, rows = summarize(args.file)
+    print(f"📈 {n_traces} voter sessions")
+    print(f"{'span':40} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for r in rows:
+        print(f"{r['name']:40} {r['count']:>7} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['p99']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"trace_summary": {"sessions": n_traces, "spans": rows}}, f, indent=2)
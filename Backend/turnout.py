@@ -0,0 +1,174 @@
+import threading
+import time
+from array import array
+
+# ------------------------------
+# Turnout time-series
+# ------------------------------
+# Votes per time bucket, per booth and for all booths together, built from
+# the VoteCast events in the vote index (timestamped by their block). Each
+# series keeps three fixed-size rings, so memory per booth is constant for
+# the whole election day no matter how many votes arrive:
+#
+#   1m   1440 buckets  (24 hours)
+#   15m    96 buckets  (24 hours)
+#   1h    168 buckets  (7 days)
+#
+# A vote bumps one counter in each ring; moving a ring forward only zeroes
+# the buckets that elapsed, so updates are O(1) amortised.
+
+RESOLUTIONS = {
+    "1m": (60, 1440),
+    "15m": (900, 96),
+    "1h": (3600, 168)
+}
+
+
+class RingSeries:
+    """Counts per `step` seconds for the last `slots` buckets"""
+
+    __slots__ = ("step", "slots", "counts", "head")
+
+    def __init__(self, step, slots):
+        self.step = step
+        self.slots = slots
+        self.counts = array("I", [0]) * slots
+        self.head = None   # absolute bucket number of the newest bucket
+
+    def add(self, timestamp, n=1):
+        """False if the bucket has already rolled out of the ring"""
+        bucket = int(timestamp) // self.step
+        if self.head is None:
+            self.head = bucket
+        elif bucket > self.head:
+            if bucket - self.head >= self.slots:
+                self.counts = array("I", [0]) * self.slots
+            else:
+                for b in range(self.head + 1, bucket + 1):
+                    self.counts[b % self.slots] = 0
+            self.head = bucket
+        elif bucket <= self.head - self.slots:
+            return False
+
+        self.counts[bucket % self.slots] += n
+        return True
+
+    def buckets(self, now=None, last=None):
+        """[[bucket start (unix seconds), votes], ...] oldest first, ending at `now`"""
+        last = min(last or self.slots, self.slots)
+        end = int(now if now is not None else time.time()) // self.step
+        if self.head is not None:
+            end = max(end, self.head)
+
+        out = []
+        for b in range(end - last + 1, end + 1):
+            live = self.head is not None and self.head - self.slots < b <= self.head
+            out.append([b * self.step, self.counts[b % self.slots] if live else 0])
+        return out
+
+
+class TurnoutSeries:
+
+    __slots__ = ("total", "rings")
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.total = 0
+        self.rings = {name: RingSeries(step, slots) for name, (step, slots) in resolutions.items()}
+
+    def add(self, timestamp, n=1):
+        self.total += n
+        for ring in self.rings.values():
+            ring.add(timestamp, n)
+
+    def nbytes(self):
+        return sum(r.counts.itemsize * r.slots for r in self.rings.values())
+
+
+class TurnoutTracker:
+
+    def __init__(self, resolutions=RESOLUTIONS):
+        self.resolutions = resolutions
+        self.all = TurnoutSeries(resolutions)
+        self.booths = {}      # booth -> TurnoutSeries
+        self.block = -1       # last vote index block included
+        self.reset = None     # last VotingReset (block, log index) counted from
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, booth, timestamp, n=1):
+        with self._lock:
+            series = self.booths.get(booth)
+            if series is None:
+                series = self.booths[booth] = TurnoutSeries(self.resolutions)
+            series.add(timestamp, n)
+            self.all.add(timestamp, n)
+
+    def refresh(self, vote_index):
+        """Count votes from blocks the index has fully synced (and timestamped) since the last refresh"""
+        reset = vote_index.last_reset()
+        if reset != self.reset:
+            # Votes before a VotingReset no longer count: start the series again
+            with self._lock:
+                self.all = TurnoutSeries(self.resolutions)
+                self.booths = {}
+            self.block = -1
+            self.reset = reset
+
+        synced = vote_index.last_block()
+        if synced <= self.block:
+            return 0
+
+        added = 0
+        upto = synced
+        for block, timestamp, booth in vote_index.timed_votes(self.block + 1, synced):
+            if timestamp is None:
+                # block time not fetched yet: stop here and pick it up next refresh
+                upto = block - 1
+                break
+            self.add(booth, timestamp)
+            added += 1
+        self.block = upto
+        return added
+
+    def snapshot(self, booth=None, resolution="1m", last=None, now=None):
+        if resolution not in self.resolutions:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        step = self.resolutions[resolution][0]
+
+        with self._lock:
+            series = self.all if booth is None else self.booths.get(booth)
+            total = series.total if series else 0
+            buckets = series.rings[resolution].buckets(now, last) if series else \
+                RingSeries(step, self.resolutions[resolution][1]).buckets(now, last)
+
+        minutes = len(buckets) * step / 60
+        return {
+            "booth": booth,
+            "resolution": resolution,
+            "step_seconds": step,
+            "total": total,
+            "votes_per_minute": round(sum(c for _, c in buckets) / minutes, 3) if minutes else 0.0,
+            "block": self.block,
+            "buckets": buckets
+        }
+
+    def booth_totals(self):
+        with self._lock:
+            return {booth: s.total for booth, s in sorted(self.booths.items())}
+
+    def nbytes(self):
+        with self._lock:
+            return self.all.nbytes() + sum(s.nbytes() for s in self.booths.values())
+
+    def start(self, vote_index, interval=5):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh(vote_index)
+                except Exception as e:
+                    print("❌ Turnout refresh error:", e)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
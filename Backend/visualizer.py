@@ -7,6 +7,7 @@ from flask import Flask,  jsonify
 from flask_cors import CORS
 from web3 import Web3
 from dotenv import load_dotenv
+from rpc_client import provider_from_env
 import numpy as np
 import secrets
 
@@ -38,7 +39,7 @@ CORS(app)
 # ------------------------------
 # Blockchain setup
 # ------------------------------
-w3 = Web3(Web3.HTTPProvider(ALCHEMY_URL))
+w3 = Web3(provider_from_env())   # pooled, batching, RPC_URLS fail-over
 assert w3.is_connected()
 
 with open("VotingABI.json") as f:
@@ -121,4 +122,5 @@ def results(booth, candidate):
     })
 
 if __name__ == "__main__":
-    app.run(port=5001,debug=True)
+    # Development server only; production: gunicorn -b 0.0.0.0:5001 -w 2 visualizer:app
+    app.run(port=5001, debug=os.getenv("FLASK_DEBUG", "1") == "1")
@@ -0,0 +1,240 @@
+import os
+import sqlite3
+import threading
+import time
+
+from receipt_store import normalize_hash
+from metrics import STORAGE_SECONDS
+
+# ------------------------------
+# Local VoteCast event index
+# ------------------------------
+# Mirrors the Voting contract's VoteCast logs into SQLite so reads that only
+# need "which booth / candidate did this receipt vote for" never touch RPC.
+# A background thread tails new blocks in fixed-size chunks.
+#
+# Votes are keyed by their chain position (block, log index), not by
+# receipt: after a VotingReset the same EPIC can vote again, and only votes
+# after the last reset count. Every read below applies that cut-off.
+#
+# A booth-shard kiosk passes booth=<its booth>: only that booth's votes are
+# kept, so the index and everything fed from it (voted filter, Merkle trees,
+# turnout) grow with the booth rather than the state.
+
+
+VOTE_COLUMNS = ["receipt_hash", "tx_hash", "block_number", "log_index", "booth", "candidate_id"]
+
+# No VotingReset at or after this vote
+LIVE = ("NOT EXISTS (SELECT 1 FROM resets r WHERE (r.block_number, r.log_index) "
+        ">= (votes.block_number, votes.log_index))")
+
+
+def _hex(value):
+    return value.hex() if hasattr(value, "hex") else str(value)
+
+
+class VoteIndex:
+
+    def __init__(self, db_path, start_block=0, chunk_size=2000, booth=None):
+        self.db_path = db_path
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.booth = booth
+        self._lock = threading.Lock()
+        self._thread = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS votes (
+                receipt_hash TEXT NOT NULL,
+                tx_hash TEXT NOT NULL,
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                booth TEXT NOT NULL,
+                candidate_id INTEGER NOT NULL,
+                PRIMARY KEY (block_number, log_index)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS votes_receipt ON votes (receipt_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS votes_tx ON votes (tx_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS votes_booth ON votes (booth, candidate_id)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS resets (
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                PRIMARY KEY (block_number, log_index)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        # VoteCast carries no time of its own; blocks holding votes get their timestamp here
+        self._conn.execute("CREATE TABLE IF NOT EXISTS block_times (block_number INTEGER PRIMARY KEY, timestamp INTEGER NOT NULL)")
+        self._conn.commit()
+
+    # ---------------- Write ----------------
+    def covers(self, booth):
+        return self.booth is None or booth == self.booth
+
+    def add_log(self, log):
+        """Index one decoded VoteCast log (from get_logs or process_receipt); None if its booth is not kept"""
+        args = log["args"]
+        if not self.covers(args["pollingBoothId"]):
+            return None
+        vote = {
+            "receipt_hash": normalize_hash(_hex(args["receiptHash"])),
+            "tx_hash": normalize_hash(_hex(log["transactionHash"])),
+            "block_number": int(log["blockNumber"]),
+            "log_index": int(log["logIndex"]),
+            "booth": args["pollingBoothId"],
+            "candidate_id": int(args["candidateId"])
+        }
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO votes VALUES (?, ?, ?, ?, ?, ?)",
+                tuple(vote.values())
+            )
+            self._conn.commit()
+
+        return vote
+
+    def add_reset(self, log):
+        """Record one VotingReset log: every vote before it stops counting"""
+        position = (int(log["blockNumber"]), int(log["logIndex"]))
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO resets VALUES (?, ?)", position)
+            self._conn.commit()
+        return position
+
+    def last_reset(self):
+        """(block, log index) of the latest VotingReset indexed, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT block_number, log_index FROM resets ORDER BY block_number DESC, log_index DESC LIMIT 1"
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def last_block(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'last_block'").fetchone()
+        return row[0] if row else self.start_block - 1
+
+    def _set_last_block(self, block):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_block', ?)", (block,))
+            self._conn.commit()
+
+    def _record_block_times(self, w3, blocks):
+        with self._lock:
+            known = {r[0] for r in self._conn.execute(
+                f"SELECT block_number FROM block_times WHERE block_number IN ({','.join('?' * len(blocks))})",
+                tuple(blocks)
+            )} if blocks else set()
+        missing = sorted(set(blocks) - known)
+        if not missing:
+            return
+
+        times = [(b, int(w3.eth.get_block(b)["timestamp"])) for b in missing]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO block_times VALUES (?, ?)", times)
+            self._conn.commit()
+
+    # ---------------- Sync ----------------
+    def sync(self, w3, voting_contract):
+        """Pull VoteCast logs from the last indexed block up to the chain head"""
+        head = w3.eth.block_number
+        start = self.last_block() + 1
+        added = 0
+
+        while start <= head:
+            end = min(start + self.chunk_size - 1, head)
+            # Resets first: a vote and a later reset in the same chunk never show as live
+            for log in voting_contract.events.VotingReset.get_logs(from_block=start, to_block=end):
+                self.add_reset(log)
+            blocks = set()
+            for log in voting_contract.events.VoteCast.get_logs(from_block=start, to_block=end):
+                if self.add_log(log) is not None:
+                    blocks.add(int(log["blockNumber"]))
+                    added += 1
+            self._record_block_times(w3, blocks)
+            self._set_last_block(end)
+            start = end + 1
+
+        return added
+
+    def start_sync(self, w3, voting_contract, interval=5):
+        def loop():
+            while True:
+                try:
+                    added = self.sync(w3, voting_contract)
+                    if added:
+                        print(f"📚 Indexed {added} VoteCast events")
+                except Exception as e:
+                    print("❌ Vote index sync error:", e)
+                time.sleep(interval)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
+
+    # ---------------- Read ----------------
+    def _query(self, where, value):
+        """Latest live vote matching `where`"""
+        with self._lock, STORAGE_SECONDS.time(op="vote_index"):
+            row = self._conn.execute(
+                "SELECT receipt_hash, tx_hash, block_number, log_index, booth, candidate_id "
+                f"FROM votes WHERE {where} = ? AND {LIVE} "
+                "ORDER BY block_number DESC, log_index DESC LIMIT 1",
+                (value,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(VOTE_COLUMNS, row))
+
+    def by_receipt(self, receipt_hash):
+        return self._query("receipt_hash", normalize_hash(receipt_hash))
+
+    def by_tx(self, tx_hash):
+        return self._query("tx_hash", normalize_hash(tx_hash))
+
+    def vote_counts(self, booth):
+        """candidate_id -> votes for one booth, as seen by the index"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT candidate_id, COUNT(*) FROM votes WHERE booth = ? AND {LIVE} GROUP BY candidate_id",
+                (booth,)
+            ).fetchall()
+        return dict(rows)
+
+    def receipts_since(self, block):
+        """Receipt hashes of every vote indexed at or after `block`"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT receipt_hash FROM votes WHERE block_number >= ? AND {LIVE}", (block,)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def ordered_votes(self, from_block, to_block):
+        """(receipt_hash, booth, candidate_id) for a block range, in chain order"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT receipt_hash, booth, candidate_id FROM votes "
+                f"WHERE block_number BETWEEN ? AND ? AND {LIVE} ORDER BY block_number, log_index",
+                (from_block, to_block)
+            ).fetchall()
+
+    def timed_votes(self, from_block, to_block):
+        """(block_number, block timestamp or None, booth) for a block range, in chain order"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT votes.block_number, t.timestamp, votes.booth FROM votes LEFT JOIN block_times t USING (block_number) "
+                f"WHERE votes.block_number BETWEEN ? AND ? AND {LIVE} ORDER BY votes.block_number, votes.log_index",
+                (from_block, to_block)
+            ).fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM votes WHERE {LIVE}").fetchone()[0]
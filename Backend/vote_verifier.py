@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+
+from receipt_store import normalize_hash
+from metrics import cache_lookup
+
+# ------------------------------
+# Vote verification service
+# ------------------------------
+# A confirmed vote never changes until the next VotingReset, so every
+# successful lookup is cached until the vote index sees a new reset.
+# Identical lookups that arrive while one is in
+# flight wait for that single call instead of issuing their own RPC.
+# Misses and errors are never cached (the vote may still be pending).
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class VoteVerifier:
+
+    def __init__(self, voting_contract, ec_contract, w3, vote_index=None, cache_size=100000):
+        self.voting_contract = voting_contract
+        self.ec_contract = ec_contract
+        self.w3 = w3
+        self.vote_index = vote_index
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._reset = None
+        self._lock = threading.Lock()
+
+        # (booth, candidate_id) -> (name, party); candidate metadata is immutable
+        self._candidates = {}
+
+    # ---------------- Cache + coalescing ----------------
+    def _lookup(self, key, fetch):
+        reset = self.vote_index.last_reset() if self.vote_index is not None else None
+        with self._lock:
+            if reset != self._reset:
+                # Votes cached before a VotingReset are no longer counted
+                self._cache.clear()
+                self._reset = reset
+
+            cache_lookup("vote_verify_cache", key in self._cache)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fetch()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if call.error is None and call.result is not None:
+                    self._cache[key] = call.result
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            call.done.set()
+
+        return call.result
+
+    def candidate(self, booth, candidate_id):
+        key = (booth, int(candidate_id))
+        if key not in self._candidates:
+            c = self.ec_contract.functions.candidates(booth, int(candidate_id)).call()
+            self._candidates[key] = (c[1], c[2])
+        return self._candidates[key]
+
+    def _result(self, booth, candidate_id):
+        name, party = self.candidate(booth, candidate_id)
+        return {
+            "booth_id": booth,
+            "candidate_id": int(candidate_id),
+            "candidate_name": name,
+            "party": party
+        }
+
+    # ---------------- By receipt (epicHash) ----------------
+    def by_receipt(self, receipt_hash):
+        key = ("receipt", normalize_hash(receipt_hash))
+        return self._lookup(key, lambda: self._fetch_by_receipt(key[1]))
+
+    def _fetch_by_receipt(self, receipt_hash):
+        if self.vote_index is not None:
+            vote = self.vote_index.by_receipt(receipt_hash)
+            if vote is not None:
+                return self._result(vote["booth"], vote["candidate_id"])
+
+        booth, candidate_id, candidate_name, party = (
+            self.voting_contract.functions.verifyMyVote(bytes.fromhex(receipt_hash)).call()
+        )
+        self._candidates.setdefault((booth, int(candidate_id)), (candidate_name, party))
+        return self._result(booth, candidate_id)
+
+    # ---------------- By transaction hash ----------------
+    def by_tx(self, tx_hash):
+        key = ("tx", normalize_hash(tx_hash))
+        return self._lookup(key, lambda: self._fetch_by_tx(key[1]))
+
+    def _fetch_by_tx(self, tx_hash):
+        if self.vote_index is not None:
+            vote = self.vote_index.by_tx(tx_hash)
+            if vote is not None:
+                return self._result(vote["booth"], vote["candidate_id"])
+
+        receipt = self.w3.eth.get_transaction_receipt("0x" + tx_hash)
+        logs = self.voting_contract.events.VoteCast().process_receipt(receipt)
+        if not logs:
+            return None
+
+        event = logs[0]["args"]
+        if self.vote_index is not None:
+            if self.vote_index.add_log(logs[0]) is not None:
+                # Indexed now: None when a later VotingReset voided it
+                vote = self.vote_index.by_tx(tx_hash)
+                return self._result(vote["booth"], vote["candidate_id"]) if vote else None
+            # Another booth than this shard's index keeps: apply the reset cut-off here
+            reset = self.vote_index.last_reset()
+            if reset is not None and (int(logs[0]["blockNumber"]), int(logs[0]["logIndex"])) <= reset:
+                return None
+
+        return self._result(event["pollingBoothId"], event["candidateId"])
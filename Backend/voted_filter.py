@@ -0,0 +1,132 @@
+import math
+import threading
+import time
+
+from receipt_store import normalize_hash
+
+# ------------------------------
+# Local "already voted" filter
+# ------------------------------
+# The Voting contract keys votes by keccak(EPIC), and that same hash is the
+# VoteCast receiptHash the vote index already mirrors. Keeping those hashes
+# in memory lets /verify-epic turn away a voter who has already voted
+# before any face model or RPC call runs.
+#
+# Only "no" answers are trusted. A "maybe" (Bloom false positive, or a stale
+# entry after resetVotingRecords) is always confirmed with hasVoted() on
+# chain, so the filter can never block someone who has not voted.
+#
+#   set   - a Bloom filter in front of an exact set of 64-bit hash prefixes:
+#           most voters are cleared by the bit array alone, and a Bloom
+#           "maybe" is settled by the set, so only real voters cost an RPC
+#   bloom - the bit array alone, fixed ~1.8 bytes per voter at 0.1% false
+#           positives, for booths where the set's memory matters more
+
+
+def _digest(epic_hash):
+    if isinstance(epic_hash, (bytes, bytearray)):
+        return bytes(epic_hash)
+    return bytes.fromhex(normalize_hash(epic_hash))
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        # keccak output is already uniform: double hashing over two 64-bit words
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest):
+        for p in self._positions(digest):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+
+class VotedFilter:
+
+    def __init__(self, capacity, error_rate=0.001, kind="set"):
+        if kind not in ("set", "bloom"):
+            raise ValueError(f"Unknown voted filter: {kind}")
+        self.kind = kind
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._prefixes = set() if kind == "set" else None
+        self._count = 0
+        self._watermark = -1
+        self._reset = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __len__(self):
+        return self._count
+
+    def add(self, epic_hash):
+        digest = _digest(epic_hash)
+        with self._lock:
+            if self._prefixes is not None:
+                key = int.from_bytes(digest[:8], "big")
+                if key in self._prefixes:
+                    return
+                self._prefixes.add(key)
+            elif digest in self._bloom:
+                return
+            self._bloom.add(digest)
+            self._count += 1
+
+    def might_have_voted(self, epic_hash):
+        """False means definitely not voted; True must be confirmed on chain"""
+        digest = _digest(epic_hash)
+        if digest not in self._bloom:
+            return False
+        if self._prefixes is not None:
+            return int.from_bytes(digest[:8], "big") in self._prefixes
+        return True
+
+    # ---------------- Vote index feed ----------------
+    def clear(self):
+        with self._lock:
+            self._bloom.bits = bytearray(len(self._bloom.bits))
+            if self._prefixes is not None:
+                self._prefixes = set()
+            self._count = 0
+
+    def refresh(self, vote_index):
+        """Add every receipt the index gained since the last refresh"""
+        reset = vote_index.last_reset()
+        if reset != self._reset:
+            # Everyone may vote again after a VotingReset: reload from the votes after it
+            self.clear()
+            self._watermark = -1
+            self._reset = reset
+
+        # Rows at or below the index's synced block are final; anything newer
+        # (cast_vote adds its own log right away) is re-read until sync passes it
+        synced = vote_index.last_block()
+        added = 0
+        for receipt_hash in vote_index.receipts_since(self._watermark + 1):
+            before = self._count
+            self.add(receipt_hash)
+            added += self._count - before
+        self._watermark = max(self._watermark, synced)
+        return added
+
+    def start_refresh(self, vote_index, interval=5):
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh(vote_index)
+                except Exception as e:
+                    print("❌ Voted filter refresh error:", e)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
@@ -0,0 +1,253 @@
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import STORAGE_SECONDS
+
+# ------------------------------
+# Voter store
+# ------------------------------
+# The electoral roll in SQLite, indexed by booth, by booth + name and by
+# phone number. dummy_voters.csv stays the human-editable source: the store
+# re-imports it whenever its size / mtime no longer match the last import,
+# and BLO edits are written to both (mark_csv_synced() after the CSV write).
+#
+# Booth listings are keyset-paginated on EPIC_ID, so any page costs the
+# same no matter how deep into the roster it is.
+
+VOTER_FIELDS = [
+    "EPIC_ID", "Name", "Gender", "Age", "Phone_Number", "Relation",
+    "Assembly_Constituency", "Polling_Station_Name", "Polling_Booth_ID",
+    "Part_Number", "Serial_Number", "State", "District"
+]
+
+
+def clean_mobile(mobile):
+    """Remove spaces, +, - from number for uniform comparison"""
+    return mobile.replace(" ", "").replace("-", "").replace("+", "").strip()
+
+
+def _prefix_bound(prefix):
+    return prefix + "\U0010ffff"
+
+
+class VoterStore:
+
+    def __init__(self, db_path, csv_path=None):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._watcher = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        columns = ",\n".join(f'"{f}" TEXT' for f in VOTER_FIELDS[1:])
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS voters (
+                EPIC_ID TEXT PRIMARY KEY COLLATE NOCASE,
+                {columns},
+                name_key TEXT,
+                phone_key TEXT
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS voters_booth ON voters (Polling_Booth_ID, EPIC_ID);
+            CREATE INDEX IF NOT EXISTS voters_booth_name ON voters (Polling_Booth_ID, name_key);
+            CREATE INDEX IF NOT EXISTS voters_phone ON voters (phone_key);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _record(row):
+        values = [str(row.get(f, "") or "").strip() for f in VOTER_FIELDS]
+        name = values[VOTER_FIELDS.index("Name")]
+        phone = values[VOTER_FIELDS.index("Phone_Number")]
+        return (*values, name.lower(), clean_mobile(phone))
+
+    _INSERT = (
+        f"INSERT OR REPLACE INTO voters ({', '.join(VOTER_FIELDS)}, name_key, phone_key) "
+        f"VALUES ({', '.join('?' * (len(VOTER_FIELDS) + 2))})"
+    )
+
+    # ---------------- CSV sync ----------------
+    def _csv_stamp(self):
+        st = os.stat(self.csv_path)
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    def _set_stamp(self, stamp):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('csv_stamp', ?)", (stamp,))
+
+    def sync_csv(self):
+        """Reload the roll if the CSV changed since the last import; True if it did"""
+        if not self.csv_path or not os.path.isfile(self.csv_path):
+            return False
+
+        stamp = self._csv_stamp()
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'csv_stamp'").fetchone()
+            if row and row[0] == stamp:
+                return False
+
+            with open(self.csv_path, newline='', encoding='utf-8') as f:
+                records = [self._record(r) for r in csv.DictReader(f) if r.get("EPIC_ID")]
+
+            with self._conn:
+                self._conn.execute("DELETE FROM voters")
+                self._conn.executemany(self._INSERT, records)
+                self._set_stamp(stamp)
+
+        print(f"📥 Voter store loaded {len(records)} voters from CSV")
+        return True
+
+    def mark_csv_synced(self):
+        """Call after writing the same change to the CSV the store already has"""
+        with self._lock, self._conn:
+            self._set_stamp(self._csv_stamp())
+
+    def mark_csv_synced_in(self, conn):
+        """Same as mark_csv_synced, inside a transaction() the caller already holds"""
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('csv_stamp', ?)", (self._csv_stamp(),))
+
+    def start_watch(self, interval=5, lock=None):
+        """Re-import the CSV whenever it is edited by hand; `lock` is held around each check"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    if lock is None:
+                        self.sync_csv()
+                    else:
+                        with lock:
+                            self.sync_csv()
+                except Exception as e:
+                    print("❌ Voter CSV sync error:", e)
+
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=loop, daemon=True)
+            self._watcher.start()
+
+    # ---------------- Write ----------------
+    @contextmanager
+    def transaction(self):
+        """Exclusive connection for multi-table writes (e.g. edit_requests.py); commits on exit"""
+        with self._lock, self._conn:
+            yield self._conn
+
+    def add(self, voter):
+        with self._lock, self._conn:
+            self._conn.execute(self._INSERT, self._record(voter))
+
+    def update(self, epic, changes):
+        return self.update_many([(epic, changes)]) == 1
+
+    def update_many(self, edits):
+        """[(epic, {field: value})] applied in one transaction; returns rows changed"""
+        with self.transaction() as conn:
+            return self.apply_edits(conn, edits)
+
+    def apply_edits(self, conn, edits):
+        """Same as update_many, inside a transaction() the caller already holds"""
+        changed = 0
+        for epic, changes in edits:
+            current = self._get(epic)
+            if current is None:
+                continue
+            current.update({k: v for k, v in changes.items() if k in VOTER_FIELDS and k != "EPIC_ID"})
+            conn.execute(self._INSERT, self._record(current))
+            changed += 1
+        return changed
+
+    def delete(self, epic):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM voters WHERE EPIC_ID = ?", (epic,)).rowcount == 1
+
+    # ---------------- Read ----------------
+    def _get(self, epic):
+        row = self._conn.execute(
+            f"SELECT {', '.join(VOTER_FIELDS)} FROM voters WHERE EPIC_ID = ?", (epic,)
+        ).fetchone()
+        return dict(zip(VOTER_FIELDS, row)) if row else None
+
+    def get(self, epic):
+        with self._lock, STORAGE_SECONDS.time(op="voter_lookup"):
+            return self._get(epic)
+
+    def by_phone(self, mobile):
+        with self._lock, STORAGE_SECONDS.time(op="voter_lookup"):
+            row = self._conn.execute(
+                f"SELECT {', '.join(VOTER_FIELDS)} FROM voters WHERE phone_key = ? LIMIT 1",
+                (clean_mobile(mobile),)
+            ).fetchone()
+        return dict(zip(VOTER_FIELDS, row)) if row else None
+
+    def page(self, booth, cursor=None, limit=100, fields=None, q=None):
+        """One keyset page of a booth: (rows, next_cursor). next_cursor is None at the end"""
+        fields = [f for f in (fields or VOTER_FIELDS) if f in VOTER_FIELDS]
+        if "EPIC_ID" not in fields:
+            fields.insert(0, "EPIC_ID")
+
+        sql = f"SELECT {', '.join(fields)} FROM voters WHERE Polling_Booth_ID = ?"
+        args = [booth]
+
+        if cursor:
+            sql += " AND EPIC_ID > ?"
+            args.append(cursor)
+
+        if q:
+            q = q.strip()
+            sql += " AND ((EPIC_ID >= ? AND EPIC_ID < ?) OR (name_key >= ? AND name_key < ?))"
+            args += [q, _prefix_bound(q), q.lower(), _prefix_bound(q.lower())]
+
+        sql += " ORDER BY EPIC_ID LIMIT ?"
+        args.append(limit + 1)
+
+        with self._lock, STORAGE_SECONDS.time(op="voter_page"):
+            rows = self._conn.execute(sql, args).fetchall()
+
+        more = len(rows) > limit
+        rows = [dict(zip(fields, r)) for r in rows[:limit]]
+        return rows, (rows[-1]["EPIC_ID"] if more else None)
+
+    def iter_booth(self, booth, fields=None, q=None, chunk=500):
+        cursor = None
+        while True:
+            rows, cursor = self.page(booth, cursor, chunk, fields, q)
+            yield from rows
+            if cursor is None:
+                return
+
+    def booths(self):
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT Polling_Booth_ID FROM voters")]
+
+    def phones(self):
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT Phone_Number FROM voters")]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM voters").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ------------------------------
+# CLI: python voter_store.py [dummy_voters.csv] [voters.db]
+# ------------------------------
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    src = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, "Dataset", "dummy_voters.csv")
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.join(project_root, "Dataset", "voters.db")
+
+    store = VoterStore(dst, src)
+    store.sync_csv()
+    print(f"✅ {store.count()} voters in {dst}")
+    store.close()
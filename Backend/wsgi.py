@@ -0,0 +1,11 @@
+import os
+
+# ------------------------------
+# WSGI entry point
+# ------------------------------
+#   gunicorn -c gunicorn.conf.py wsgi:app
+
+# app.py opens its ABI files relative to Backend/
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+from app import app  # noqa: E402,F401
@@ -23,10 +23,18 @@ window.onload = () => {
     loadVoters();
 };
 
-/* ---------- LOAD VOTERS ---------- */
-async function loadVoters() {
+/* ---------- LOAD VOTERS (paged, searched on the server) ---------- */
+const PAGE_SIZE = 100;
+let nextCursor = null;
+let searchQuery = "";
+
+async function fetchVoterPage(append) {
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (append && nextCursor) params.set("cursor", nextCursor);
+    if (searchQuery) params.set("q", searchQuery);
+
     try {
-        const res = await fetch(`http://127.0.0.1:5000/get-voters/${boothId}`);
+        const res = await fetch(`http://127.0.0.1:5000/get-voters/${encodeURIComponent(boothId)}?${params}`);
         const data = await res.json();
 
         if (data.status !== "success") {
@@ -34,7 +42,8 @@ async function loadVoters() {
             return;
         }
 
-        allVoters = data.voters;
+        allVoters = append ? allVoters.concat(data.voters) : data.voters;
+        nextCursor = data.next_cursor;
         renderTable(allVoters);
 
     } catch (err) {
@@ -43,10 +52,20 @@ async function loadVoters() {
     }
 }
 
+function loadVoters() {
+    searchQuery = "";
+    fetchVoterPage(false);
+}
+
+function loadMoreVoters() {
+    if (nextCursor) fetchVoterPage(true);
+}
+
 /* ---------- RENDER TABLE ---------- */
 function renderTable(voters) {
     const table = document.getElementById("voterTable");
     table.innerHTML = "";
+    document.getElementById("loadMore").style.display = nextCursor ? "inline-block" : "none";
 
     if (!voters || voters.length === 0) {
         table.innerHTML = `<tr><td colspan="14">No voters found</td></tr>`;
@@ -80,22 +99,10 @@ function renderTable(voters) {
 }
 
 
-/* ---------- SEARCH ---------- */
+/* ---------- SEARCH (EPIC or name prefix) ---------- */
 function searchVoter() {
-    const epic = document.getElementById("searchEpic").value
-        .trim()
-        .toUpperCase();
-
-    if (!epic) {
-        renderTable(allVoters);
-        return;
-    }
-
-    const filtered = allVoters.filter(v =>
-        v.EPIC_ID.toUpperCase().includes(epic)
-    );
-
-    renderTable(filtered);
+    searchQuery = document.getElementById("searchEpic").value.trim();
+    fetchVoterPage(false);
 }
 
 /* ---------- UPDATE VOTER ---------- */
@@ -160,50 +167,58 @@ async function removeVoter(epic) {
     }
 }
 async function loadApprovals() {
-    const res = await fetch(`http://127.0.0.1:5000/get-approvals/${boothId}`);
+    const res = await fetch(`http://127.0.0.1:5000/get-approvals/${encodeURIComponent(boothId)}`);
     const data = await res.json();
 
     const table = document.getElementById("approvalTable");
     table.innerHTML = "";
+    document.getElementById("batchActions").style.display = data.requests.length ? "block" : "none";
 
     if (data.requests.length === 0) {
-        table.innerHTML = "<tr><td colspan='5'>No pending requests</td></tr>";
+        table.innerHTML = "<tr><td colspan='6'>No pending requests</td></tr>";
         return;
     }
 
     data.requests.forEach(r => {
         table.innerHTML += `
         <tr>
+            <td><input type="checkbox" class="approvalCheck" value="${r.request_id}"></td>
             <td>${r.EPIC_ID}</td>
             <td>${r.Old_Name} → <b>${r.New_Name}</b></td>
             <td>${r.Old_Age} → <b>${r.New_Age}</b></td>
             <td>${r.Old_Phone} → <b>${r.New_Phone}</b></td>
             <td>
-                <button onclick='approveRequest(${JSON.stringify(r)})'>✅ Approve</button>
-                <button onclick='rejectRequest("${r.EPIC_ID}")'>❌ Reject</button>
+                <button onclick="approveRequests([${r.request_id}])">✅ Approve</button>
+                <button onclick="rejectRequests([${r.request_id}])">❌ Reject</button>
             </td>
         </tr>`;
     });
 }
 
-function approveRequest(r) {
-    fetch("http://127.0.0.1:5000/approve-request", {
-        method: "POST",
-        headers: {"Content-Type": "application/json"},
-        body: JSON.stringify(r)
-    })
-    .then(res => res.json())
-    .then(() => loadApprovals());
+function selectedRequests() {
+    return [...document.querySelectorAll(".approvalCheck:checked")].map(c => Number(c.value));
 }
-function rejectRequest(epic) {
-    fetch("http://127.0.0.1:5000/reject-request", { 
+
+function decideRequests(endpoint, requestIds) {
+    if (requestIds.length === 0) return;
+
+    fetch(`http://127.0.0.1:5000/${endpoint}`, {
         method: "POST",
         headers: {"Content-Type": "application/json"},
-        body: JSON.stringify({ EPIC_ID: epic })
+        body: JSON.stringify({ request_ids: requestIds, booth_id: boothId })
     })
     .then(res => res.json())
     .then(() => loadApprovals());
 }
+
+function approveRequests(requestIds) {
+    decideRequests("approve-request", requestIds);
+}
+
+function rejectRequests(requestIds) {
+    decideRequests("reject-request", requestIds);
+}
+
 /* ---------- ADD MODAL ---------- */
 function openAddForm() {
     addModal.style.display = "block";
@@ -10,6 +10,73 @@ const VOTING_ADDRESS = "0x36Ec94E59C01B2419BeF8dE3c77B73e2A564E111";
 let provider, signer, ecContract, votingContract;
 let partyMap = {}; // { partyName: logoURL }
 
+const BACKEND_URL = "http://127.0.0.1:5000";
+
+// =====================
+// Stream paginated NDJSON from the backend, one callback per page
+// =====================
+async function streamPages(url, onPage) {
+    const res = await fetch(url);
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+
+        for (const line of lines) {
+            if (!line.trim()) continue;
+            const page = JSON.parse(line);
+            if (page.error) throw new Error(page.error);
+            onPage(page);
+        }
+    }
+}
+
+// =====================
+// Party / candidate pages, with the full-list getters as fallback
+// =====================
+// EC contracts deployed before getPartiesPage / getCandidatesByBoothPage
+// revert on the paged calls: read the whole list from the contract instead.
+async function streamParties(onPage) {
+    let pages = 0;
+    try {
+        await streamPages(`${BACKEND_URL}/api/parties`, page => { pages++; onPage(page); });
+    } catch (err) {
+        if (pages) throw err;
+        console.warn("Paged party read failed, using getAllParties:", err);
+        const [ids, names, leaders, descs, logos] = await ecContract.getAllParties();
+        onPage({
+            parties: ids.map((id, i) => ({
+                id: Number(id), name: names[i], leader: leaders[i], description: descs[i], logo: logos[i]
+            }))
+        });
+    }
+}
+
+async function streamCandidates(boothId, onPage) {
+    let pages = 0;
+    try {
+        await streamPages(`${BACKEND_URL}/api/candidates/${encodeURIComponent(boothId)}`, page => { pages++; onPage(page); });
+    } catch (err) {
+        if (pages) throw err;
+        console.warn("Paged candidate read failed, using getCandidatesByBooth:", err);
+        const [ids, names, parties, votes] = await ecContract.getCandidatesByBooth(boothId);
+        onPage({
+            candidates: ids.map((id, i) => ({
+                Candidate_ID: Number(id), Candidate_Name: names[i], Party_Name: parties[i], Votes: Number(votes[i])
+            }))
+        });
+    }
+}
+
 // =====================
 // Load ABI JSON files
 // =====================
@@ -362,41 +429,37 @@ async function viewCandidates() {
     tableBody.innerHTML = `<tr><td colspan="5" style="text-align:center;">Loading candidates...</td></tr>`;
 
     try {
-        const result = await ecContract.getCandidatesByBooth(boothId);
-        const ids = result[0];
-        const names = result[1];
-        const parties = result[2];
-        const votes = result[3];
-
-        const partyData = await ecContract.getAllParties();
-        const partyNames = partyData[1];
-        const partyLogos = partyData[4];
-
-        function getLogo(partyName) {
-            const i = partyNames.indexOf(partyName);
-            return i !== -1 ? partyLogos[i] : "";
-        }
-
-        if (ids.length === 0) {
-            tableBody.innerHTML = `<tr><td colspan="5" style="text-align:center;color:#777;">No candidates found for this booth.</td></tr>`;
-            return;
-        }
+        const logos = {};
+        await streamParties(page => {
+            page.parties.forEach(p => { logos[p.name] = p.logo; });
+        });
 
-        let rows = "";
-        for (let i = 0; i < ids.length; i++) {
-            const logo = getLogo(parties[i]);
-            rows += `
+        let first = true;
+        await streamCandidates(boothId, page => {
+            if (first) {
+                tableBody.innerHTML = "";
+                first = false;
+            }
+
+            let rows = "";
+            page.candidates.forEach(c => {
+                const logo = logos[c.Party_Name] || "";
+                rows += `
                 <tr>
-                    <td>${ids[i]}</td>
-                    <td>${names[i]}</td>
-                    <td>${parties[i]}</td>
+                    <td>${c.Candidate_ID}</td>
+                    <td>${c.Candidate_Name}</td>
+                    <td>${c.Party_Name}</td>
                     <td>${logo ? `<img src="${logo}" style="width:45px;height:45px;border-radius:8px;border:1px solid #ddd;">` : "—"}</td>
-                    <td>${votes[i]}</td>
+                    <td>${c.Votes}</td>
                 </tr>
             `;
-        }
+            });
+            tableBody.insertAdjacentHTML("beforeend", rows);
+        });
 
-        tableBody.innerHTML = rows;
+        if (!tableBody.children.length) {
+            tableBody.innerHTML = `<tr><td colspan="5" style="text-align:center;color:#777;">No candidates found for this booth.</td></tr>`;
+        }
 
     } catch (err) {
         console.error(err);
@@ -1,6 +1,58 @@
 const voteBtn = document.getElementById("voteButton");
 const statusText = document.getElementById("statusText");
 
+// -------------------------------
+// Kiosk identity + camera source
+// -------------------------------
+// index.html?camera=browser captures this device's camera and uploads small
+// JPEG frames, so one backend can serve many thin kiosks: each such browser
+// is its own kiosk session on the backend (X-Kiosk-Id). Without it the
+// backend's own webcam is used, and the request carries no kiosk id (the
+// backend only uses its webcam for requests without one).
+const BROWSER_CAMERA = new URLSearchParams(location.search).get('camera') === 'browser';
+const FRAME_MAX_SIDE = 480;
+
+function kioskHeaders(extra = {}) {
+    if (!BROWSER_CAMERA) {
+        localStorage.removeItem('kioskId');   // vote.js follows the same session
+        return extra;
+    }
+    let id = localStorage.getItem('kioskId');
+    if (!id) {
+        id = 'kiosk-' + Math.random().toString(36).slice(2, 12);
+        localStorage.setItem('kioskId', id);
+    }
+    return { 'X-Kiosk-Id': id, ...extra };
+}
+
+let browserStream = null;
+const frameCanvas = document.createElement('canvas');
+
+async function startBrowserCamera() {
+    browserStream = await navigator.mediaDevices.getUserMedia({ video: { width: 640, height: 480 } });
+    const video = document.getElementById('browserCamera');
+    video.srcObject = browserStream;
+    video.style.display = 'block';
+    await video.play();
+}
+
+function stopBrowserCamera() {
+    if (browserStream) {
+        browserStream.getTracks().forEach(t => t.stop());
+        browserStream = null;
+    }
+    document.getElementById('browserCamera').style.display = 'none';
+}
+
+function captureFrame() {
+    const video = document.getElementById('browserCamera');
+    const scale = Math.min(1, FRAME_MAX_SIDE / Math.max(video.videoWidth, video.videoHeight));
+    frameCanvas.width = Math.round(video.videoWidth * scale);
+    frameCanvas.height = Math.round(video.videoHeight * scale);
+    frameCanvas.getContext('2d').drawImage(video, 0, 0, frameCanvas.width, frameCanvas.height);
+    return new Promise(resolve => frameCanvas.toBlob(resolve, 'image/jpeg', 0.85));
+}
+
 // -------------------------------
 // 🔒 Check Voting Status (GLOBAL GATE)
 // -------------------------------
@@ -100,7 +152,7 @@ async function verifyEpic() {
     try {
         const response = await fetch('/verify-epic', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: kioskHeaders({ 'Content-Type': 'application/json' }),
             body: JSON.stringify({ epic })
         });
 
@@ -161,13 +213,23 @@ async function startFaceDetection() {
     cameraError.innerText = "📷 Starting camera...";
 
     try {
-        await fetch('/start-camera');
-        showLiveCamera();
+        if (BROWSER_CAMERA) {
+            await startBrowserCamera();
+        } else {
+            await fetch('/start-camera');
+            showLiveCamera();
+        }
         await new Promise(resolve => setTimeout(resolve, 800));
         cameraError.innerText = "🔍 Looking for face...";
 
         faceIntervalId = setInterval(async () => {
-            const response = await fetch('/verify-face', { method: 'POST' });
+            const response = BROWSER_CAMERA
+                ? await fetch('/verify-face', {
+                    method: 'POST',
+                    headers: kioskHeaders({ 'Content-Type': 'image/jpeg' }),
+                    body: await captureFrame()
+                })
+                : await fetch('/verify-face', { method: 'POST', headers: kioskHeaders() });
             const result = await response.json();
 
             if (result.status === 'success') {
@@ -202,7 +264,11 @@ async function stopFaceDetection() {
         faceIntervalId = null;
     }
 
-    await fetch('/stop-camera');
+    if (BROWSER_CAMERA) {
+        stopBrowserCamera();
+    } else {
+        await fetch('/stop-camera');
+    }
     document.getElementById('cameraFeed').style.display = 'none';
     cameraError.innerText = "🛑 Face detection stopped.";
 }
@@ -213,7 +279,7 @@ async function stopFaceDetection() {
 // Show Voting Options
 // -------------------------------
 async function showVotingOptions() {
-    const res = await fetch('/get-candidates');
+    const res = await fetch('/get-candidates', { headers: kioskHeaders() });
     const data = await res.json();
 
     if (data.status === 'ok') {
@@ -240,14 +306,14 @@ async function castVote(candidateId) {
     try {
         const res = await fetch('/cast-vote', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: kioskHeaders({ 'Content-Type': 'application/json' }),
             body: JSON.stringify({ candidate_id: candidateId })
         });
 
         const data = await res.json();
         console.log("⬅ server replied:", data);
 
-        if (data.status === 'success') {
+        if (data.status === 'success' || data.status === 'queued') {
 
             alert("✅ Vote submitted successfully!");
             window.location.href = "index.html";
@@ -90,7 +90,7 @@ function loginByEpic() {
     fetch("http://127.0.0.1:5000/verify-epic", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ epic })
+        body: JSON.stringify({ epic, purpose: "lookup" })
     })
     .then(res => res.json())
     .then(data => {
@@ -2,6 +2,12 @@ console.log("✅ vote.js loaded");
 
 let selectedCandidate = null;
 
+// Same kiosk session as index.js (X-Kiosk-Id kept in localStorage)
+function kioskHeaders(extra = {}) {
+    const id = localStorage.getItem('kioskId');
+    return id ? { 'X-Kiosk-Id': id, ...extra } : extra;
+}
+
 // -------------------------------
 // Load Candidates on Page Load
 // -------------------------------
@@ -12,7 +18,7 @@ async function fetchCandidates() {
     container.innerHTML = "<p>Loading candidates...</p>";
 
     try {
-        const res = await fetch("/get-candidates");
+        const res = await fetch("/get-candidates", { headers: kioskHeaders() });
         const data = await res.json();
 
         console.log("⬅ get-candidates response:", data);
@@ -71,7 +77,7 @@ document.getElementById("voteForm").addEventListener("submit", async (e) => {
     try {
         const res = await fetch("/cast-vote", {
             method: "POST",
-            headers: { "Content-Type": "application/json" },
+            headers: kioskHeaders({ "Content-Type": "application/json" }),
             body: JSON.stringify({
                 candidate_id: selectedCandidate
             })
@@ -80,7 +86,7 @@ document.getElementById("voteForm").addEventListener("submit", async (e) => {
         const data = await res.json();
         console.log("⬅ cast-vote response:", data);
 
-        if (data.status === "success") {
+        if (data.status === "success" || data.status === "queued") {
 
             // Show popup with transaction hash (or receipt hash)
             let hash = data.tx_hash || data.receiptHash || data.hash || "N/A";